@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+CodeFuser benchmark runner
+
+Generates a synthetic tree (see synthetic_tree.py) and times the pipeline
+stages on it: every scan backend, every smart filter, every git filter,
+every output format and every template. Each benchmark runs --repeat
+times; the minimum, median and mean are stored with the commit, Python
+version and tree spec in benchmarks/results/, and --compare checks the
+run against an earlier result file.
+
+    python benchmarks/run_benchmarks.py --files 5000 --compare latest
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARK_DIR.parent
+RESULTS_DIR = BENCHMARK_DIR / 'results'
+
+# Settings, the metrics index and custom templates live in ~/.codefuser; point
+# HOME at a scratch directory before the app modules are imported so runs
+# neither read nor change the user's state
+_HOME = tempfile.mkdtemp(prefix='codefuser-bench-home-')
+os.environ['HOME'] = os.environ['USERPROFILE'] = _HOME
+
+sys.path.insert(0, str(REPO_ROOT / 'src'))
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from config_manager import ConfigManager  # noqa: E402
+from content_cache import ContentCache  # noqa: E402
+from file_scanner import FileScanner  # noqa: E402
+from git_integration import GitIntegration  # noqa: E402
+from smart_filters import SmartFilters  # noqa: E402
+from template_engine import TemplateEngine  # noqa: E402
+import instrumentation  # noqa: E402
+from synthetic_tree import TreeSpec, generate_tree  # noqa: E402
+
+SECTIONS = ['scan', 'filters', 'git', 'formats', 'templates']
+
+# Benchmark defaults that differ from the app's: the metrics index persists
+# between runs, so it is off unless a run asks for it with --set
+DEFAULT_OVERRIDES = {
+    'filter_settings': {'metrics_index': False},
+}
+
+
+class BenchmarkConfig(ConfigManager):
+    """Default settings plus overrides; nothing is written to disk"""
+
+    def __init__(self, overrides):
+        self._overrides = overrides
+        super().__init__()
+
+    def _load_user_settings(self):
+        return json.loads(json.dumps(self._overrides))
+
+    def _save_user_settings(self):
+        pass
+
+
+class Runner:
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results = {}
+
+    def measure(self, name: str, func, setup=None):
+        """Time func() repeat times; setup() runs untimed before each call and its result is passed in"""
+        times = []
+        items = None
+        for _ in range(self.repeat):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            result = func(state) if setup else func()
+            times.append(time.perf_counter() - start)
+            if hasattr(result, '__len__') and not isinstance(result, str):
+                items = len(result)
+
+        self.results[name] = {
+            'min': min(times),
+            'median': statistics.median(times),
+            'mean': statistics.fmean(times),
+            'runs': times,
+            'items': items,
+        }
+        count = f'{items:>8}' if items is not None else f"{'':>8}"
+        print(f'  {name:<40}{min(times) * 1000:>10.1f} ms{statistics.median(times) * 1000:>10.1f} ms{count}')
+
+    def skip(self, name: str, reason: str):
+        self.results[name] = {'skipped': reason}
+        print(f'  {name:<40}  skipped: {reason}')
+
+
+def bench_scan(runner, config, tree, extensions):
+    scanner = FileScanner(config)
+    for backend in scanner.backends:
+        runner.measure(f'scan.{backend}',
+                       lambda backend=backend: scanner.scan_directory(tree, extensions, backend=backend))
+    scanner.git_integration.close()
+
+
+def bench_filters(runner, config, files):
+    smart_filters = SmartFilters(config)
+
+    def fresh_cache():
+        # Each repetition starts with cold content, as after a new scan
+        smart_filters.content_cache = ContentCache()
+
+    try:
+        for filter_id, _, _ in smart_filters.get_available_filters():
+            runner.measure(f'filter.{filter_id}',
+                           lambda _, filter_id=filter_id: smart_filters.apply_filter(files, filter_id),
+                           setup=fresh_cache)
+    finally:
+        if smart_filters.filter_executor:
+            smart_filters.filter_executor.shutdown()
+
+
+def bench_git(runner, config, tree, files):
+    integrations = []
+
+    def fresh_integration():
+        integration = GitIntegration(config)
+        integrations.append(integration)
+        return integration
+
+    def warm_integration(filter_type):
+        integration = fresh_integration()
+        integration.filter_files_by_git_status(files, tree, filter_type)
+        return integration
+
+    try:
+        for filter_type, _ in GitIntegration(config).get_git_filters():
+            if filter_type == 'all':
+                continue
+            runner.measure(f'git.{filter_type}.cold',
+                           lambda integration, filter_type=filter_type:
+                               integration.filter_files_by_git_status(files, tree, filter_type),
+                           setup=fresh_integration)
+            runner.measure(f'git.{filter_type}.warm',
+                           lambda integration, filter_type=filter_type:
+                               integration.filter_files_by_git_status(files, tree, filter_type),
+                           setup=lambda filter_type=filter_type: warm_integration(filter_type))
+    finally:
+        for integration in integrations:
+            integration.close()
+
+
+def bench_formats(runner, config, files, output_dir):
+    try:
+        from output_manager import OutputManager
+    except ImportError as e:
+        runner.skip('format.*', f'output_manager could not be imported ({e})')
+        return
+
+    output_manager = OutputManager(config)
+    for fmt in output_manager.get_available_formats():
+        def export(_, fmt=fmt):
+            output_manager.content_cache = ContentCache()
+            return output_manager.create_output(files, output_dir / 'output', fmt)
+
+        try:
+            export(None)
+        except ImportError as e:
+            runner.skip(f'format.{fmt}', f'missing dependency ({e})')
+            continue
+        runner.measure(f'format.{fmt}', lambda fmt=fmt: export(None, fmt))
+
+
+def bench_templates(runner, config, files):
+    template_engine = TemplateEngine(config)
+    for template_id in template_engine.get_available_templates():
+        def apply(_, template_id=template_id):
+            return template_engine.apply_template(template_id, files)
+
+        def fresh_cache():
+            template_engine.content_cache = ContentCache()
+
+        runner.measure(f'template.{template_id}', apply, setup=fresh_cache)
+
+
+def _git_output(*args):
+    try:
+        result = subprocess.run(['git'] + list(args), cwd=REPO_ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def source_version():
+    commit = _git_output('rev-parse', '--short', 'HEAD')
+    status = _git_output('status', '--porcelain', '--untracked-files=no', '--', 'src')
+    return {
+        'commit': commit,
+        'describe': _git_output('describe', '--always', '--dirty'),
+        # Uncommitted changes to src make the commit id misleading
+        'dirty': bool(status),
+    }
+
+
+def latest_result(spec):
+    """Newest result file, preferring ones measured on the same tree spec"""
+    paths = sorted(RESULTS_DIR.glob('*.json'), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if json.load(f).get('spec') == spec.to_dict():
+                    return path
+        except (OSError, json.JSONDecodeError):
+            continue
+    return paths[0] if paths else None
+
+
+def compare(current, baseline, threshold, min_delta):
+    """Print current against baseline by minimum time; returns the names that got slower"""
+    if baseline.get('spec') != current.get('spec'):
+        print('Note: the baseline was measured on a different tree spec')
+
+    regressions = []
+    print(f"\n{'Benchmark':<40}{'Baseline':>12}{'Current':>12}{'Ratio':>8}")
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or 'min' not in before or 'min' not in result:
+            continue
+        ratio = result['min'] / before['min'] if before['min'] else float('inf')
+        slower = ratio > 1 + threshold and result['min'] - before['min'] > min_delta
+        faster = ratio < 1 / (1 + threshold) and before['min'] - result['min'] > min_delta
+        flag = '  slower' if slower else '  faster' if faster else ''
+        print(f"{name:<40}{before['min'] * 1000:>10.1f}ms{result['min'] * 1000:>10.1f}ms{ratio:>8.2f}{flag}")
+        if slower:
+            regressions.append(name)
+
+    if regressions:
+        print(f'\n{len(regressions)} benchmark(s) slower than {baseline.get("version", {}).get("describe")}'
+              f' by more than {threshold:.0%}')
+    return regressions
+
+
+def parse_overrides(pairs):
+    overrides = json.loads(json.dumps(DEFAULT_OVERRIDES))
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            pass
+        current = overrides
+        keys = key.split('.')
+        for part in keys[:-1]:
+            current = current.setdefault(part, {})
+        current[keys[-1]] = value
+    return overrides
+
+
+def parse_extensions(text):
+    extensions = {}
+    for item in text.split(','):
+        extension, _, weight = item.partition(':')
+        extension = extension.strip()
+        if not extension.startswith('.'):
+            extension = '.' + extension
+        extensions[extension] = int(weight or 1)
+    return extensions
+
+
+def build_parser():
+    spec = TreeSpec()
+    parser = argparse.ArgumentParser(description='Benchmark CodeFuser on a synthetic source tree')
+    tree = parser.add_argument_group('synthetic tree')
+    tree.add_argument('--files', type=int, default=spec.files, help='number of files (default %(default)s)')
+    tree.add_argument('--depth', type=int, default=spec.depth, help='directory depth (default %(default)s)')
+    tree.add_argument('--fan-out', type=int, default=spec.fan_out, help='subdirectories per directory (default %(default)s)')
+    tree.add_argument('--extensions', default=','.join(f'{ext}:{weight}' for ext, weight in spec.extensions.items()),
+                      help='extension mix as .ext:weight,... (default %(default)s)')
+    tree.add_argument('--ignored-ratio', type=float, default=spec.ignored_ratio,
+                      help='share of files in ignored folders (default %(default)s)')
+    tree.add_argument('--commits', type=int, default=spec.commits,
+                      help='commits of git history, 0 for no repository (default %(default)s)')
+    tree.add_argument('--lines', type=int, default=spec.lines, help='average lines per file (default %(default)s)')
+    tree.add_argument('--seed', type=int, default=spec.seed)
+    tree.add_argument('--keep', action='store_true', help='keep the generated tree and print where it is')
+
+    run = parser.add_argument_group('run')
+    run.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark (default %(default)s)')
+    run.add_argument('--only', nargs='+', choices=SECTIONS, help='run only these sections')
+    run.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                     help='override a setting, e.g. --set filter_settings.process_workers=4')
+    run.add_argument('--label', default='', help='free text stored with the results')
+    run.add_argument('--no-save', action='store_true', help='do not write a result file')
+
+    check = parser.add_argument_group('comparison')
+    check.add_argument('--compare', metavar='latest|PATH',
+                       help='compare with the newest result file or the given one')
+    check.add_argument('--threshold', type=float, default=0.10,
+                       help='relative slowdown reported as a regression (default %(default)s)')
+    check.add_argument('--min-delta', type=float, default=0.001,
+                       help='ignore differences below this many seconds (default %(default)s)')
+    check.add_argument('--fail-on-regression', action='store_true', help='exit with status 1 on regressions')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    spec = TreeSpec(files=args.files, depth=args.depth, fan_out=args.fan_out,
+                    extensions=parse_extensions(args.extensions), ignored_ratio=args.ignored_ratio,
+                    commits=args.commits, lines=args.lines, seed=args.seed)
+    overrides = parse_overrides(args.set)
+    sections = args.only or SECTIONS
+
+    baseline = None
+    if args.compare:
+        # Resolved before this run's file is written
+        path = latest_result(spec) if args.compare == 'latest' else Path(args.compare)
+        if path is None:
+            print('No earlier results to compare with')
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            print(f'Comparing with {path}')
+
+    work_dir = Path(tempfile.mkdtemp(prefix='codefuser-bench-'))
+    tree = work_dir / 'tree'
+    try:
+        print(f'Generating {spec.files} files in {tree} ...')
+        start = time.perf_counter()
+        generate_tree(tree, spec)
+        print(f'  done in {time.perf_counter() - start:.1f} s')
+
+        config = BenchmarkConfig(overrides)
+        extensions = list(spec.extensions)
+        runner = Runner(args.repeat)
+        instrumentation.recorder.start_run('benchmark')
+
+        # Filters, git filters, formats and templates all work on the rows the
+        # GUI would hand them
+        scanner = FileScanner(config)
+        files = scanner.scan_directory_table(tree, extensions)
+        scanner.git_integration.close()
+        print(f'  {len(files)} files in the scan\n')
+        print(f"  {'Benchmark':<40}{'Min':>13}{'Median':>13}{'Items':>8}")
+
+        if 'scan' in sections:
+            bench_scan(runner, config, tree, extensions)
+        if 'filters' in sections:
+            bench_filters(runner, config, files)
+        if 'git' in sections:
+            if spec.commits > 0:
+                bench_git(runner, config, tree, files)
+            else:
+                runner.skip('git.*', 'the tree has no git history (--commits 0)')
+        if 'formats' in sections:
+            bench_formats(runner, config, files, work_dir)
+        if 'templates' in sections:
+            bench_templates(runner, config, files)
+    finally:
+        if args.keep:
+            print(f'\nTree kept in {tree}')
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        shutil.rmtree(_HOME, ignore_errors=True)
+
+    version = source_version()
+    current = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'label': args.label,
+        'version': version,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': args.repeat,
+        'spec': spec.to_dict(),
+        'settings': overrides,
+        'results': runner.results,
+        'instrumentation': instrumentation.recorder.report(),
+    }
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = RESULTS_DIR / f"{stamp}_{version['commit'] or 'unknown'}{'-dirty' if version['dirty'] else ''}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f'\nResults saved to {path}')
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.threshold, args.min_delta)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
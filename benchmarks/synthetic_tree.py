@@ -0,0 +1,204 @@
+"""
+Synthetic source trees for the benchmarks.
+
+generate_tree() writes a deterministic tree for a TreeSpec: the same spec
+and seed always give the same paths and contents. Files are spread over
+nested package directories and get content that the smart filters look
+for (TODOs, docstrings, imports, tests, long functions). A share of the
+files lands in folders CodeFuser ignores by default, and with commits > 0
+the tree becomes a git repository with that many commits plus uncommitted
+edits, staged and untracked files for the git filters.
+"""
+
+import os
+import random
+import subprocess
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+DEFAULT_EXTENSIONS = {
+    '.py': 40,
+    '.js': 20,
+    '.ts': 10,
+    '.md': 10,
+    '.json': 10,
+    '.html': 5,
+    '.css': 5,
+}
+
+# Ignored folders: the first ones are in the default ignore_folders list,
+# the last is only excluded by the tree's .gitignore
+IGNORED_FOLDERS = ['node_modules', '__pycache__', 'build', 'dist', 'generated']
+
+_WORDS = ['user', 'order', 'cache', 'index', 'report', 'session', 'token', 'graph',
+          'parser', 'buffer', 'stream', 'config', 'client', 'server', 'metric', 'queue']
+
+
+@dataclass
+class TreeSpec:
+    files: int = 2000
+    depth: int = 4
+    # Subdirectories per directory
+    fan_out: int = 4
+    # Extension -> relative weight
+    extensions: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_EXTENSIONS))
+    # Share of files placed in ignored folders
+    ignored_ratio: float = 0.1
+    # Number of commits; 0 leaves the tree outside git
+    commits: int = 8
+    # Average lines per file
+    lines: int = 80
+    seed: int = 1
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _directories(spec: TreeSpec, rng: random.Random) -> List[str]:
+    directories = ['']
+    level = ['']
+    for _ in range(spec.depth):
+        next_level = []
+        for parent in level:
+            for _ in range(spec.fan_out):
+                name = f'{rng.choice(_WORDS)}_{len(directories)}'
+                path = f'{parent}/{name}' if parent else name
+                directories.append(path)
+                next_level.append(path)
+        level = next_level
+    return directories
+
+
+def _python_source(rng: random.Random, lines: int, name: str) -> str:
+    out = ['"""Module for %s handling."""' % name, '', 'import os', 'import json', '']
+    while len(out) < lines:
+        function = f'{rng.choice(_WORDS)}_{len(out)}'
+        out.append(f'def {function}(value, options=None):')
+        if rng.random() < 0.6:
+            out.append(f'    """Return the {rng.choice(_WORDS)} for value."""')
+        if rng.random() < 0.15:
+            out.append('    # TODO: handle the empty case')
+        if rng.random() < 0.05:
+            out.append('    # FIXME: this breaks on large inputs')
+        for depth in range(rng.randint(1, 4)):
+            out.append('    ' * (depth + 1) + f'if value > {depth}:')
+        out.append('    ' * 5 + 'value -= 1')
+        out.append('    return value')
+        out.append('')
+    if name.startswith('test_'):
+        out += ['', 'def test_module():', '    assert True']
+    return '\n'.join(out) + '\n'
+
+
+def _script_source(rng: random.Random, lines: int, name: str) -> str:
+    out = [f'// {name}', "import { helper } from './helper';", '']
+    while len(out) < lines:
+        function = f'{rng.choice(_WORDS)}{len(out)}'
+        if rng.random() < 0.4:
+            out.append(f'/** Compute {rng.choice(_WORDS)}. */')
+        out.append(f'export function {function}(value) {{')
+        if rng.random() < 0.15:
+            out.append('  // TODO: validate input')
+        out.append('  if (value > 1) { console.log(value); }')
+        out.append('  return helper(value);')
+        out.append('}')
+        out.append('')
+    return '\n'.join(out) + '\n'
+
+
+def _text_source(rng: random.Random, lines: int, extension: str, name: str) -> str:
+    if extension == '.json':
+        items = ', '.join(f'"{rng.choice(_WORDS)}_{i}": {i}' for i in range(lines // 2))
+        return '{"name": "%s", %s}\n' % (name, items)
+    if extension == '.html':
+        body = '\n'.join(f'<p>{rng.choice(_WORDS)} {i}</p>' for i in range(lines))
+        return f'<!DOCTYPE html>\n<html><head><title>{name}</title></head>\n<body>\n{body}\n</body></html>\n'
+    if extension == '.css':
+        return ''.join(f'.{rng.choice(_WORDS)}-{i} {{ margin: {i}px; }}\n' for i in range(lines))
+    return f'# {name}\n\n' + ''.join(f'- {rng.choice(_WORDS)} {i}\n' for i in range(lines))
+
+
+def file_content(rng: random.Random, extension: str, lines: int, name: str) -> str:
+    # Sizes vary a lot in real trees; keep a few big files in the mix
+    lines = max(3, int(rng.lognormvariate(0, 0.8) * lines))
+    if extension == '.py':
+        return _python_source(rng, lines, name)
+    if extension in ('.js', '.ts'):
+        return _script_source(rng, lines, name)
+    return _text_source(rng, lines, extension, name)
+
+
+def _git(root: Path, *args: str, date: datetime = None, stdin: str = None) -> None:
+    env = dict(os.environ)
+    if date is not None:
+        env['GIT_AUTHOR_DATE'] = env['GIT_COMMITTER_DATE'] = date.strftime('%Y-%m-%dT%H:%M:%S')
+    subprocess.run(['git', '-c', 'user.name=Benchmark', '-c', 'user.email=bench@example.com',
+                    '-c', 'commit.gpgsign=false'] + list(args),
+                   cwd=root, env=env, input=stdin.encode('utf-8') if stdin else None,
+                   check=True, capture_output=True)
+
+
+def generate_tree(root: Path, spec: TreeSpec) -> List[str]:
+    """Write the tree for spec below root; returns the relative paths written"""
+    rng = random.Random(spec.seed)
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    directories = _directories(spec, rng)
+    extensions = list(spec.extensions)
+    weights = [spec.extensions[ext] for ext in extensions]
+
+    written = []
+    for index in range(spec.files):
+        directory = rng.choice(directories)
+        if rng.random() < spec.ignored_ratio:
+            directory = f'{directory}/{rng.choice(IGNORED_FOLDERS)}' if directory else rng.choice(IGNORED_FOLDERS)
+        extension = rng.choices(extensions, weights)[0]
+        prefix = 'test_' if rng.random() < 0.1 else ''
+        name = f'{prefix}{rng.choice(_WORDS)}_{index}{extension}'
+
+        path = root / directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(file_content(rng, extension, spec.lines, name), encoding='utf-8')
+        written.append(f'{directory}/{name}' if directory else name)
+
+    (root / '.gitignore').write_text('generated/\n*.log\n', encoding='utf-8')
+    if spec.commits > 0:
+        _make_history(root, spec, rng, written)
+    return written
+
+
+def _make_history(root: Path, spec: TreeSpec, rng: random.Random, written: List[str]) -> None:
+    _git(root, 'init', '-q')
+    # Default-ignored folders are excluded locally so git status stays realistic
+    (root / '.git' / 'info').mkdir(exist_ok=True)
+    with open(root / '.git' / 'info' / 'exclude', 'a', encoding='utf-8') as f:
+        f.write(''.join(f'{name}/\n' for name in IGNORED_FOLDERS))
+
+    # Commits are an hour apart and the last one is half an hour old, so
+    # every "changed in the last N hours" filter finds some of them
+    now = datetime.now().replace(microsecond=0)
+    first = now - timedelta(hours=spec.commits - 1, minutes=30)
+    tracked = [path for path in written if not any(part in IGNORED_FOLDERS for part in path.split('/'))]
+    _git(root, 'add', '-A')
+    _git(root, 'commit', '-q', '-m', 'Initial tree', date=first)
+
+    for commit in range(1, spec.commits):
+        for path in rng.sample(tracked, min(len(tracked), max(1, len(tracked) // 50))):
+            with open(root / path, 'a', encoding='utf-8') as f:
+                f.write(f'\n// change {commit}\n' if not path.endswith('.py') else f'\n# change {commit}\n')
+        _git(root, 'commit', '-q', '-a', '-m', f'Change {commit}', date=first + timedelta(hours=commit))
+
+    # Uncommitted work for the status filters
+    sample = rng.sample(tracked, min(len(tracked), max(3, len(tracked) // 100)))
+    for path in sample[::2]:
+        with open(root / path, 'a', encoding='utf-8') as f:
+            f.write('\n# local edit\n')
+    for path in sample[1::2]:
+        with open(root / path, 'a', encoding='utf-8') as f:
+            f.write('\n# staged edit\n')
+    _git(root, 'add', '--pathspec-from-file=-', stdin='\n'.join(sample[1::2]) + '\n')
+    for index in range(max(1, len(tracked) // 200)):
+        (root / f'untracked_{index}.py').write_text('print("new")\n', encoding='utf-8')
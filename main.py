@@ -6,6 +6,7 @@ Main entry point for the application
 
 import sys
 import os
+import multiprocessing
 from pathlib import Path
 
 # PyInstaller frozen app fix
@@ -52,8 +53,23 @@ def check_dependencies():
     
     return True
 
+def run_cli(argv):
+    """Run the headless command line interface; needs neither Tk nor Pillow"""
+    try:
+        from cli import main as cli_main
+    except ImportError as e:
+        print(f"❌ Error importing modules: {e}", file=sys.stderr)
+        return 1
+    return cli_main(argv)
+
 def main():
     """Main application entry point"""
+    # Any argument selects the command line interface (macOS adds -psn_* when
+    # an app bundle is opened from Finder)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('-psn_')]
+    if args:
+        sys.exit(run_cli(args))
+    
     print("🚀 Starting CodeFuser...")
     
     # Check dependencies first
@@ -90,4 +106,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Filter worker processes re-run this file; frozen builds need this first
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
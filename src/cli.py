@@ -0,0 +1,265 @@
+"""
+Headless command line interface
+
+Runs the same scan -> filter -> template -> export pipeline as the GUI
+without Tk, for CI jobs and servers:
+
+    python main.py src --project-type Python --filter has_todos -o todos.txt
+    python main.py . -e .py,.md --git-filter changed --template custom_code_review | less
+
+Text and HTML output can go to stdout ('-', the default); docx and pdf need
+a file. Messages go to stderr so they never mix with the output; that
+includes the error prints of the pipeline modules, which are redirected
+while the CLI runs.
+"""
+
+import argparse
+import os
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config_manager import ConfigManager
+from content_cache import ContentCache
+from file_scanner import FileScanner
+from smart_filters import SmartFilters
+from template_engine import TemplateEngine
+from output_manager import OutputManager
+import instrumentation
+
+
+def _message(text: str) -> None:
+    print(text, file=sys.stderr)
+
+
+def _parse_variables(pairs: List[str]) -> Dict[str, str]:
+    variables = {}
+    for pair in pairs:
+        name, separator, value = pair.partition('=')
+        if not separator:
+            raise ValueError(f"Template variable must look like NAME=VALUE: {pair}")
+        variables[name.strip()] = value
+    return variables
+
+
+def build_parser(config_manager: ConfigManager) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='codefuser',
+        description='Combine the files of a project into one document without the GUI.')
+    parser.add_argument('folder', nargs='?', type=Path, help='folder to scan')
+
+    scan = parser.add_argument_group('files')
+    scan.add_argument('-e', '--extensions',
+                      help='comma separated extensions or file names, e.g. .py,.md,Dockerfile')
+    scan.add_argument('-p', '--project-type', help='use the extensions of a configured project type')
+    scan.add_argument('--include-ignored', action='store_true',
+                      help='also scan ignored folders, files and .gitignore matches')
+    scan.add_argument('--backend', help='scanner backend (walk, scandir, parallel, indexed, git)')
+
+    filters = parser.add_argument_group('filters')
+    filters.add_argument('-f', '--filter', action='append', default=[], metavar='FILTER_ID',
+                         help='smart filter to apply; repeat for several (see --list-filters)')
+    filters.add_argument('--any', action='store_true',
+                         help='keep files matching any smart filter instead of all of them')
+    filters.add_argument('-g', '--git-filter', default='all', metavar='FILTER_ID',
+                         help='git filter to apply first, e.g. changed or since_hours_24')
+
+    output = parser.add_argument_group('output')
+    output.add_argument('-t', '--template', metavar='TEMPLATE_ID',
+                        help='build the prompt from a template (see --list-templates)')
+    output.add_argument('--var', action='append', default=[], metavar='NAME=VALUE',
+                        help='template variable, e.g. --var project_name=CodeFuser')
+    output.add_argument('--prompt', default='', help='prompt text when no template is used')
+    output.add_argument('--format', choices=config_manager.get_available_formats(),
+                        help='output format (default: from the output file name, else %s)'
+                             % config_manager.get_output_format())
+    output.add_argument('-o', '--output', default='-',
+                        help="output file, or '-' for stdout (default)")
+
+    info = parser.add_argument_group('information')
+    info.add_argument('--list-files', action='store_true',
+                      help='print the relative paths of the selected files instead of the output')
+    info.add_argument('--list-filters', action='store_true', help='print the available filters')
+    info.add_argument('--list-templates', action='store_true', help='print the available templates')
+    info.add_argument('--report', metavar='PATH',
+                      help="write a performance report as JSON ('-' prints it to stderr)")
+    info.add_argument('-q', '--quiet', action='store_true', help='only print errors')
+    return parser
+
+
+class CodeFuserCLI:
+    def __init__(self, config_manager: Optional[ConfigManager] = None, stdout=None):
+        self.config_manager = config_manager or ConfigManager()
+        # Where output and listings go; print() is sent to stderr during a run
+        self.stdout = stdout or sys.stdout
+        self.content_cache = ContentCache.from_config(self.config_manager)
+        self.file_scanner = FileScanner(self.config_manager)
+        # The scanner's git session already knows the repository; reuse it
+        self.git_integration = self.file_scanner.git_integration
+        self.smart_filters = SmartFilters(self.config_manager, self.content_cache)
+        self.template_engine = TemplateEngine(self.config_manager, self.content_cache)
+        self.output_manager = OutputManager(self.config_manager, self.content_cache)
+
+    def close(self) -> None:
+        self.git_integration.close()
+        if self.smart_filters.filter_executor:
+            self.smart_filters.filter_executor.shutdown()
+
+    def run(self, args: argparse.Namespace) -> int:
+        with redirect_stdout(sys.stderr):
+            return self._run(args)
+
+    def _run(self, args: argparse.Namespace) -> int:
+        if args.list_filters:
+            self.list_filters()
+            return 0
+        if args.list_templates:
+            self.list_templates()
+            return 0
+
+        if args.folder is None:
+            _message("A folder to scan is required")
+            return 2
+        folder = args.folder.resolve()
+        if not folder.is_dir():
+            _message(f"❌ Not a folder: {args.folder}")
+            return 2
+
+        extensions = self._extensions(args)
+        if extensions is None:
+            return 2
+        output_format = self._output_format(args)
+        if output_format is None:
+            return 2
+
+        instrumentation.recorder.start_run(str(folder))
+        files = self.select_files(folder, extensions, args)
+        if files is None:
+            return 2
+
+        if args.list_files:
+            for file_info in files:
+                print(file_info['relative_path'], file=self.stdout)
+        else:
+            if not files and not args.quiet:
+                _message("⚠️ No files matched; writing an empty output")
+            prompt = args.prompt
+            if args.template:
+                try:
+                    prompt = self.template_engine.apply_template(
+                        args.template, files, _parse_variables(args.var))
+                except ValueError as e:
+                    _message(f"❌ {e}")
+                    return 2
+            self.write_output(files, args.output, output_format, prompt, args.quiet)
+
+        if args.report:
+            if args.report == '-':
+                _message(instrumentation.recorder.format_report())
+            else:
+                instrumentation.recorder.save_report(args.report)
+        return 0
+
+    def select_files(self, folder: Path, extensions: List[str], args: argparse.Namespace):
+        """Scanned rows after the git and smart filters, or None on a bad filter id"""
+        git_filters = dict(self.git_integration.get_git_filters())
+        if args.git_filter not in git_filters and not args.git_filter.startswith('since_'):
+            _message(f"❌ Unknown git filter: {args.git_filter}")
+            return None
+        unknown = [filter_id for filter_id in args.filter if filter_id not in self.smart_filters.filters]
+        if unknown:
+            _message(f"❌ Unknown filter: {', '.join(unknown)}")
+            return None
+
+        try:
+            files = self.file_scanner.scan_directory_table(
+                folder, extensions, args.include_ignored, backend=args.backend)
+        except ValueError as e:
+            _message(f"❌ {e}")
+            return None
+        if not args.quiet:
+            _message(f"📁 {len(files)} files scanned in {folder}")
+
+        if args.git_filter != 'all':
+            with instrumentation.span(f'filter.git.{args.git_filter}'):
+                files = self.git_integration.filter_files_by_git_status(files, folder, args.git_filter)
+        if args.filter:
+            files = self.smart_filters.apply_multiple_filters(
+                files, args.filter, operation='OR' if args.any else 'AND')
+
+        if not args.quiet and (args.git_filter != 'all' or args.filter):
+            _message(f"🔍 {len(files)} files after filtering")
+        return files
+
+    def write_output(self, files, output: str, output_format: str, prompt: str, quiet: bool) -> None:
+        if output == '-':
+            self.output_manager.stream_output(files, self.stdout, output_format, prompt)
+            return
+
+        output_path = self.output_manager.create_output(files, Path(output), output_format, prompt)
+        if not quiet:
+            _message(f"✅ Output saved to {output_path}")
+
+    def _extensions(self, args: argparse.Namespace) -> Optional[List[str]]:
+        """Extensions to scan for; an empty list means every file"""
+        if args.project_type:
+            project_types = self.config_manager.get_project_types()
+            if args.project_type not in project_types:
+                _message(f"❌ Unknown project type: {args.project_type} "
+                         f"(configured: {', '.join(project_types)})")
+                return None
+            return list(project_types[args.project_type])
+        if args.extensions:
+            return [ext.strip() for ext in args.extensions.split(',') if ext.strip()]
+        return []
+
+    def _output_format(self, args: argparse.Namespace) -> Optional[str]:
+        output_format = args.format
+        if output_format is None and args.output != '-':
+            suffix = Path(args.output).suffix.lstrip('.').lower()
+            if suffix in self.output_manager.get_available_formats():
+                output_format = suffix
+        if output_format is None:
+            output_format = 'txt' if args.output == '-' else self.config_manager.get_output_format()
+
+        if args.output == '-' and not args.list_files:
+            formatter = self.output_manager.formatters.get(output_format)
+            if formatter is None or not formatter.streamable:
+                _message(f"❌ {output_format} output needs a file; pass -o PATH")
+                return None
+        return output_format
+
+    def list_filters(self) -> None:
+        print("Smart filters (--filter):", file=self.stdout)
+        for filter_id, name, category in self.smart_filters.get_available_filters():
+            print(f"  {filter_id:<20} {category:<10} {name}", file=self.stdout)
+        print("\nGit filters (--git-filter):", file=self.stdout)
+        for filter_id, name in self.git_integration.get_git_filters():
+            print(f"  {filter_id:<20} {name}", file=self.stdout)
+
+    def list_templates(self) -> None:
+        for template_id, template in self.template_engine.get_available_templates().items():
+            print(f"  {template_id:<28} {template.get('name', '')}", file=self.stdout)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    config_manager = ConfigManager()
+    args = build_parser(config_manager).parse_args(argv)
+
+    cli = CodeFuserCLI(config_manager)
+    try:
+        return cli.run(args)
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); keep the exit flush from failing too
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except ImportError as e:
+        _message(f"❌ Missing dependency for this output format: {e}")
+        return 1
+    finally:
+        cli.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
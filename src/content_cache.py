@@ -0,0 +1,94 @@
+"""
+Shared read cache for file contents.
+
+Filters, templates and the output stage all read the same selected files. The
+cache keeps raw bytes keyed by (path, mtime, size), so a file edited on disk
+is simply a miss, and evicts least-recently-used entries once the byte budget
+is exceeded. Text is decoded from the cached bytes on every call, the same
+way open(path, 'r') would.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import instrumentation
+
+
+class ContentCache:
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple[str, int, int], bytes]' = OrderedDict()
+        # path -> key of its cached version, to drop stale versions
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_manager) -> Optional['ContentCache']:
+        """Cache sized from cache_settings, or None when caching is disabled"""
+        if not config_manager.get('cache_settings.enabled', True):
+            return None
+        max_mb = config_manager.get('cache_settings.max_memory_mb', 256)
+        return cls(int(max_mb * 1024 * 1024))
+
+    def read_bytes(self, path) -> bytes:
+        path = os.fspath(path)
+        file_stat = os.stat(path)
+        key = (path, file_stat.st_mtime_ns, file_stat.st_size)
+
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                instrumentation.count('cache_hits')
+                return data
+            self.misses += 1
+
+        with instrumentation.span('read'):
+            with open(path, 'rb') as f:
+                data = f.read()
+        instrumentation.count_read(len(data))
+
+        # Files bigger than the whole budget are read but never cached
+        if len(data) != file_stat.st_size or len(data) > self.max_bytes:
+            return data
+
+        with self._lock:
+            stale_key = self._keys.get(path)
+            if stale_key is not None and stale_key != key:
+                self._remove(stale_key)
+
+            if key not in self._entries:
+                self._entries[key] = data
+                self._keys[path] = key
+                self.current_bytes += len(data)
+
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+        return data
+
+    def read_text(self, path, encoding: str = 'utf-8', errors: str = 'strict') -> str:
+        """Same result as open(path, 'r', encoding=encoding, errors=errors).read()"""
+        text = self.read_bytes(path).decode(encoding, errors)
+        # Universal newlines, as in text mode
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+
+    def _remove(self, key: Tuple[str, int, int]) -> None:
+        data = self._entries.pop(key)
+        self.current_bytes -= len(data)
+        if self._keys.get(key[0]) == key:
+            del self._keys[key[0]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self.current_bytes = 0
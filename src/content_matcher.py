@@ -0,0 +1,196 @@
+"""
+Multi-pattern content matching for the smart filters.
+
+A ContentMatcher tests a file's text against several named groups of regexes
+and returns a bitmask of the groups that occur in it. Every pattern carries the
+longest literal that any of its matches must contain; on ASCII text that
+literal is looked up with a plain substring search on the lowercased text
+first, and the regex only runs when the literal is present. Most patterns
+in a typical file never get past that check.
+"""
+
+import re
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+from content_stream import Piece
+
+# ((group name, (pattern, ...)), ...), hashable and picklable for worker processes
+GroupsKey = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+_METACHARACTERS = frozenset('.^$*+?{}[]|()')
+
+
+def _skip_quantifier(pattern: str, index: int) -> int:
+    if index < len(pattern) and pattern[index] in '*+?':
+        return index + 1
+    if index < len(pattern) and pattern[index] == '{':
+        end = pattern.find('}', index)
+        return end + 1 if end >= 0 else len(pattern)
+    return index
+
+
+_ESCAPE_ARGUMENT_LENGTHS = {'x': 2, 'u': 4, 'U': 8}
+
+
+def _skip_escape_argument(pattern: str, index: int, escaped: str) -> int:
+    """Position after the argument of the escape \\<escaped> whose argument starts at index"""
+    if escaped in _ESCAPE_ARGUMENT_LENGTHS:
+        return index + _ESCAPE_ARGUMENT_LENGTHS[escaped]
+    if escaped == 'N' and pattern.startswith('{', index):
+        end = pattern.find('}', index)
+        return len(pattern) if end < 0 else end + 1
+    if escaped.isdigit():
+        # Octal escapes take up to three digits, group references up to two
+        end = index
+        while end < len(pattern) and end < index + 2 and pattern[end].isdigit():
+            end += 1
+        return end
+    return index
+
+
+def required_literal(pattern: str) -> str:
+    """Longest literal every match of pattern contains, or '' if none is known.
+
+    Only the top-level sequence before the first group is considered, and any
+    alternation gives up, so the result is always a safe (if short) literal.
+    """
+    runs = []
+    run = ''
+    index = 0
+    length = len(pattern)
+
+    while index < length:
+        char = pattern[index]
+        if char == '|':
+            return ''
+        if char == '(':
+            break
+
+        if char == '\\' and index + 1 < length:
+            escaped = pattern[index + 1]
+            # \s, \w, \b, \1 and friends are classes, anchors or references;
+            # \x41, \u0041, \N{...} and \012 stand for one character whose
+            # argument must not be read as literal text
+            atom = None if escaped.isalnum() else escaped
+            index = _skip_escape_argument(pattern, index + 2, escaped)
+        elif char == '[':
+            end = index + 1
+            if end < length and pattern[end] == '^':
+                end += 1
+            if end < length and pattern[end] == ']':
+                end += 1
+            while end < length and pattern[end] != ']':
+                end += 2 if pattern[end] == '\\' else 1
+            atom = None
+            index = end + 1
+        elif char in _METACHARACTERS:
+            atom = None
+            index += 1
+        else:
+            atom = char
+            index += 1
+
+        quantifier = pattern[index] if index < length else ''
+        if atom is None or not atom.isascii() or quantifier in ('*', '?', '{'):
+            # The atom may be absent or repeated: the current run ends before it
+            runs.append(run)
+            run = ''
+            index = _skip_quantifier(pattern, index)
+            continue
+
+        run += atom
+        if quantifier == '+':
+            runs.append(run)
+            run = ''
+            index += 1
+
+    runs.append(run)
+    return max(runs, key=len)
+
+
+class ContentMatcher:
+    """Which of several named pattern groups occur in a text"""
+
+    def __init__(self, groups: Mapping[str, Sequence[str]],
+                 flags: int = re.IGNORECASE | re.MULTILINE):
+        self.bits = {name: 1 << bit for bit, name in enumerate(groups)}
+        self.all_bits = (1 << len(self.bits)) - 1
+        self._ignore_case = bool(flags & re.IGNORECASE)
+
+        self._groups = []
+        for name, patterns in groups.items():
+            compiled = []
+            for pattern in patterns:
+                literal = required_literal(pattern)
+                if self._ignore_case:
+                    literal = literal.lower()
+                compiled.append((literal, re.compile(pattern, flags).search))
+            self._groups.append((self.bits[name], compiled))
+
+    def match_mask(self, pieces: Iterable[Piece], operation: str = None) -> int:
+        """Bitmask of the groups found in a file's pieces (see content_stream).
+
+        With operation 'AND' the scan stops once a group is known to be
+        missing, with 'OR' at the first group found; the mask is then only
+        good for that test. Reading also stops once every group is found.
+        """
+        found = 0
+        for text, _, last in pieces:
+            # Only the last piece proves a group missing; any piece proves one present
+            found |= self.match_piece(text, found, operation if operation == 'OR' or last else None, last)
+            if found == self.all_bits or (operation == 'OR' and found):
+                break
+        return found
+
+    def match_piece(self, text: str, skip: int = 0, operation: Optional[str] = None,
+                    at_end: bool = True) -> int:
+        """Bitmask of the groups not in skip that occur in one piece's text"""
+        if self._ignore_case:
+            # Case-insensitive matching folds a few non-ASCII characters onto
+            # ASCII letters, so literals are only trusted on ASCII text
+            haystack = text.lower() if text.isascii() else None
+        else:
+            haystack = text
+
+        mask = 0
+        for bit, patterns in self._groups:
+            if skip & bit:
+                continue
+
+            for literal, search in patterns:
+                if literal and haystack is not None and literal not in haystack:
+                    continue
+                match = search(text)
+                # An empty match at the end of a piece belongs to the next piece
+                if match is not None and (at_end or match.start() < len(text)):
+                    mask |= bit
+                    break
+            else:
+                if operation == 'AND':
+                    return mask
+                continue
+
+            if operation == 'OR':
+                return mask
+
+        return mask
+
+    def matches(self, pieces: Iterable[Piece], operation: str = 'OR') -> bool:
+        """True if all groups ('AND') or any group ('OR') occur in the file"""
+        mask = self.match_mask(pieces, operation)
+        return mask == self.all_bits if operation == 'AND' else mask != 0
+
+
+_matchers: Dict[GroupsKey, ContentMatcher] = {}
+
+
+def matcher_for(groups: GroupsKey) -> ContentMatcher:
+    """Shared matcher for a set of groups, compiled on first use"""
+    matcher = _matchers.get(groups)
+    if matcher is None:
+        matcher = _matchers[groups] = ContentMatcher(dict(groups))
+    return matcher
+
+
+def text_matches(pieces: Iterable[Piece], groups: GroupsKey, operation: str) -> bool:
+    return matcher_for(groups).matches(pieces, operation)
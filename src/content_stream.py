@@ -0,0 +1,93 @@
+"""
+Bounded-memory reading of file text for the content filters.
+
+Content functions take a file as a sequence of pieces (text, start, last).
+A piece holds whole lines; text[:start] repeats up to `overlap` characters
+of lines from the previous piece, so a match crossing a piece boundary is
+still seen whole as long as it is shorter than the overlap. Counting only
+looks at text[start:], so nothing is counted twice. `last` marks the final
+piece, the only one whose end is the end of the file.
+
+Small files are a single piece holding the whole text. Files of at least
+`min_size` bytes are read in chunks and never held in memory whole, which
+lets a filter stop at its first hit without reading the rest.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import instrumentation
+
+# (text, start of the new part, is the last piece)
+Piece = Tuple[str, int, bool]
+
+
+@dataclass(frozen=True)
+class StreamSettings:
+    min_size: int = 1024 * 1024
+    chunk_size: int = 512 * 1024
+    overlap: int = 32 * 1024
+
+    @classmethod
+    def from_config(cls, config_manager) -> 'StreamSettings':
+        return cls(
+            min_size=config_manager.get('filter_settings.stream_min_size', cls.min_size),
+            chunk_size=config_manager.get('filter_settings.stream_chunk_size', cls.chunk_size),
+            overlap=config_manager.get('filter_settings.stream_overlap', cls.overlap),
+        )
+
+    def streams(self, size: Optional[int]) -> bool:
+        return bool(self.min_size) and size is not None and size >= self.min_size
+
+
+def text_pieces(text: str) -> List[Piece]:
+    return [(text, 0, True)]
+
+
+def file_pieces(path: str, chunk_size: int, overlap: int) -> Iterator[Piece]:
+    """Pieces of a file read in chunks, decoded as open(path, 'r', errors='ignore') would"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        instrumentation.count_read(os.fstat(f.fileno()).st_size)
+        tail = ''
+        carry = ''
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                # The final piece repeats the tail so matches at the very end are seen
+                yield tail + carry, len(tail), True
+                return
+
+            data = carry + data
+            cut = data.rfind('\n') + 1
+            if cut == 0:
+                # Pieces end at line ends; a line longer than a chunk is kept whole
+                carry = data
+                continue
+
+            piece = tail + data[:cut]
+            carry = data[cut:]
+            yield piece, len(tail), False
+
+            # The next overlap starts at the first line start in the last `overlap` chars
+            if len(piece) <= overlap:
+                tail = piece
+            else:
+                newline = piece.find('\n', len(piece) - overlap - 1)
+                tail = piece[newline + 1:]
+
+
+def read_text(path: str) -> str:
+    """Whole file text as the content filters read it"""
+    with instrumentation.span('read'):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            text = f.read()
+    instrumentation.count_read(len(text))
+    return text
+
+
+def content_pieces(path: str, size: Optional[int], settings: StreamSettings) -> Iterable[Piece]:
+    """Pieces of a file: streamed from disk when big, read whole otherwise"""
+    if settings.streams(size):
+        return file_pieces(path, settings.chunk_size, settings.overlap)
+    return text_pieces(read_text(path))
@@ -0,0 +1,84 @@
+"""
+Compiled filename matchers shared by the file scanner and smart filters
+"""
+
+import fnmatch
+import re
+from typing import Iterable
+
+_WILDCARDS = ('*', '?', '[')
+
+
+def _has_wildcard(pattern: str) -> bool:
+    return any(char in pattern for char in _WILDCARDS)
+
+
+def _suffix(filename: str) -> str:
+    """Same result as Path(filename).suffix, without building a Path"""
+    index = filename.rfind('.')
+    if 0 < index < len(filename) - 1:
+        return filename[index:]
+    return ''
+
+
+class GlobMatcher:
+    """Case-insensitive match of a filename against a set of glob patterns.
+
+    Literal names go into a frozenset, '*suffix' and 'prefix*' patterns into
+    str.endswith/startswith tuples, and everything else into one combined regex,
+    so a lookup costs the same no matter how many patterns there are.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        exact_names = set()
+        suffixes = set()
+        prefixes = set()
+        globs = []
+
+        for pattern in patterns:
+            pattern = pattern.lower()
+
+            if not _has_wildcard(pattern):
+                exact_names.add(pattern)
+            elif pattern.startswith('*') and not _has_wildcard(pattern[1:]):
+                suffixes.add(pattern[1:])
+            elif pattern.endswith('*') and not _has_wildcard(pattern[:-1]):
+                prefixes.add(pattern[:-1])
+            else:
+                globs.append(fnmatch.translate(pattern))
+
+        self.exact_names = frozenset(exact_names)
+        self.suffixes = tuple(sorted(suffixes))
+        self.prefixes = tuple(sorted(prefixes))
+        self._regex_match = re.compile('|'.join(globs)).match if globs else None
+
+    def matches(self, filename: str) -> bool:
+        filename = filename.lower()
+
+        if filename in self.exact_names:
+            return True
+        if filename.endswith(self.suffixes) or filename.startswith(self.prefixes):
+            return True
+        return self._regex_match is not None and self._regex_match(filename) is not None
+
+
+class FileNameFilter:
+    """The scanner's include check, compiled once per scan.
+
+    A file is accepted when it matches none of the ignore patterns and its
+    extension (or full name) is in the allowed set; an empty set allows all.
+    """
+
+    def __init__(self, extensions: Iterable[str], ignore_patterns: Iterable[str]):
+        self.ignore = GlobMatcher(ignore_patterns)
+        self.extensions = frozenset(ext.lower() for ext in extensions)
+
+    def accepts(self, filename: str) -> bool:
+        if self.ignore.matches(filename):
+            return False
+
+        if not self.extensions:
+            return True
+
+        filename = filename.lower()
+        return _suffix(filename) in self.extensions or filename in self.extensions
@@ -0,0 +1,285 @@
+"""
+Per-file content metrics for the smart filters.
+
+One read of a file yields everything the built-in content filters ask about:
+its line count, a complexity score, whether it has any documentation and
+which pattern categories (TODOs, imports, secrets, ...) it contains. Metrics
+are stored in a persistent index keyed by (path, mtime, size), so after the
+first pass the line, content and quality filters are dictionary lookups.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from content_matcher import ContentMatcher
+from content_stream import Piece
+from utils import ensure_dir
+
+# Pattern categories behind the content filters; a file hits a category when
+# any of its patterns matches (case-insensitive, ^/$ per line)
+CONTENT_PATTERN_GROUPS: Dict[str, Tuple[str, ...]] = {
+    'has_todos': (r'TODO', r'FIXME', r'HACK', r'XXX'),
+    'has_comments': (r'#.*', r'//.*', r'/\*.*\*/', r'<!--.*-->'),
+    'has_imports': (r'import\s+', r'from\s+.*import', r'#include', r'require\('),
+    'has_functions': (r'def\s+\w+', r'function\s+\w+', r'func\s+\w+', r'public\s+\w+\s+\w+'),
+    'has_classes': (r'class\s+\w+', r'interface\s+\w+', r'struct\s+\w+'),
+    'has_urls': (r'https?://\S+', r'www\.\S+\.\w+'),
+    'has_emails': (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',),
+    'has_secrets': (
+        r'password\s*[=:]\s*["\'][^"\']+["\']',
+        r'api[_-]?key\s*[=:]\s*["\'][^"\']+["\']',
+        r'secret\s*[=:]\s*["\'][^"\']+["\']',
+        r'token\s*[=:]\s*["\'][^"\']+["\']',
+    ),
+    'potential_issues': (
+        r'console\.log\(',    # Debug statements
+        r'print\s*\(',        # Debug prints
+        r'debugger;',         # Debugger statements
+        r'alert\s*\(',        # Alert statements
+        r'eval\s*\(',         # Eval usage
+        r'document\.write\(',  # Dangerous DOM manipulation
+        r'innerHTML\s*=',     # Potential XSS
+        r'exec\s*\(',         # Exec usage
+        r'system\s*\(',       # System calls
+    ),
+}
+
+# Docstrings and comments; any match counts as documented
+DOC_PATTERNS = (
+    r'""".*?"""',       # Python docstrings
+    r"'''.*?'''",       # Python docstrings
+    r'/\*\*.*?\*/',     # JSDoc comments
+    r'#.*',             # Hash comments
+    r'//.*',            # Line comments
+    r'<!--.*?-->',      # HTML comments
+)
+
+# Rough nesting estimate: every occurrence adds one to the complexity score
+COMPLEXITY_PATTERNS = (r'\{', r'\(', r'\[', r'if\s', r'for\s', r'while\s', r'def\s', r'class\s')
+
+COMPLEX_LINE_LIMIT = 200
+COMPLEX_SCORE_LIMIT = 50
+
+_group_matcher = ContentMatcher(CONTENT_PATTERN_GROUPS)
+_GROUP_BITS = _group_matcher.bits
+
+_doc_matcher = ContentMatcher({'docs': DOC_PATTERNS}, re.DOTALL)
+_complexity_regexes = [re.compile(p, re.IGNORECASE) for p in COMPLEXITY_PATTERNS]
+
+
+@dataclass(frozen=True)
+class FileMetrics:
+    line_count: int        # lines as iterating over the file yields them
+    complexity_score: int
+    is_complex: bool
+    has_docs: bool
+    pattern_hits: int      # bitmask of CONTENT_PATTERN_GROUPS categories
+
+    def hits(self, group: str) -> bool:
+        return bool(self.pattern_hits & _GROUP_BITS[group])
+
+
+def count_lines(pieces: Iterable[Piece]) -> int:
+    """Same count as iterating over the lines of the file"""
+    newlines = 0
+    last_char = ''
+    for text, start, _ in pieces:
+        newlines += text.count('\n', start)
+        if len(text) > start:
+            last_char = text[-1]
+    return newlines + (1 if last_char and last_char != '\n' else 0)
+
+
+def _is_complex(newlines: int, score: int) -> bool:
+    # The heuristic has always counted split('\n') pieces, not lines
+    return newlines + 1 > COMPLEX_LINE_LIMIT or score > COMPLEX_SCORE_LIMIT
+
+
+def looks_complex(pieces: Iterable[Piece]) -> bool:
+    """Whether a file counts as complex; stops reading once it does"""
+    newlines = 0
+    score = 0
+    for text, start, _ in pieces:
+        newlines += text.count('\n', start)
+        # Complexity patterns never cross a line end, and pieces hold whole
+        # lines, so counting from `start` counts every occurrence once
+        score += sum(len(regex.findall(text, start)) for regex in _complexity_regexes)
+        if _is_complex(newlines, score):
+            return True
+    return False
+
+
+def has_documentation(pieces: Iterable[Piece]) -> bool:
+    return _doc_matcher.matches(pieces)
+
+
+def compute_metrics(pieces: Iterable[Piece]) -> FileMetrics:
+    """All metrics of one file, in a single pass over its pieces"""
+    newlines = 0
+    last_char = ''
+    score = 0
+    docs = 0
+    pattern_hits = 0
+
+    for text, start, last in pieces:
+        newlines += text.count('\n', start)
+        if len(text) > start:
+            last_char = text[-1]
+        score += sum(len(regex.findall(text, start)) for regex in _complexity_regexes)
+        if not docs:
+            docs = _doc_matcher.match_piece(text, at_end=last)
+        if pattern_hits != _group_matcher.all_bits:
+            pattern_hits |= _group_matcher.match_piece(text, pattern_hits, at_end=last)
+
+    line_count = newlines + (1 if last_char and last_char != '\n' else 0)
+    return FileMetrics(line_count, score, _is_complex(newlines, score), bool(docs), pattern_hits)
+
+
+def _definitions_signature() -> str:
+    # Stored metrics are only valid for the patterns they were computed with
+    definitions = [CONTENT_PATTERN_GROUPS, DOC_PATTERNS, COMPLEXITY_PATTERNS,
+                   COMPLEX_LINE_LIMIT, COMPLEX_SCORE_LIMIT]
+    return hashlib.sha1(json.dumps(definitions).encode('utf-8')).hexdigest()
+
+
+class MetricsIndex:
+    """Persistent {path: metrics} store, valid while a file's mtime and size match"""
+
+    # 2: mtimes are stored as st_mtime_ns
+    VERSION = 2
+
+    def __init__(self, map_contents: Callable[[Callable, List[Mapping[str, Any]]], List[Any]],
+                 index_path: Optional[Path] = None, max_entries: int = 200000):
+        # map_contents(func, files) -> [func(text of file) or None if unreadable]
+        self.map_contents = map_contents
+        self.index_path = index_path or Path.home() / '.codefuser' / 'metrics_index.json'
+        self.max_entries = max_entries
+        self.signature = _definitions_signature()
+        # path -> [mtime_ns, size, line_count, complexity_score, is_complex, has_docs, pattern_hits]
+        self._entries: Optional[Dict[str, list]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_manager, map_contents) -> Optional['MetricsIndex']:
+        """Index configured from filter_settings, or None when it is disabled"""
+        if not config_manager.get('filter_settings.metrics_index', True):
+            return None
+        max_entries = config_manager.get('filter_settings.metrics_max_entries', 200000)
+        return cls(map_contents, max_entries=max_entries)
+
+    def _load(self) -> Dict[str, list]:
+        if self._entries is not None:
+            return self._entries
+
+        entries = {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION and data.get('signature') == self.signature:
+                entries = data.get('files', {})
+        except (OSError, ValueError):
+            pass
+
+        self._entries = entries
+        return entries
+
+    @staticmethod
+    def _file_key(file_info: Mapping[str, Any]) -> Optional[Tuple[str, int, int]]:
+        # Stat the file now rather than trusting the row: it may have been
+        # edited since the scan, and filters must see the current content
+        path = os.fspath(file_info['path'])
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return None
+        return path, file_stat.st_mtime_ns, file_stat.st_size
+
+    def get(self, file_info: Mapping[str, Any]) -> Optional[FileMetrics]:
+        """Metrics for a file row, computed and stored on a miss; None if unreadable"""
+        return self.get_many([file_info])[0]
+
+    def get_many(self, files: List[Mapping[str, Any]]) -> List[Optional[FileMetrics]]:
+        """Metrics for each row in order; all misses are computed in one batch"""
+        keys = [self._file_key(file_info) for file_info in files]
+        results: List[Optional[FileMetrics]] = [None] * len(files)
+        missing = []
+
+        with self._lock:
+            entries = self._load()
+            for position, key in enumerate(keys):
+                if key is None:
+                    continue
+                entry = entries.get(key[0])
+                if entry is not None and entry[0] == key[1] and entry[1] == key[2]:
+                    results[position] = FileMetrics(*entry[2:])
+                else:
+                    missing.append(position)
+
+        if not missing:
+            return results
+
+        computed = self.map_contents(compute_metrics, [files[position] for position in missing])
+
+        with self._lock:
+            entries = self._load()
+            for position, metrics in zip(missing, computed):
+                if metrics is None:
+                    continue
+                results[position] = metrics
+                path, mtime, size = keys[position]
+                # Re-insert so the most recently computed entries are kept on save
+                entries.pop(path, None)
+                entries[path] = [mtime, size, metrics.line_count, metrics.complexity_score,
+                                 metrics.is_complex, metrics.has_docs, metrics.pattern_hits]
+                self._dirty = True
+
+        return results
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = self._entries
+            if len(entries) > self.max_entries:
+                for path in list(entries)[:len(entries) - self.max_entries]:
+                    del entries[path]
+            data = {
+                'version': self.VERSION,
+                'signature': self.signature,
+                'files': entries
+            }
+            self._dirty = False
+
+            try:
+                ensure_dir(self.index_path.parent)
+                fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=str(self.index_path.parent))
+            except OSError as e:
+                print(f"Could not save metrics index: {e}")
+                return
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(temp_path, self.index_path)
+            except OSError as e:
+                print(f"Could not save metrics index: {e}")
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+        try:
+            self.index_path.unlink()
+        except OSError:
+            pass
@@ -3,11 +3,23 @@ from pathlib import Path
 from typing import List, Dict, Any, Callable, Optional, Set
 from dataclasses import dataclass
 from datetime import datetime
-import fnmatch
 import threading
+import stat as stat_module
 from queue import Queue
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import time
 
+from file_matcher import FileNameFilter
+from ignore_rules import IgnoreRules, DEFAULT_IGNORE_FILE_NAMES
+from scan_index import ScanIndex
+from git_integration import GitIntegration
+import instrumentation
+from file_table import FileTable
+
+
+# Queued by the scanner thread once its backend has finished
+_SCAN_DONE = None
+
 
 @dataclass
 class FileInfo:
@@ -18,16 +30,30 @@ class FileInfo:
     extension: str
 
 
+@dataclass
+class ScanRules:
+    """Which entries belong to a scan; built once and shared by every traversal"""
+    extensions: List[str]
+    name_filter: FileNameFilter
+    ignored_folders: Set[str]
+    max_file_size: int
+    # Hierarchical .gitignore-style rules; None when disabled or include_ignored is set
+    ignore_rules: Optional[IgnoreRules] = None
+
+
 class FileScannerProgress:
     def __init__(self):
         self.total_files = 0
         self.processed_files = 0
+        self.directories_scanned = 0
+        self.total_is_estimate = False
         self.current_file = ""
         self.is_scanning = True
         self.errors: List[Dict[str, str]] = []
         self._lock = threading.Lock()
     
-    def update(self, processed: int = None, current_file: str = None, total: int = None):
+    def update(self, processed: int = None, current_file: str = None, total: int = None,
+               directories: int = None, estimate: bool = None):
         with self._lock:
             if processed is not None:
                 self.processed_files = processed
@@ -35,6 +61,10 @@ class FileScannerProgress:
                 self.current_file = current_file
             if total is not None:
                 self.total_files = total
+            if directories is not None:
+                self.directories_scanned = directories
+            if estimate is not None:
+                self.total_is_estimate = estimate
     
     def add_error(self, file_path: str, error: str):
         with self._lock:
@@ -44,7 +74,8 @@ class FileScannerProgress:
         with self._lock:
             if self.total_files == 0:
                 return 0.0
-            return (self.processed_files / self.total_files) * 100
+            # An estimated total can be exceeded when the tree has grown
+            return min((self.processed_files / self.total_files) * 100, 100.0)
 
 
 class FileScanner:
@@ -52,14 +83,67 @@ class FileScanner:
         self.config_manager = config_manager
         self.progress = FileScannerProgress()
         self._stop_scanning = False
+        # Accepted file counts from previous scans, used as a cheap progress estimate
+        self._file_count_estimates: Dict[tuple, int] = {}
+        self.scan_index = ScanIndex(max_indexes=config_manager.get('scan_settings.index_max_roots', 32))
+        self.git_integration = GitIntegration(config_manager)
+        # Traversal engines; each puts one batch of raw entries per directory on the queue
+        self.backends = {
+            'walk': self._scan_worker,
+            'scandir': self._scandir_worker,
+            'parallel': self._parallel_worker,
+            'indexed': self._indexed_worker,
+            'git': self._git_worker,
+        }
     
     def scan_directory(
         self,
         directory: Path,
         extensions: List[str],
         include_ignored: bool = False,
-        progress_callback: Optional[Callable[[FileScannerProgress], None]] = None
+        progress_callback: Optional[Callable[[FileScannerProgress], None]] = None,
+        single_pass: Optional[bool] = None,
+        backend: Optional[str] = None
     ) -> List[FileInfo]:
+        with instrumentation.span('scan'):
+            entries = self._scan_entries(directory, extensions, include_ignored,
+                                         progress_callback, single_pass, backend)
+        return [self._make_file_info(entry) for entry in entries]
+    
+    def scan_directory_table(
+        self,
+        directory: Path,
+        extensions: List[str],
+        include_ignored: bool = False,
+        progress_callback: Optional[Callable[[FileScannerProgress], None]] = None,
+        single_pass: Optional[bool] = None,
+        backend: Optional[str] = None
+    ) -> FileTable:
+        """Same scan as scan_directory, stored as a compact FileTable"""
+        with instrumentation.span('scan'):
+            entries = self._scan_entries(directory, extensions, include_ignored,
+                                         progress_callback, single_pass, backend)
+        return FileTable.from_entries(
+            os.fspath(directory),
+            ((relative_path, size, mtime) for _, relative_path, size, mtime in entries)
+        )
+    
+    def _scan_entries(
+        self,
+        directory: Path,
+        extensions: List[str],
+        include_ignored: bool,
+        progress_callback: Optional[Callable[[FileScannerProgress], None]],
+        single_pass: Optional[bool],
+        backend: Optional[str]
+    ) -> List[tuple]:
+        """Run a scan and return raw (path, relative_path, size, mtime) entries sorted by relative path"""
+        if single_pass is None:
+            single_pass = self.config_manager.get('scan_settings.single_pass', True)
+        if backend is None:
+            backend = self.config_manager.get('scan_settings.backend', 'git')
+        if backend not in self.backends:
+            raise ValueError(f"Unsupported scanner backend: {backend}")
         
         self._stop_scanning = False
         self.progress = FileScannerProgress()
@@ -67,63 +151,143 @@ class FileScanner:
         if not directory.exists() or not directory.is_dir():
             raise ValueError(f"Invalid directory: {directory}")
         
-        ignored_folders = set(self.config_manager.get_ignored_folders()) if not include_ignored else set()
-        ignored_files = set(self.config_manager.get_ignored_files()) if not include_ignored else set()
-        max_file_size = self.config_manager.get('max_file_size_mb', 10) * 1024 * 1024
+        rules = self.build_scan_rules(extensions, include_ignored, directory)
+        name_filter = rules.name_filter
+        ignored_folders = rules.ignored_folders
+        ignore_rules = rules.ignore_rules
+        max_file_size = rules.max_file_size
         
-        # Normalize extensions
-        extensions = [ext.lower() if ext.startswith('.') else f".{ext.lower()}" for ext in extensions]
+        estimate_key = (str(directory.resolve()), tuple(sorted(rules.extensions)), include_ignored)
         
-        # First pass: count total files
-        total_files = self._count_files(directory, extensions, ignored_folders, ignored_files)
-        self.progress.update(total=total_files)
+        if single_pass:
+            # Single traversal: progress is reported as directories scanned / files
+            # accepted, against the previous scan's count when one is known
+            estimated_total = self._file_count_estimates.get(estimate_key)
+            if estimated_total:
+                self.progress.update(total=estimated_total, estimate=True)
+        else:
+            # First pass: count total files
+            total_files = self._count_files(directory, name_filter, ignored_folders, ignore_rules)
+            self.progress.update(total=total_files)
         
-        # Second pass: collect files
-        files = []
+        # Collect raw (path, relative_path, size, mtime) entries
+        entries = []
         file_queue = Queue()
         
         # Start scanner thread
         scanner_thread = threading.Thread(
-            target=self._scan_worker,
-            args=(directory, extensions, ignored_folders, ignored_files, max_file_size, file_queue)
+            target=self._run_backend,
+            args=(self.backends[backend], file_queue,
+                  directory, name_filter, ignored_folders, ignore_rules, max_file_size)
         )
         scanner_thread.start()
         
-        # Process files and update progress
-        while scanner_thread.is_alive() or not file_queue.empty():
-            if self._stop_scanning:
+        # Process files and update progress until the backend signals completion
+        while True:
+            batch = file_queue.get()
+            if batch is _SCAN_DONE or self._stop_scanning:
                 break
-                
-            try:
-                file_info = file_queue.get(timeout=0.1)
-                files.append(file_info)
-                self.progress.update(processed=len(files), current_file=file_info.relative_path)
-                
-                if progress_callback:
-                    progress_callback(self.progress)
-            except:
-                continue
+            
+            entries.extend(batch)
+            self.progress.update(processed=len(entries), current_file=batch[-1][1])
+            
+            if progress_callback:
+                progress_callback(self.progress)
         
         scanner_thread.join()
         self.progress.is_scanning = False
         
-        return sorted(files, key=lambda f: f.relative_path)
+        if not self._stop_scanning:
+            self._file_count_estimates[estimate_key] = len(entries)
+        instrumentation.count('files_scanned', len(entries))
+        
+        # Result objects are only built once, for the sorted final result
+        entries.sort(key=lambda entry: entry[1])
+        return entries
     
-    def _count_files(
+    def build_scan_rules(self, extensions: List[str], include_ignored: bool = False,
+                         directory: Optional[Path] = None) -> ScanRules:
+        ignored_folders = set(self.config_manager.get_ignored_folders()) if not include_ignored else set()
+        ignored_files = set(self.config_manager.get_ignored_files()) if not include_ignored else set()
+        max_file_size = self.config_manager.get('max_file_size_mb', 10) * 1024 * 1024
+        
+        ignore_rules = None
+        if (directory is not None and not include_ignored
+                and self.config_manager.get('scan_settings.respect_ignore_files', True)):
+            ignore_rules = IgnoreRules.for_root(
+                os.fspath(directory),
+                self.config_manager.get('scan_settings.ignore_file_names', DEFAULT_IGNORE_FILE_NAMES)
+            )
+        
+        # Normalize extensions
+        extensions = [ext.lower() if ext.startswith('.') else f".{ext.lower()}" for ext in extensions]
+        
+        return ScanRules(
+            extensions=extensions,
+            # Compiled once per scan; this check runs for every file in the tree
+            name_filter=FileNameFilter(extensions, ignored_files),
+            ignored_folders=ignored_folders,
+            max_file_size=max_file_size,
+            ignore_rules=ignore_rules
+        )
+    
+    def _run_backend(self, worker: Callable, file_queue: Queue, *args):
+        try:
+            worker(*args, file_queue)
+        finally:
+            file_queue.put(_SCAN_DONE)
+    
+    def _make_file_info(self, entry: tuple) -> FileInfo:
+        path_str, relative_path, size, mtime = entry
+        file_path = Path(path_str)
+        return FileInfo(
+            path=file_path,
+            relative_path=relative_path,
+            size=size,
+            modified_time=datetime.fromtimestamp(mtime),
+            extension=file_path.suffix.lower()
+        )
+    
+    def _walk(
         self,
         directory: Path,
-        extensions: List[str],
         ignored_folders: Set[str],
-        ignored_files: Set[str]
-    ) -> int:
-        count = 0
+        ignore_rules: Optional[IgnoreRules]
+    ):
+        """os.walk with ignored folders pruned; yields (root, relative_root, rules, files)"""
+        prefix_length = len(os.path.join(os.fspath(directory), ''))
+        rules_by_dir = {}
         
         for root, dirs, files in os.walk(directory):
+            relative_root = root[prefix_length:]
+            rules = rules_by_dir.pop(root, ignore_rules)
+            if rules is not None:
+                rules = rules.for_directory(root, relative_root, dirs + files)
+            
             # Filter out ignored directories
             dirs[:] = [d for d in dirs if d not in ignored_folders]
             
+            if rules is not None:
+                dirs[:] = [d for d in dirs
+                           if not rules.is_ignored(os.path.join(relative_root, d), True)]
+                for d in dirs:
+                    rules_by_dir[os.path.join(root, d)] = rules
+            
+            yield root, relative_root, rules, files
+    
+    def _count_files(
+        self,
+        directory: Path,
+        name_filter: FileNameFilter,
+        ignored_folders: Set[str],
+        ignore_rules: Optional[IgnoreRules] = None
+    ) -> int:
+        count = 0
+        
+        for root, relative_root, rules, files in self._walk(directory, ignored_folders, ignore_rules):
             for file in files:
-                if self._should_include_file(file, extensions, ignored_files):
+                if name_filter.accepts(file) and not (
+                        rules and rules.is_ignored(os.path.join(relative_root, file))):
                     count += 1
         
         return count
@@ -131,26 +295,32 @@ class FileScanner:
     def _scan_worker(
         self,
         directory: Path,
-        extensions: List[str],
+        name_filter: FileNameFilter,
         ignored_folders: Set[str],
-        ignored_files: Set[str],
+        ignore_rules: Optional[IgnoreRules],
         max_file_size: int,
         file_queue: Queue
     ):
-        for root, dirs, files in os.walk(directory):
+        directories_scanned = 0
+        
+        for root, relative_root, rules, files in self._walk(directory, ignored_folders, ignore_rules):
             if self._stop_scanning:
                 break
             
-            # Filter out ignored directories
-            dirs[:] = [d for d in dirs if d not in ignored_folders]
+            directories_scanned += 1
+            self.progress.update(directories=directories_scanned)
             
             root_path = Path(root)
+            batch = []
             
             for file in files:
                 if self._stop_scanning:
                     break
                 
-                if not self._should_include_file(file, extensions, ignored_files):
+                if not name_filter.accepts(file):
+                    continue
+                
+                if rules and rules.is_ignored(os.path.join(relative_root, file)):
                     continue
                 
                 file_path = root_path / file
@@ -166,36 +336,383 @@ class FileScanner:
                         )
                         continue
                     
-                    file_info = FileInfo(
-                        path=file_path,
-                        relative_path=str(file_path.relative_to(directory)),
-                        size=stat.st_size,
-                        modified_time=datetime.fromtimestamp(stat.st_mtime),
-                        extension=file_path.suffix.lower()
-                    )
-                    
-                    file_queue.put(file_info)
+                    batch.append((
+                        str(file_path),
+                        str(file_path.relative_to(directory)),
+                        stat.st_size,
+                        stat.st_mtime
+                    ))
                     
                 except Exception as e:
                     self.progress.add_error(str(file_path), str(e))
+            
+            if batch:
+                file_queue.put(batch)
     
-    def _should_include_file(
+    def _scandir_worker(
         self,
-        filename: str,
-        extensions: List[str],
-        ignored_files: Set[str]
-    ) -> bool:
-        # Check against ignored patterns
-        for pattern in ignored_files:
-            if fnmatch.fnmatch(filename.lower(), pattern.lower()):
-                return False
-        
-        # Check extension
-        if not extensions:  # If no extensions specified, include all
-            return True
-        
-        file_ext = Path(filename).suffix.lower()
-        return file_ext in extensions or filename.lower() in [ext.lower() for ext in extensions]
+        directory: Path,
+        name_filter: FileNameFilter,
+        ignored_folders: Set[str],
+        ignore_rules: Optional[IgnoreRules],
+        max_file_size: int,
+        file_queue: Queue
+    ):
+        """Traverse with os.scandir, reusing the type/stat data cached on each DirEntry"""
+        root = os.fspath(directory)
+        # Relative paths are computed by slicing off this prefix
+        prefix_length = len(os.path.join(root, ''))
+        # (directory, rules of its parent) pairs still to be listed
+        pending = [(root, ignore_rules)]
+        directories_scanned = 0
+        
+        while pending and not self._stop_scanning:
+            current, parent_rules = pending.pop()
+            batch = self._scandir_directory(
+                current, prefix_length, name_filter, ignored_folders,
+                parent_rules, max_file_size, pending
+            )
+            
+            directories_scanned += 1
+            self.progress.update(directories=directories_scanned)
+            
+            if batch:
+                file_queue.put(batch)
+    
+    def _parallel_worker(
+        self,
+        directory: Path,
+        name_filter: FileNameFilter,
+        ignored_folders: Set[str],
+        ignore_rules: Optional[IgnoreRules],
+        max_file_size: int,
+        file_queue: Queue
+    ):
+        """Fan directories out over a thread pool, each worker listing one directory with os.scandir"""
+        root = os.fspath(directory)
+        prefix_length = len(os.path.join(root, ''))
+        max_workers = self.config_manager.get('scan_settings.max_workers', 8)
+        directories_scanned = 0
+        
+        def scan_one(current: str, parent_rules: Optional[IgnoreRules]):
+            subdirectories = []
+            batch = self._scandir_directory(
+                current, prefix_length, name_filter, ignored_folders,
+                parent_rules, max_file_size, subdirectories
+            )
+            return batch, subdirectories
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            pending = {executor.submit(scan_one, root, ignore_rules)}
+            
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    batch, subdirectories = future.result()
+                    
+                    directories_scanned += 1
+                    self.progress.update(directories=directories_scanned)
+                    
+                    if batch:
+                        file_queue.put(batch)
+                    
+                    if not self._stop_scanning:
+                        pending.update(executor.submit(scan_one, *sub) for sub in subdirectories)
+                
+                if self._stop_scanning:
+                    for future in pending:
+                        future.cancel()
+                    break
+    
+    def _indexed_worker(
+        self,
+        directory: Path,
+        name_filter: FileNameFilter,
+        ignored_folders: Set[str],
+        ignore_rules: Optional[IgnoreRules],
+        max_file_size: int,
+        file_queue: Queue
+    ):
+        """Rescan from the persistent scan index, re-listing only directories whose mtime changed.
+        
+        Editing a file in place does not touch its directory's mtime, so accepted
+        files are still stat'ed unless scan_settings.index_verify_files is off.
+        """
+        root = os.fspath(directory)
+        prefix_length = len(os.path.join(root, ''))
+        index_root = str(directory.resolve())
+        verify_files = self.config_manager.get('scan_settings.index_verify_files', True)
+        
+        previous = self.scan_index.load(index_root, ignored_folders)
+        directories = {}
+        pending = [('', ignore_rules)]
+        directories_scanned = 0
+        
+        while pending and not self._stop_scanning:
+            relative_dir, rules = pending.pop()
+            current = os.path.join(root, relative_dir) if relative_dir else root
+            
+            try:
+                mtime = os.stat(current).st_mtime_ns
+            except OSError:
+                continue
+            
+            record = previous.get(relative_dir)
+            if record is None or record['mtime'] != mtime:
+                record = self._list_directory(current, ignored_folders)
+                if record is None:
+                    continue
+                record['mtime'] = mtime
+            
+            directories[relative_dir] = record
+            directories_scanned += 1
+            self.progress.update(directories=directories_scanned)
+            
+            files = record['files']
+            
+            # The index stores raw listings; ignore files are applied on every scan
+            if rules is not None:
+                rules = rules.for_directory(current, relative_dir, files)
+            
+            for name in record['dirs']:
+                subdirectory = os.path.join(relative_dir, name) if relative_dir else name
+                if not (rules and rules.is_ignored(subdirectory, True)):
+                    pending.append((subdirectory, rules))
+            
+            batch = []
+            
+            for name, stat_data in files.items():
+                if not name_filter.accepts(name):
+                    continue
+                
+                file_path = os.path.join(current, name)
+                
+                if rules and rules.is_ignored(file_path[prefix_length:]):
+                    continue
+                
+                if stat_data is None or verify_files:
+                    try:
+                        stat = os.stat(file_path)
+                    except Exception as e:
+                        files[name] = None
+                        self.progress.add_error(file_path, str(e))
+                        continue
+                    stat_data = files[name] = [stat.st_size, stat.st_mtime]
+                
+                size, file_mtime = stat_data
+                
+                # Skip files that are too large
+                if size > max_file_size:
+                    self.progress.add_error(
+                        file_path,
+                        f"File too large: {size / 1024 / 1024:.2f} MB"
+                    )
+                    continue
+                
+                batch.append((file_path, file_path[prefix_length:], size, file_mtime))
+            
+            if batch:
+                file_queue.put(batch)
+        
+        if not self._stop_scanning:
+            self.scan_index.save(index_root, ignored_folders, directories)
+    
+    def _git_worker(
+        self,
+        directory: Path,
+        name_filter: FileNameFilter,
+        ignored_folders: Set[str],
+        ignore_rules: Optional[IgnoreRules],
+        max_file_size: int,
+        file_queue: Queue
+    ):
+        """Enumerate files with a single `git ls-files` call and stat only the accepted ones.
+        
+        git already applies .gitignore and .git/info/exclude, so this backend is only
+        used while ignore files are respected; outside a repository (or when git
+        fails) the indexed backend runs instead.
+        """
+        listed = None
+        if ignore_rules is not None:
+            listed = self.git_integration.list_files(directory)
+        
+        if listed is None:
+            self._indexed_worker(directory, name_filter, ignored_folders, ignore_rules,
+                                 max_file_size, file_queue)
+            return
+        
+        root = os.fspath(directory)
+        
+        # .gitignore files are git's job; only the other ignore files are read here,
+        # starting with those above the scan root, as the other backends do
+        extra_names = [name for name in ignore_rules.file_names if name != '.gitignore']
+        extra_rules = IgnoreRules.for_root(root, extra_names)
+        listed_set = set(listed)
+        
+        # relative directory -> rules for its files, or None if the directory is excluded
+        directory_rules: Dict[str, Optional[IgnoreRules]] = {'': extra_rules.for_directory(
+            root, '', [name for name in extra_names if name in listed_set])}
+        
+        def rules_for(relative_dir: str) -> Optional[IgnoreRules]:
+            if relative_dir in directory_rules:
+                return directory_rules[relative_dir]
+            
+            parent, _, name = relative_dir.rpartition('/')
+            parent_rules = rules_for(parent)
+            rules = None
+            if (parent_rules is not None and name not in ignored_folders
+                    and not parent_rules.is_ignored(relative_dir.replace('/', os.sep), True)):
+                present = [extra for extra in extra_names if f"{relative_dir}/{extra}" in listed_set]
+                rules = parent_rules.for_directory(
+                    os.path.join(root, relative_dir.replace('/', os.sep)),
+                    relative_dir.replace('/', os.sep),
+                    present
+                )
+            directory_rules[relative_dir] = rules
+            self.progress.update(directories=len(directory_rules))
+            return rules
+        
+        batch = []
+        
+        for relative_path in listed:
+            if self._stop_scanning:
+                break
+            
+            relative_dir, _, name = relative_path.rpartition('/')
+            if not name_filter.accepts(name):
+                continue
+            
+            rules = rules_for(relative_dir)
+            if rules is None:
+                continue
+            
+            relative_path = relative_path.replace('/', os.sep)
+            if rules.is_ignored(relative_path):
+                continue
+            
+            file_path = os.path.join(root, relative_path)
+            
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                # Tracked in the index but deleted from the working tree
+                continue
+            except Exception as e:
+                self.progress.add_error(file_path, str(e))
+                continue
+            
+            # Submodules are listed as gitlinks; only regular files are scanned
+            if not stat_module.S_ISREG(stat.st_mode):
+                continue
+            
+            # Skip files that are too large
+            if stat.st_size > max_file_size:
+                self.progress.add_error(
+                    file_path,
+                    f"File too large: {stat.st_size / 1024 / 1024:.2f} MB"
+                )
+                continue
+            
+            batch.append((file_path, relative_path, stat.st_size, stat.st_mtime))
+            
+            if len(batch) >= 512:
+                file_queue.put(batch)
+                batch = []
+        
+        if batch:
+            file_queue.put(batch)
+    
+    def _list_directory(self, current: str, ignored_folders: Set[str]) -> Optional[Dict[str, Any]]:
+        """Index record for one directory: subdirectories to descend into and unstat'ed file names"""
+        try:
+            with os.scandir(current) as it:
+                dir_entries = list(it)
+        except OSError:
+            return None
+        
+        subdirectories = []
+        files = {}
+        
+        for entry in dir_entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            
+            if is_dir:
+                if entry.name not in ignored_folders and not entry.is_symlink():
+                    subdirectories.append(entry.name)
+            else:
+                files[entry.name] = None
+        
+        return {'mtime': 0, 'dirs': subdirectories, 'files': files}
+    
+    def _scandir_directory(
+        self,
+        current: str,
+        prefix_length: int,
+        name_filter: FileNameFilter,
+        ignored_folders: Set[str],
+        ignore_rules: Optional[IgnoreRules],
+        max_file_size: int,
+        subdirectories: List[tuple]
+    ) -> List[tuple]:
+        """List one directory, appending (subdirectory, rules) pairs to descend into and
+        returning accepted files. ignore_rules are those of the parent directory."""
+        batch = []
+        
+        try:
+            with os.scandir(current) as it:
+                dir_entries = list(it)
+        except OSError:
+            # Unreadable directories are skipped, as os.walk does
+            return batch
+        
+        rules = ignore_rules
+        if rules is not None:
+            rules = rules.for_directory(current, current[prefix_length:],
+                                        (entry.name for entry in dir_entries))
+        
+        for entry in dir_entries:
+            if self._stop_scanning:
+                break
+            
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            
+            if is_dir:
+                # Like os.walk, symlinked directories are not followed
+                if (entry.name not in ignored_folders and not entry.is_symlink()
+                        and not (rules and rules.is_ignored(entry.path[prefix_length:], True))):
+                    subdirectories.append((entry.path, rules))
+                continue
+            
+            if not name_filter.accepts(entry.name):
+                continue
+            
+            if rules and rules.is_ignored(entry.path[prefix_length:]):
+                continue
+            
+            try:
+                stat = entry.stat()
+                
+                # Skip files that are too large
+                if stat.st_size > max_file_size:
+                    self.progress.add_error(
+                        entry.path,
+                        f"File too large: {stat.st_size / 1024 / 1024:.2f} MB"
+                    )
+                    continue
+                
+                batch.append((entry.path, entry.path[prefix_length:], stat.st_size, stat.st_mtime))
+                
+            except Exception as e:
+                self.progress.add_error(entry.path, str(e))
+        
+        return batch
     
     def stop_scanning(self):
         self._stop_scanning = True
@@ -0,0 +1,241 @@
+"""
+Columnar storage for scanned files.
+
+A FileTable keeps one row per file in a handful of flat columns: an index into
+a pool of interned directory strings, the interned file name, and size and
+mtime in typed arrays. Rows are exposed as FileRow views, which behave like the
+{'path', 'relative_path', 'size'} dicts the rest of the app has always passed
+around, so filters, the tree widget and the output formatters can share one
+table without copying its data.
+"""
+
+import os
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+_ROW_KEYS = ('path', 'relative_path', 'size', 'modified_time')
+
+
+class FileRow(Mapping):
+    """A read-only view of one FileTable row"""
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table: 'FileTable', index: int):
+        self.table = table
+        self.index = index
+
+    @property
+    def relative_path(self) -> str:
+        return self.table.relative_path(self.index)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.table.root, self.table.relative_path(self.index))
+
+    @property
+    def size(self) -> int:
+        return self.table.sizes[self.index]
+
+    @property
+    def modified_time(self) -> float:
+        return self.table.mtimes[self.index]
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _ROW_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_ROW_KEYS)
+
+    def __len__(self) -> int:
+        return len(_ROW_KEYS)
+
+    def __repr__(self) -> str:
+        return f"FileRow({self.relative_path!r}, size={self.size})"
+
+
+class FileTable:
+    """Scanned files under one root, sorted by relative path"""
+
+    def __init__(self, root: str):
+        self.root = os.fspath(root)
+        self.directories: List[str] = []
+        self._directory_ids: Dict[str, int] = {}
+        self.directory_index = array('I')
+        self.names: List[str] = []
+        self.sizes = array('q')
+        self.mtimes = array('d')
+
+    @classmethod
+    def from_entries(cls, root: str, entries: Iterable[Tuple[str, int, float]]) -> 'FileTable':
+        """Build a table from (relative_path, size, mtime) tuples"""
+        table = cls(root)
+        for relative_path, size, mtime in entries:
+            table.append(relative_path, size, mtime)
+        return table
+
+    def append(self, relative_path: str, size: int, mtime: float) -> None:
+        self.insert(len(self.names), relative_path, size, mtime)
+
+    def insert(self, index: int, relative_path: str, size: int, mtime: float) -> None:
+        directory, _, name = relative_path.rpartition(os.sep)
+
+        directory_id = self._directory_ids.get(directory)
+        if directory_id is None:
+            directory_id = self._directory_ids[directory] = len(self.directories)
+            self.directories.append(directory)
+
+        self.directory_index.insert(index, directory_id)
+        self.names.insert(index, sys.intern(name))
+        self.sizes.insert(index, size)
+        self.mtimes.insert(index, mtime)
+
+    def delete(self, start: int, end: int) -> None:
+        """Drop rows start..end-1; their directory strings stay in the pool"""
+        for column in (self.directory_index, self.names, self.sizes, self.mtimes):
+            del column[start:end]
+
+    def relative_path(self, index: int) -> str:
+        directory = self.directories[self.directory_index[index]]
+        name = self.names[index]
+        return directory + os.sep + name if directory else name
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [FileRow(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("FileTable index out of range")
+        return FileRow(self, index)
+
+    def __iter__(self) -> Iterator[FileRow]:
+        for index in range(len(self.names)):
+            yield FileRow(self, index)
+
+    def copy(self) -> 'FileTable':
+        table = FileTable(self.root)
+        table.directories = self.directories[:]
+        table._directory_ids = dict(self._directory_ids)
+        table.directory_index = self.directory_index[:]
+        table.names = self.names[:]
+        table.sizes = self.sizes[:]
+        table.mtimes = self.mtimes[:]
+        return table
+
+    def patched(self, upserted: List[Dict[str, Any]], removed: Iterable[str],
+                removed_dirs: Iterable[str]) -> 'FileTable':
+        """A new table with single rows replaced, added or removed.
+
+        The columns are copied whole and only the changed rows are looked up
+        (by bisection) and touched, so a watcher batch costs a few array copies
+        instead of a rebuild. Rows of this table keep showing the old data.
+        """
+        table = self.copy()
+
+        for directory in removed_dirs:
+            start, end = prefix_range(table, os.path.join(directory, ''))
+            table.delete(start, end)
+
+        for relative_path in removed:
+            index = find_row(table, relative_path)
+            if index is not None:
+                table.delete(index, index + 1)
+
+        for file_info in upserted:
+            relative_path, size, mtime = _row_tuple(file_info)
+            index = find_row(table, relative_path)
+            if index is None:
+                table.insert(bisect_rows(table, relative_path), relative_path, size, mtime)
+            else:
+                table.sizes[index] = size
+                table.mtimes[index] = mtime
+
+        return table
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the table's columns and string pools"""
+        columns = (self.directory_index, self.sizes, self.mtimes)
+        total = sum(column.itemsize * len(column) for column in columns)
+        total += sys.getsizeof(self.names) + sys.getsizeof(self.directories)
+        total += sum(sys.getsizeof(name) for name in set(self.names))
+        total += sum(sys.getsizeof(directory) for directory in self.directories)
+        return total
+
+
+def _relative_path_at(rows: Sequence[Mapping[str, Any]]):
+    if isinstance(rows, FileTable):
+        return rows.relative_path
+    return lambda index: rows[index]['relative_path']
+
+
+def bisect_rows(rows: Sequence[Mapping[str, Any]], relative_path: str) -> int:
+    """Index of the first row at or after relative_path; rows are sorted by relative_path"""
+    path_at = _relative_path_at(rows)
+    low, high = 0, len(rows)
+    while low < high:
+        middle = (low + high) // 2
+        if path_at(middle) < relative_path:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def find_row(rows: Sequence[Mapping[str, Any]], relative_path: str):
+    """Index of the row for relative_path, or None"""
+    index = bisect_rows(rows, relative_path)
+    if index < len(rows) and _relative_path_at(rows)(index) == relative_path:
+        return index
+    return None
+
+
+def prefix_range(rows: Sequence[Mapping[str, Any]], prefix: str) -> Tuple[int, int]:
+    """(start, end) of the rows whose relative_path starts with prefix"""
+    # Every path with the prefix sorts below the prefix with its last character bumped
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return bisect_rows(rows, prefix), bisect_rows(rows, upper)
+
+
+def apply_file_changes(files: Sequence[Mapping[str, Any]], upserted: List[Dict[str, Any]],
+                       removed: List[str], removed_dirs: List[str]) -> Sequence[Mapping[str, Any]]:
+    """Return files, sorted by relative_path, with single entries replaced, added or removed.
+
+    files is not modified; a FileTable gives a patched FileTable, a list a new list.
+    """
+    if isinstance(files, FileTable):
+        return files.patched(upserted, removed, removed_dirs)
+
+    result = list(files)
+    for directory in removed_dirs:
+        start, end = prefix_range(result, os.path.join(directory, ''))
+        del result[start:end]
+
+    for relative_path in removed:
+        index = find_row(result, relative_path)
+        if index is not None:
+            del result[index]
+
+    for file_info in upserted:
+        index = find_row(result, file_info['relative_path'])
+        if index is None:
+            result.insert(bisect_rows(result, file_info['relative_path']), file_info)
+        else:
+            result[index] = file_info
+
+    return result
+
+
+def _row_tuple(file_info: Mapping) -> Tuple[str, int, float]:
+    modified_time = file_info.get('modified_time', 0.0)
+    if not isinstance(modified_time, (int, float)):
+        # FileInfo-style datetime
+        modified_time = modified_time.timestamp()
+    return file_info['relative_path'], file_info.get('size', 0), modified_time
@@ -5,6 +5,7 @@ from typing import Dict, List, Set, Optional, Callable
 import os
 
 from file_prompt_dialog import show_file_prompt_dialog
+from file_table import apply_file_changes, bisect_rows, find_row, prefix_range
 
 
 class FileTreeWidget(tk.Frame):
@@ -244,8 +245,9 @@ class FileTreeWidget(tk.Frame):
     
     def populate_tree(self, files: List[Dict[str, any]]):
         """Populate the tree with files"""
-        self.all_files = files.copy()
-        self.filtered_files = files.copy()
+        # Shared, not copied: file lists are replaced rather than modified in place
+        self.all_files = files
+        self.filtered_files = files
         self.selected_files.clear()
         
         if not files:
@@ -260,17 +262,94 @@ class FileTreeWidget(tk.Frame):
         self._update_display()
         self._update_counter()
     
+    def apply_changes(self, upserted: List[Dict[str, any]], removed: List[str],
+                      removed_dirs: List[str] = None):
+        """Add, update or remove single entries, keeping selection and custom prompts.
+        
+        Only the affected listbox rows are touched; rows are found by bisection
+        in filtered_files, which stays sorted by relative path.
+        """
+        removed_dirs = removed_dirs or []
+        old_filtered = self.filtered_files
+        unfiltered = old_filtered is self.all_files
+        self.all_files = apply_file_changes(self.all_files, upserted, removed, removed_dirs)
+        
+        # Selection of files that are gone
+        self.selected_files.difference_update(removed)
+        for directory in removed_dirs:
+            prefix = os.path.join(directory, '')
+            self.selected_files = {path for path in self.selected_files if not path.startswith(prefix)}
+        
+        # Rows to delete from the listbox, by their index in the old filtered list
+        doomed = set()
+        for directory in removed_dirs:
+            start, end = prefix_range(old_filtered, os.path.join(directory, ''))
+            doomed.update(range(start, end))
+        for relative_path in removed:
+            index = find_row(old_filtered, relative_path)
+            if index is not None:
+                doomed.add(index)
+        
+        for index in sorted(doomed, reverse=True):
+            self.listbox.delete(index)
+        
+        search_text = self._search_text()
+        visible = sorted((f for f in upserted if not search_text or self._matches(f, search_text)),
+                         key=lambda f: f['relative_path'])
+        
+        if unfiltered:
+            self.filtered_files = self.all_files
+        else:
+            filtered = [f for index, f in enumerate(old_filtered) if index not in doomed] \
+                if doomed else list(old_filtered)
+            for file_info in visible:
+                index = find_row(filtered, file_info['relative_path'])
+                if index is None:
+                    filtered.insert(bisect_rows(filtered, file_info['relative_path']), file_info)
+                else:
+                    filtered[index] = file_info
+            self.filtered_files = filtered
+        
+        # In ascending order every row above the insertion point is already in place
+        for file_info in visible:
+            relative_path = file_info['relative_path']
+            index = find_row(self.filtered_files, relative_path)
+            existing = find_row(old_filtered, relative_path)
+            if existing is not None and existing not in doomed:
+                self.listbox.delete(index)
+            self._insert_row(index, relative_path)
+        
+        if not self.all_files:
+            self.listbox.pack_forget()
+            self.empty_label.pack(expand=True)
+        else:
+            self.empty_label.pack_forget()
+            self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self._update_counter()
+    
+    def _search_text(self) -> str:
+        """The search box text, or '' while it shows its placeholder"""
+        search_text = self.search_var.get().lower()
+        if search_text == "filter files and folders by name":
+            return ''
+        return search_text
+    
+    @staticmethod
+    def _matches(file_info, search_text: str) -> bool:
+        return search_text in Path(file_info['relative_path']).name.lower()
+    
     def _filter_files(self):
         """Filter files based on search text"""
-        search_text = self.search_var.get().lower()
+        search_text = self._search_text()
         
-        if search_text == "filter files and folders by name" or not search_text:
-            self.filtered_files = self.all_files.copy()
+        if not search_text:
+            self.filtered_files = self.all_files
         else:
             # Fast filtering using list comprehension
             self.filtered_files = [
                 f for f in self.all_files 
-                if search_text in Path(f['relative_path']).name.lower()
+                if self._matches(f, search_text)
             ]
         
         self._update_display()
@@ -280,34 +359,37 @@ class FileTreeWidget(tk.Frame):
         self.listbox.delete(0, tk.END)
         
         for file_info in self.filtered_files:
-            file_path = file_info['relative_path']
-            file_name = Path(file_path).name
-            
-            # Get file icon
-            icon = self._get_file_icon(Path(file_name).suffix.lower())
-            
-            # Format display text
-            selected_marker = "☑️" if file_path in self.selected_files else "☐"
-            
-            # Show directory structure with indentation
-            depth = len(Path(file_path).parts) - 1
-            indent = "  " * depth
-            
-            # Document icon for custom prompt - put it right after checkbox
-            has_custom_prompt = file_path in self.file_prompts and self.file_prompts[file_path].strip()
-            if has_custom_prompt:
-                doc_icon = "📝✨"  # Highlighted document icon with sparkle
-            else:
-                doc_icon = "📄"    # Regular document icon
-            
-            display_text = f"{selected_marker}   {doc_icon}  {indent}{icon} {file_name}"
-            
-            self.listbox.insert(tk.END, display_text)
-            
-            # Apply color coding based on selection and prompt status
-            self._apply_row_color(file_path)
+            self._insert_row(tk.END, file_info['relative_path'])
+    
+    def _insert_row(self, index, file_path: str):
+        """Insert the listbox row for file_path at index"""
+        file_name = Path(file_path).name
+        
+        # Get file icon
+        icon = self._get_file_icon(Path(file_name).suffix.lower())
+        
+        # Format display text
+        selected_marker = "☑️" if file_path in self.selected_files else "☐"
+        
+        # Show directory structure with indentation
+        depth = len(Path(file_path).parts) - 1
+        indent = "  " * depth
+        
+        # Document icon for custom prompt - put it right after checkbox
+        has_custom_prompt = file_path in self.file_prompts and self.file_prompts[file_path].strip()
+        if has_custom_prompt:
+            doc_icon = "📝✨"  # Highlighted document icon with sparkle
+        else:
+            doc_icon = "📄"    # Regular document icon
+        
+        display_text = f"{selected_marker}   {doc_icon}  {indent}{icon} {file_name}"
+        
+        self.listbox.insert(index, display_text)
+        
+        # Apply color coding based on selection and prompt status
+        self._apply_row_color(file_path, index)
     
-    def _apply_row_color(self, file_path: str):
+    def _apply_row_color(self, file_path: str, index=tk.END):
         """Dosya durumuna göre satır rengini uygula"""
         is_selected = file_path in self.selected_files
         has_custom_prompt = file_path in self.file_prompts and self.file_prompts[file_path].strip()
@@ -331,8 +413,8 @@ class FileTreeWidget(tk.Frame):
             # Varsayılan: Seçili değil ve prompt yok
             bg_color = '#f8f9fa'  # Varsayılan listbox rengi
         
-        # Son eklenen öğeye rengi uygula
-        self.listbox.itemconfig(tk.END, {'bg': bg_color})
+        # Eklenen satıra rengi uygula
+        self.listbox.itemconfig(index, {'bg': bg_color})
     
     def _get_file_icon(self, extension: str) -> str:
         """Get file icon based on extension"""
@@ -0,0 +1,411 @@
+"""
+Live watch mode for a scanned folder.
+
+On Linux the watcher subscribes to inotify events for every scanned directory;
+elsewhere (or when inotify is unavailable) it falls back to periodic rescans
+and diffs the results. Either way, changes are reported as small batches of
+FileChange records so the caller can patch its file list instead of rescanning.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from file_scanner import FileScanner, ScanRules
+
+CHANGE_ADDED = 'added'
+CHANGE_MODIFIED = 'modified'
+CHANGE_REMOVED = 'removed'
+# The watcher lost track of events (e.g. inotify queue overflow, or the watched
+# folder itself was deleted or replaced); rescan everything
+CHANGE_RESCAN = 'rescan'
+
+
+@dataclass
+class FileChange:
+    kind: str
+    relative_path: str
+    path: Optional[Path] = None
+    size: int = 0
+    modified_time: float = 0.0
+    is_dir: bool = False
+
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+               IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _Inotify:
+    """Minimal ctypes binding to the Linux inotify API"""
+
+    def __init__(self):
+        library = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(library, use_errno=True)
+        self._libc.inotify_init1.argtypes = [ctypes.c_int]
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """Return (wd, mask, name) tuples, waiting at most timeout seconds"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, name))
+
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Keep a scanned file list in sync with the file system.
+
+    on_changes is called from the watcher thread with a batch of FileChange
+    records; GUI callers should hand it over to their main loop.
+    """
+
+    def __init__(self, config_manager, directory: Path, extensions: List[str],
+                 include_ignored: bool, on_changes: Callable[[List[FileChange]], None]):
+        self.config_manager = config_manager
+        self.directory = directory
+        self.extensions = extensions
+        self.include_ignored = include_ignored
+        self.on_changes = on_changes
+
+        self.scanner = FileScanner(config_manager)
+        self.rules: ScanRules = self.scanner.build_scan_rules(extensions, include_ignored, directory)
+        self.mode: Optional[str] = None
+
+        self._root = os.fspath(directory)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+        self._watch_dirs: Dict[int, str] = {}  # wd -> relative directory
+        self._root_id: Optional[Tuple[int, int]] = None  # (st_dev, st_ino) of the watched folder
+        self._snapshot_at_start: Optional[Dict[str, tuple]] = None
+
+    def start(self) -> str:
+        """Start watching; returns the mode in use ('inotify' or 'polling')"""
+        self.mode = 'polling'
+        target = self._poll_loop
+        self._root_id = self._root_identity()
+
+        use_inotify = self.config_manager.get('watch_settings.use_inotify', True)
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self._inotify = _Inotify()
+                self._watch_tree('')
+                self.mode = 'inotify'
+                target = self._inotify_loop
+            except OSError as e:
+                # Typically ENOSPC when fs.inotify.max_user_watches is exhausted
+                print(f"inotify unavailable, falling back to polling: {e}")
+                self._close_inotify()
+
+        if self.mode == 'polling':
+            # Like the inotify watches, the baseline is taken before start returns,
+            # so changes made right after it are not folded into the first scan
+            self._snapshot_at_start = self._snapshot()
+
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+        return self.mode
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.scanner.stop_scanning()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._close_inotify()
+
+    def _close_inotify(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._watch_dirs.clear()
+
+    # inotify mode
+
+    def _watch_tree(self, relative_dir: str) -> List[FileChange]:
+        """Add watches for a directory and its subdirectories; returns its accepted files as additions"""
+        changes = []
+        pending = [relative_dir]
+
+        while pending:
+            current_rel = pending.pop()
+            current = os.path.join(self._root, current_rel) if current_rel else self._root
+
+            try:
+                wd = self._inotify.add_watch(current, _WATCH_MASK)
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    raise
+                continue
+            self._watch_dirs[wd] = current_rel
+
+            try:
+                with os.scandir(current) as it:
+                    dir_entries = list(it)
+            except OSError:
+                continue
+
+            for entry in dir_entries:
+                entry_rel = os.path.join(current_rel, entry.name) if current_rel else entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    if self._is_watched_dir(entry_rel) and not entry.is_symlink():
+                        pending.append(entry_rel)
+                elif relative_dir:
+                    # Files of a directory that appeared after the scan
+                    change = self._stat_change(CHANGE_ADDED, entry_rel)
+                    if change:
+                        changes.append(change)
+
+        return changes
+
+    def _unwatch_tree(self, relative_dir: str) -> None:
+        prefix = os.path.join(relative_dir, '')
+        for wd, watched in list(self._watch_dirs.items()):
+            if watched == relative_dir or watched.startswith(prefix):
+                self._inotify.rm_watch(wd)
+                del self._watch_dirs[wd]
+
+    def _is_watched_dir(self, relative_path: str) -> bool:
+        if os.path.basename(relative_path) in self.rules.ignored_folders:
+            return False
+        return not self._is_ignored(relative_path, True)
+
+    def _is_ignored(self, relative_path: str, is_dir: bool) -> bool:
+        ignore_rules = self.rules.ignore_rules
+        if ignore_rules is None:
+            return False
+        parent_rules = ignore_rules.for_path(self._root, os.path.dirname(relative_path))
+        return parent_rules.is_ignored(relative_path, is_dir)
+
+    def _inotify_loop(self) -> None:
+        debounce_ms = self.config_manager.get('watch_settings.debounce_ms', 300)
+        debounce = debounce_ms / 1000
+        # A file rewritten faster than the debounce must not hold back a batch forever
+        max_delay = self.config_manager.get('watch_settings.max_delay_ms', 5 * debounce_ms) / 1000
+        pending: Dict[str, str] = {}  # relative path -> last change kind
+        changes: List[FileChange] = []
+        first_event_at = 0.0
+
+        while not self._stop_event.is_set():
+            try:
+                events = self._inotify.read_events(timeout=debounce if pending or changes else 0.5)
+            except (OSError, ValueError):
+                break
+
+            if not events:
+                if pending or changes:
+                    self._deliver(changes + self._resolve(pending))
+                    pending = {}
+                    changes = []
+                continue
+
+            if not pending and not changes:
+                first_event_at = time.monotonic()
+
+            for wd, mask, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    changes.append(FileChange(CHANGE_RESCAN, ''))
+                    continue
+                relative_dir = self._watch_dirs.get(wd)
+                if relative_dir == '' and mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    # The watched folder is gone or was moved away; its watches
+                    # no longer see the path, so the caller has to scan it again
+                    self._deliver([FileChange(CHANGE_RESCAN, '')])
+                    return
+                if mask & IN_IGNORED:
+                    self._watch_dirs.pop(wd, None)
+                    continue
+
+                if relative_dir is None or not name:
+                    continue
+                relative_path = os.path.join(relative_dir, name) if relative_dir else name
+
+                if self.rules.ignore_rules and name in self.rules.ignore_rules.file_names:
+                    # An edited ignore file can change which files belong to the scan
+                    changes.append(FileChange(CHANGE_RESCAN, ''))
+                    continue
+
+                if mask & IN_ISDIR:
+                    if not self._is_watched_dir(relative_path):
+                        continue
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        try:
+                            changes.extend(self._watch_tree(relative_path))
+                        except OSError:
+                            changes.append(FileChange(CHANGE_RESCAN, ''))
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        self._unwatch_tree(relative_path)
+                        changes.append(FileChange(CHANGE_REMOVED, relative_path, is_dir=True))
+                    continue
+
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    pending[relative_path] = CHANGE_REMOVED
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    pending[relative_path] = CHANGE_ADDED
+                elif relative_path not in pending:
+                    pending[relative_path] = CHANGE_MODIFIED
+
+            if (pending or changes) and time.monotonic() - first_event_at >= max_delay:
+                self._deliver(changes + self._resolve(pending))
+                pending = {}
+                changes = []
+
+    def _resolve(self, pending: Dict[str, str]) -> List[FileChange]:
+        """Turn debounced per-path event kinds into FileChange records with fresh stat data"""
+        changes = []
+        for relative_path, kind in pending.items():
+            if not self.rules.name_filter.accepts(os.path.basename(relative_path)):
+                continue
+            if kind == CHANGE_REMOVED:
+                changes.append(FileChange(CHANGE_REMOVED, relative_path))
+                continue
+
+            change = self._stat_change(kind, relative_path)
+            changes.append(change or FileChange(CHANGE_REMOVED, relative_path))
+        return changes
+
+    def _stat_change(self, kind: str, relative_path: str) -> Optional[FileChange]:
+        """FileChange for a file the scanner would accept, or None"""
+        if not self.rules.name_filter.accepts(os.path.basename(relative_path)):
+            return None
+
+        if self._is_ignored(relative_path, False):
+            return None
+
+        path = os.path.join(self._root, relative_path)
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return None
+
+        if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_size > self.rules.max_file_size:
+            return None
+
+        return FileChange(kind, relative_path, Path(path), file_stat.st_size, file_stat.st_mtime)
+
+    # Polling fallback
+
+    def _poll_loop(self) -> None:
+        interval = self.config_manager.get('watch_settings.poll_interval_seconds', 2.0)
+        snapshot = self._snapshot_at_start
+        self._snapshot_at_start = None
+
+        while not self._stop_event.wait(interval):
+            if self._root_identity() != self._root_id:
+                # The watched folder was deleted or replaced by another one
+                self._deliver([FileChange(CHANGE_RESCAN, '')])
+                return
+
+            current = self._snapshot()
+            if current is None or snapshot is None:
+                snapshot = current
+                continue
+
+            changes = []
+            for relative_path, (stat_data, path) in current.items():
+                previous = snapshot.get(relative_path)
+                if previous is None:
+                    kind = CHANGE_ADDED
+                elif previous[0] != stat_data:
+                    kind = CHANGE_MODIFIED
+                else:
+                    continue
+                changes.append(FileChange(kind, relative_path, path, stat_data[0], stat_data[1]))
+
+            for relative_path in snapshot.keys() - current.keys():
+                changes.append(FileChange(CHANGE_REMOVED, relative_path))
+
+            snapshot = current
+            self._deliver(changes)
+
+    def _root_identity(self) -> Optional[Tuple[int, int]]:
+        try:
+            root_stat = os.stat(self._root)
+        except OSError:
+            return None
+        if not stat.S_ISDIR(root_stat.st_mode):
+            return None
+        return root_stat.st_dev, root_stat.st_ino
+
+    def _snapshot(self) -> Optional[Dict[str, tuple]]:
+        try:
+            files = self.scanner.scan_directory(self.directory, self.extensions, self.include_ignored)
+        except Exception as e:
+            print(f"Watch rescan failed: {e}")
+            return None
+
+        if self._stop_event.is_set():
+            return None
+
+        return {
+            f.relative_path: ((f.size, f.modified_time.timestamp()), f.path)
+            for f in files
+        }
+
+    def _deliver(self, changes: List[FileChange]) -> None:
+        if changes and not self._stop_event.is_set():
+            self.on_changes(changes)
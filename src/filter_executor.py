@@ -0,0 +1,77 @@
+"""
+Process pool for the CPU-bound part of content filters.
+
+Regex scans hold the GIL, so threads do not help. For large file lists the
+smart filters hand (function, path) pairs to a pool of worker processes;
+each worker reads the file itself, streaming it when it is big, and sends
+back only the small result (a bool, a line count, a metrics record).
+Results come back in the order of the input list. Small lists are not
+worth the pickling and stay in-process.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import instrumentation
+from content_stream import StreamSettings, content_pieces
+
+
+def _call_on_file(task: Tuple[Callable, str, Optional[int], StreamSettings, tuple]) -> Any:
+    func, path, size, stream_settings, args = task
+    try:
+        return func(content_pieces(path, size, stream_settings), *args)
+    except Exception:
+        return None
+
+
+class FilterExecutor:
+    def __init__(self, workers: int, min_files: int = 500):
+        self.workers = workers
+        self.min_files = min_files
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def from_config(cls, config_manager) -> Optional['FilterExecutor']:
+        """Executor sized from filter_settings, or None when process workers are off"""
+        workers = config_manager.get('filter_settings.process_workers', 0)
+        if workers == 'auto':
+            workers = multiprocessing.cpu_count()
+        if not workers or workers < 2:
+            return None
+        return cls(int(workers), config_manager.get('filter_settings.process_min_files', 500))
+
+    def accepts(self, count: int) -> bool:
+        return count >= self.min_files
+
+    def map_files(self, func: Callable, files: Sequence[Tuple[str, Optional[int]]],
+                  stream_settings: StreamSettings, *args) -> List[Any]:
+        """[func(pieces of file, *args) for each (path, size)], None where a file can't be read.
+
+        func must be a module-level function so it can be sent to the workers.
+        """
+        tasks = [(func, path, size, stream_settings, args) for path, size in files]
+        # Workers report to their own recorder; count their reads here
+        instrumentation.count_read(sum(size or 0 for _, size in files), len(files))
+        # A few chunks per worker keeps them busy without per-file round trips
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+
+        try:
+            return list(self._get_pool().map(_call_on_file, tasks, chunksize=chunksize))
+        except BrokenProcessPool as e:
+            print(f"Filter worker pool failed, filtering in-process: {e}")
+            self._pool = None
+            return [_call_on_file(task) for task in tasks]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Workers are spawned, not forked: the GUI process runs other threads
+            context = multiprocessing.get_context('spawn')
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=context)
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,470 @@
+"""
+In-process git status from the index file.
+
+read_index() parses .git/index (versions 2 to 4, split indexes included).
+staged_status() compares it with the HEAD tree, skipping every directory
+whose cache-tree entry still matches HEAD, and worktree_status() compares it
+with the stat data the scanner already collected. A file is only read and
+hashed when its mtime disagrees with the index while its size does not, or
+when it was written too close to the index to tell; everything else is
+decided from stat data alone, like `git status` does.
+
+Paths are '/'-separated and relative to the repository root throughout.
+"""
+
+import hashlib
+import os
+import re
+import struct
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from git_objects import OID_SIZE, ObjectStore
+
+MODE_TREE = 0o040000
+MODE_SYMLINK = 0o120000
+MODE_GITLINK = 0o160000
+
+_ENTRY_HEADER = struct.Struct('>10I20sH')
+# mtimes closer than this (seconds) count as equal: scanned mtimes are floats
+_MTIME_TOLERANCE = 1e-6
+
+_CONVERSION_ATTRIBUTE = re.compile(rb'(^|\s)-?(filter|eol|text|crlf|ident|working-tree-encoding)\b')
+
+
+class GitIndexError(Exception):
+    """The index or repository uses a feature this reader does not handle"""
+
+
+class IndexEntry(NamedTuple):
+    path: str
+    mode: int
+    oid: bytes
+    size: int
+    mtime: float
+    stage: int
+    assume_valid: bool
+    skip_worktree: bool
+    intent_to_add: bool
+
+
+class GitIndex(NamedTuple):
+    entries: List[IndexEntry]
+    # Directory ('' for the root) -> tree id, for the cache-tree entries still valid
+    cache_tree: Dict[str, str]
+    # The index file's own mtime: entries at or after it may be racily clean
+    mtime: float
+    # Stage 0 file entries by path
+    tracked: Dict[str, IndexEntry]
+    # Paths with merge conflicts
+    unmerged: Set[str]
+    # Submodule paths, '/'-terminated
+    submodules: Tuple[str, ...]
+
+    @classmethod
+    def from_entries(cls, entries: List[IndexEntry], cache_tree: Dict[str, str],
+                     mtime: float) -> 'GitIndex':
+        tracked = {}
+        unmerged = set()
+        submodules = []
+        for entry in entries:
+            if entry.stage:
+                unmerged.add(entry.path)
+            elif entry.mode == MODE_GITLINK:
+                submodules.append(entry.path + '/')
+            else:
+                tracked[entry.path] = entry
+        return cls(entries, cache_tree, mtime, tracked, unmerged, tuple(submodules))
+
+
+def _varint(data: bytes, position: int) -> Tuple[int, int]:
+    """Index v4 path prefix length: git's offset encoding"""
+    byte = data[position]
+    position += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = data[position]
+        position += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, position
+
+
+def _ewah_bits(data: bytes, position: int) -> Tuple[Set[int], int]:
+    """Set bit positions of an EWAH bitmap and the position after it"""
+    bit_count, word_count = struct.unpack_from('>II', data, position)
+    words = struct.unpack_from(f'>{word_count}Q', data, position + 8)
+    position += 8 + word_count * 8 + 4
+
+    bits = set()
+    bit = index = 0
+    while index < word_count:
+        marker = words[index]
+        index += 1
+        run_length = (marker >> 1) & 0xffffffff
+        literal_count = marker >> 33
+        if marker & 1:
+            bits.update(range(bit, bit + run_length * 64))
+        bit += run_length * 64
+        for word in words[index:index + literal_count]:
+            while word:
+                low = word & -word
+                bits.add(bit + low.bit_length() - 1)
+                word ^= low
+            bit += 64
+        index += literal_count
+
+    return {b for b in bits if b < bit_count}, position
+
+
+def _parse_cache_tree(data: bytes) -> Dict[str, str]:
+    trees = {}
+    # Entries come depth first; these stacks hold the subtrees still to read
+    # at each level and the path prefix for that level
+    position = 0
+    pending = [1]
+    prefixes = ['']
+    while position < len(data) and pending:
+        end = data.index(b'\0', position)
+        name = os.fsdecode(data[position:end])
+        newline = data.index(b'\n', end)
+        entry_count, subtree_count = (int(n) for n in data[end + 1:newline].split(b' '))
+        position = newline + 1
+
+        path = prefixes[-1] + name
+        if entry_count >= 0:
+            trees[path] = data[position:position + OID_SIZE].hex()
+            position += OID_SIZE
+
+        pending[-1] -= 1
+        if subtree_count:
+            pending.append(subtree_count)
+            prefixes.append(path + '/' if path else '')
+        while pending and pending[-1] == 0:
+            pending.pop()
+            prefixes.pop()
+    return trees
+
+
+def _parse_file(path: str) -> Tuple[List[IndexEntry], Dict[bytes, bytes]]:
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if len(data) < 32 or data[:4] != b'DIRC':
+        raise GitIndexError(f"Not an index file: {path}")
+    version, count = struct.unpack_from('>II', data, 4)
+    if version not in (2, 3, 4):
+        raise GitIndexError(f"Unsupported index version {version}")
+
+    entries = []
+    position = 12
+    previous = b''
+    encoding = sys.getfilesystemencoding()
+    new_entry = tuple.__new__
+    for _ in range(count):
+        (_, _, mtime_seconds, mtime_nanoseconds, _, _, mode, _, _, size,
+         oid, flags) = _ENTRY_HEADER.unpack_from(data, position)
+        header_size = 62
+        extended = 0
+        if flags & 0x4000:
+            extended = struct.unpack_from('>H', data, position + 62)[0]
+            header_size = 64
+
+        name_start = position + header_size
+        if version == 4:
+            # Each name drops a number of bytes from the previous one and adds a suffix
+            strip, name_start = _varint(data, name_start)
+            end = data.index(b'\0', name_start)
+            name = previous[:len(previous) - strip] + data[name_start:end]
+            position = end + 1
+        else:
+            length = flags & 0xfff
+            end = name_start + length if length < 0xfff else data.index(b'\0', name_start)
+            name = data[name_start:end]
+            # Entries are NUL-padded to a multiple of 8 bytes
+            position += (header_size + len(name) + 8) & ~7
+        previous = name
+
+        if mode & 0o170000 == MODE_TREE:
+            raise GitIndexError("Sparse index directory entries are not supported")
+        entries.append(new_entry(IndexEntry, (
+            name.decode(encoding, 'surrogateescape'), mode, oid, size,
+            mtime_seconds + mtime_nanoseconds / 1e9,
+            (flags >> 12) & 3, bool(flags & 0x8000),
+            bool(extended & 0x4000), bool(extended & 0x2000)
+        )))
+
+    extensions = {}
+    end_of_extensions = len(data) - OID_SIZE
+    while position + 8 <= end_of_extensions:
+        signature = data[position:position + 4]
+        size = struct.unpack_from('>I', data, position + 4)[0]
+        extensions[signature] = data[position + 8:position + 8 + size]
+        position += 8 + size
+    return entries, extensions
+
+
+def read_index(git_dir: str) -> GitIndex:
+    """The parsed index of a repository; empty when it has none yet"""
+    path = os.path.join(git_dir, 'index')
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return GitIndex.from_entries([], {}, 0.0)
+
+    entries, extensions = _parse_file(path)
+    if b'sdir' in extensions:
+        raise GitIndexError("Sparse indexes are not supported")
+
+    link = extensions.get(b'link')
+    if link is not None:
+        entries = _merge_shared_index(git_dir, entries, link)
+
+    cache_tree = _parse_cache_tree(extensions[b'TREE']) if b'TREE' in extensions else {}
+    return GitIndex.from_entries(entries, cache_tree, mtime)
+
+
+def _merge_shared_index(git_dir: str, entries: List[IndexEntry], link: bytes) -> List[IndexEntry]:
+    """Entries of a split index: the shared index with this file's changes applied"""
+    shared_oid = link[:OID_SIZE].hex()
+    if shared_oid == '0' * 40:
+        return entries
+
+    shared, _ = _parse_file(os.path.join(git_dir, f'sharedindex.{shared_oid}'))
+    deleted, position = _ewah_bits(link, OID_SIZE) if len(link) > OID_SIZE else (set(), OID_SIZE)
+    replaced, _ = _ewah_bits(link, position) if len(link) > position else (set(), position)
+
+    # The first entries of the split file replace the marked shared entries, in order;
+    # the rest are new
+    replacements = iter(entries[:len(replaced)])
+    merged = []
+    for position, entry in enumerate(shared):
+        if position in replaced:
+            entry = next(replacements)._replace(path=entry.path)
+        if position not in deleted:
+            merged.append(entry)
+    merged.extend(entries[len(replaced):])
+    merged.sort(key=lambda entry: (os.fsencode(entry.path), entry.stage))
+    return merged
+
+
+def check_supported(toplevel: str, common_dir: str, config: Dict[str, str]) -> None:
+    """Raise GitIndexError for repositories whose status needs git itself.
+
+    config is the effective configuration (system, global and repository,
+    as `git config --list` prints it). SHA-256 and reftable repositories are
+    refused, and so are working trees converted on checkout (autocrlf, eol,
+    or filter/eol/text attributes at the top level or in the attributes
+    file), since hashing the raw files would then disagree with the index.
+    """
+    if config.get('extensions.objectformat', 'sha1').lower() != 'sha1':
+        raise GitIndexError("SHA-256 repositories are not supported")
+    if config.get('extensions.refstorage', 'files').lower() != 'files':
+        raise GitIndexError("reftable repositories are not supported")
+    if config.get('core.autocrlf', 'false').lower() not in ('false', 'no', 'off', '0'):
+        raise GitIndexError("core.autocrlf is set")
+    if 'core.eol' in config:
+        raise GitIndexError("core.eol is set")
+
+    attributes_files = [os.path.join(toplevel, '.gitattributes'),
+                        os.path.join(common_dir, 'info', 'attributes'),
+                        user_config_file(config, 'core.attributesfile', 'attributes')]
+    for attributes in attributes_files:
+        try:
+            with open(attributes, 'rb') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            if not line.lstrip().startswith(b'#') and _CONVERSION_ATTRIBUTE.search(line):
+                raise GitIndexError(f"Content conversion attributes in {attributes}")
+
+
+def user_config_file(config: Dict[str, str], key: str, default_name: str) -> str:
+    """Path of a per-user file git reads: the configured key, or git/<default_name>
+    in the XDG config directory"""
+    path = config.get(key)
+    if path:
+        return os.path.expanduser(path)
+    return os.path.join(os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser(os.path.join('~', '.config')),
+                        'git', default_name)
+
+
+def parse_config_list(output: bytes) -> Dict[str, str]:
+    """Output of `git config --list -z` as {lowercase key: last value}"""
+    config = {}
+    for entry in output.split(b'\0'):
+        if not entry:
+            continue
+        key, separator, value = entry.partition(b'\n')
+        # A key without '=' is a boolean set to true
+        config[os.fsdecode(key).lower()] = os.fsdecode(value) if separator else 'true'
+    return config
+
+
+def resolve_head(git_dir: str, common_dir: str) -> Optional[str]:
+    """Commit id HEAD points to, or None on an unborn branch"""
+    with open(os.path.join(git_dir, 'HEAD'), 'r', encoding='utf-8') as f:
+        head = f.read().strip()
+
+    for _ in range(5):
+        if not head.startswith('ref: '):
+            return head
+        ref = head[5:]
+        try:
+            with open(os.path.join(common_dir, ref), 'r', encoding='utf-8') as f:
+                head = f.read().strip()
+            continue
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+
+        head = None
+        try:
+            with open(os.path.join(common_dir, 'packed-refs'), 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.rstrip('\n').endswith(' ' + ref) and not line.startswith('#'):
+                        head = line.split(' ', 1)[0]
+                        break
+        except FileNotFoundError:
+            pass
+        if head is None:
+            return None
+    raise GitIndexError("Symbolic ref loop at HEAD")
+
+
+def _head_files(store: ObjectStore, tree_oid: str, directory: str, prefix: str,
+                cache_tree: Dict[str, str], files: Dict[str, Tuple[int, bytes]],
+                clean: Set[str]) -> None:
+    """Files of a HEAD tree below prefix, skipping directories the index has unchanged"""
+    if cache_tree.get(directory) == tree_oid:
+        clean.add(directory)
+        return
+
+    for mode, name, oid in store.tree_entries(tree_oid):
+        path = f'{directory}/{name}' if directory else name
+        if mode == MODE_TREE:
+            # Descend into the directories on the way to prefix and those below it
+            if path.startswith(prefix) or prefix.startswith(path + '/'):
+                _head_files(store, oid, path, prefix, cache_tree, files, clean)
+        elif path.startswith(prefix):
+            files[path] = (mode, bytes.fromhex(oid))
+
+
+def _in_clean_directory(path: str, clean: Set[str]) -> bool:
+    position = path.find('/')
+    while position >= 0:
+        if path[:position] in clean:
+            return True
+        position = path.find('/', position + 1)
+    return False
+
+
+def staged_status(index: GitIndex, store: ObjectStore, head_commit: Optional[str],
+                  prefix: str = '') -> Dict[str, List[str]]:
+    """'staged', 'added' and 'renamed' lists: the index compared with HEAD.
+
+    Only exact renames are detected; a renamed and edited file shows as added.
+    """
+    head = {}
+    clean = set()
+    if head_commit is not None:
+        _head_files(store, store.commit_tree(head_commit), '', prefix, index.cache_tree, head, clean)
+
+    if '' in clean:
+        return {'staged': [], 'added': [], 'renamed': []}
+
+    staged, added = [], []
+    for entry in index.entries:
+        if entry.stage or entry.intent_to_add or not entry.path.startswith(prefix):
+            continue
+        if clean and _in_clean_directory(entry.path, clean):
+            continue
+
+        head_entry = head.pop(entry.path, None)
+        if head_entry is None:
+            added.append(entry)
+        elif head_entry != (entry.mode, entry.oid):
+            staged.append(entry.path)
+
+    # HEAD files the index no longer has are staged deletions, or the source of a rename
+    removed = {}
+    for path, (_, oid) in head.items():
+        if path not in index.unmerged:
+            removed.setdefault(oid, []).append(path)
+
+    renamed, added_paths = [], []
+    for entry in added:
+        sources = removed.get(entry.oid)
+        if sources:
+            sources.pop()
+            renamed.append(entry.path)
+        else:
+            added_paths.append(entry.path)
+
+    return {
+        'staged': staged + [entry.path for entry in added] + [path for paths in removed.values() for path in paths],
+        'added': added_paths,
+        'renamed': renamed,
+    }
+
+
+def _worktree_oid(path: str, mode: int) -> Optional[bytes]:
+    """Blob id of a working tree file as `git hash-object` gives it without filters"""
+    try:
+        if mode == MODE_SYMLINK:
+            data = os.fsencode(os.readlink(path))
+            return hashlib.sha1(b'blob %d\0' % len(data) + data).digest()
+
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            digest = hashlib.sha1(b'blob %d\0' % size)
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+            return digest.digest()
+    except OSError:
+        return None
+
+
+def worktree_status(index: GitIndex, toplevel: str, prefix: str,
+                    rows: Iterable[Tuple[str, int, float]]) -> Dict[str, List[str]]:
+    """'modified', 'deleted' and 'untracked' lists: the index compared with scanned files.
+
+    rows are (path, size, mtime) for the files found on disk below prefix.
+    Untracked files are not checked against ignore rules here.
+    """
+    tracked = index.tracked
+    submodules = index.submodules
+    index_mtime = index.mtime
+    modified, untracked = [], []
+    seen = set()
+    for path, size, mtime in rows:
+        entry = tracked.get(path)
+        if entry is None:
+            if path not in index.unmerged and not path.startswith(submodules):
+                untracked.append(path)
+            continue
+
+        seen.add(path)
+        _, mode, oid, entry_size, entry_mtime, _, assume_valid, skip_worktree, intent_to_add = entry
+        if assume_valid or skip_worktree or intent_to_add:
+            continue
+
+        if mode == MODE_SYMLINK:
+            # Scanned sizes and mtimes are the link target's
+            changed = _worktree_oid(os.path.join(toplevel, path), mode) != oid
+        elif entry_size and entry_size != size & 0xffffffff:
+            changed = True
+        elif (abs(mtime - entry_mtime) >= _MTIME_TOLERANCE or not entry_size
+              or entry_mtime >= index_mtime):
+            # Same size but touched, or too recent for stat data to be trusted
+            changed = _worktree_oid(os.path.join(toplevel, path), mode) != oid
+        else:
+            changed = False
+
+        if changed:
+            modified.append(path)
+
+    deleted = [path for path, entry in tracked.items()
+               if path not in seen and path.startswith(prefix)
+               and not (entry.assume_valid or entry.skip_worktree or entry.intent_to_add)
+               and not os.path.lexists(os.path.join(toplevel, path))]
+    return {'modified': modified, 'deleted': deleted, 'untracked': untracked}
@@ -4,231 +4,155 @@ from pathlib import Path
 from typing import List, Dict, Set, Optional, Tuple
 from datetime import datetime, timedelta
 
+from file_table import FileTable
+from git_session import GitRepoSession
+import instrumentation
+
 
 class GitIntegration:
     def __init__(self, config_manager):
         self.config_manager = config_manager
+        self._sessions: Dict[str, GitRepoSession] = {}
+    
+    def session(self, directory: Path) -> Optional[GitRepoSession]:
+        """The cached repository session for directory, or None outside a repository"""
+        key = os.path.abspath(directory)
+        session = self._sessions.get(key)
+        if session is not None and session.is_valid():
+            return session
+        
+        if session is not None:
+            session.close()
+        session = GitRepoSession.open(key)
+        if session is None:
+            self._sessions.pop(key, None)
+        else:
+            self._sessions[key] = session
+        return session
+    
+    def close(self):
+        """Stop the git processes kept by the repository sessions"""
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
     
     def is_git_repository(self, directory: Path) -> bool:
         """Check if directory is a git repository"""
-        try:
-            result = subprocess.run(
-                ['git', 'rev-parse', '--git-dir'],
-                cwd=str(directory),
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
-            return False
+        return self.session(directory) is not None
     
-    def get_git_status(self, directory: Path) -> Dict[str, List[str]]:
-        """Get git status of files"""
+    def list_files(self, directory: Path) -> Optional[List[str]]:
+        """List tracked and untracked-but-not-ignored files below directory.
+        
+        Paths are relative to directory and use '/' separators. Returns None when
+        the directory is not in a git repository or git fails.
+        """
         if not self.is_git_repository(directory):
-            return {}
+            return None
         
+        instrumentation.count('subprocesses')
         try:
-            result = subprocess.run(
-                ['git', 'status', '--porcelain'],
-                cwd=str(directory),
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            with instrumentation.span('git.ls-files'):
+                result = subprocess.run(
+                    ['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+                    cwd=str(directory),
+                    capture_output=True,
+                    timeout=30
+                )
             
             if result.returncode != 0:
-                return {}
-            
-            status = {
-                'modified': [],
-                'added': [],
-                'deleted': [],
-                'renamed': [],
-                'untracked': [],
-                'staged': []
-            }
-            
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                
-                status_code = line[:2]
-                filename = line[3:].strip()
-                
-                # Handle renamed files
-                if '->' in filename:
-                    old_name, new_name = filename.split(' -> ')
-                    status['renamed'].append(new_name.strip())
-                    filename = new_name.strip()
-                
-                # Check staged status (first character)
-                if status_code[0] in ['A', 'M', 'D', 'R', 'C']:
-                    status['staged'].append(filename)
-                
-                # Check working directory status (second character)
-                if status_code[1] == 'M':
-                    status['modified'].append(filename)
-                elif status_code[1] == 'D':
-                    status['deleted'].append(filename)
-                elif status_code[0] == 'A':
-                    status['added'].append(filename)
-                elif status_code[0] == 'R':
-                    status['renamed'].append(filename)
-                elif status_code == '??':
-                    status['untracked'].append(filename)
+                return None
             
-            return status
+            # Unmerged paths are listed once per stage
+            paths = dict.fromkeys(result.stdout.split(b'\0'))
+            paths.pop(b'', None)
+            return [os.fsdecode(path) for path in paths]
             
         except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
-            print(f"Git status error: {e}")
+            print(f"Git ls-files error: {e}")
+            return None
+    
+    def get_git_status(self, directory: Path, worktree_stamp=None,
+                       files: Optional[List[Dict[str, any]]] = None) -> Dict[str, List[str]]:
+        """Get git status of files, with paths relative to directory.
+        
+        When the scanned files are passed and git_settings.status_backend is
+        'index', status is read from the index without running git, and only
+        those files can show as modified or untracked. Results are cached
+        until the index, HEAD or worktree_stamp changes.
+        """
+        session = self.session(directory)
+        if session is None:
             return {}
+        
+        if files is not None and self.config_manager.get('git_settings.status_backend', 'index') == 'index':
+            status = session.index_status(self._stat_rows(files), worktree_stamp)
+            if status is not None:
+                return status
+        return session.status(worktree_stamp)
     
-    def get_changed_files_since(self, directory: Path, since: str = "HEAD~1") -> List[str]:
-        """Get files changed since a specific commit/branch"""
-        if not self.is_git_repository(directory):
+    def get_changed_files_since(self, directory: Path, since: str = "HEAD~1",
+                                files: Optional[List[Dict[str, any]]] = None) -> List[str]:
+        """Get files changed since a specific commit/branch, including uncommitted changes.
+        
+        Paths are relative to directory; renamed files are listed under their new
+        name. The committed part is cached per (HEAD, since); pass the scanned
+        files to get the uncommitted part from the index as get_git_status does.
+        """
+        session = self.session(directory)
+        if session is None:
             return []
         
-        try:
-            # Get files changed since specified commit
-            result = subprocess.run(
-                ['git', 'diff', '--name-only', since],
-                cwd=str(directory),
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode != 0:
-                return []
-            
-            files = [f.strip() for f in result.stdout.strip().split('\n') if f.strip()]
-            return files
-            
-        except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
-            print(f"Git diff error: {e}")
+        committed = session.changes_between(since)
+        if committed is None:
             return []
+        
+        changed = {path for _, path, _ in committed}
+        worktree_stamp = self._worktree_stamp(files) if files is not None else None
+        git_status = self.get_git_status(directory, worktree_stamp, files)
+        for status_type in ['modified', 'staged', 'added', 'deleted', 'renamed']:
+            changed.update(git_status.get(status_type, []))
+        return list(changed)
     
     def get_changed_files_by_time(self, directory: Path, hours: int = 24) -> List[str]:
-        """Get files changed in the last N hours"""
-        if not self.is_git_repository(directory):
+        """Get files changed by commits in the last N hours, relative to directory"""
+        session = self.session(directory)
+        if session is None:
             return []
         
-        try:
-            # Calculate time threshold
-            since_time = datetime.now() - timedelta(hours=hours)
-            since_str = since_time.strftime('%Y-%m-%d %H:%M:%S')
-            
-            result = subprocess.run(
-                ['git', 'log', '--name-only', '--pretty=format:', f'--since={since_str}'],
-                cwd=str(directory),
-                capture_output=True,
-                text=True,
-                timeout=15
-            )
-            
-            if result.returncode != 0:
-                return []
-            
-            files = set()
-            for line in result.stdout.strip().split('\n'):
-                if line.strip() and not line.startswith('commit'):
-                    files.add(line.strip())
-            
-            return list(files)
-            
-        except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
-            print(f"Git log error: {e}")
+        # Minute precision lets repeated filtering reuse the same history walk
+        since_time = datetime.now() - timedelta(hours=hours)
+        changes = session.changes_logged(since_time.strftime('%Y-%m-%d %H:%M'))
+        if changes is None:
             return []
+        return list(dict.fromkeys(path for _, path, _ in changes))
     
     def get_branch_info(self, directory: Path) -> Dict[str, str]:
         """Get current branch and remote info"""
-        if not self.is_git_repository(directory):
+        session = self.session(directory)
+        if session is None:
             return {}
-        
-        info = {}
-        
-        try:
-            # Get current branch
-            result = subprocess.run(
-                ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-                cwd=str(directory),
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.returncode == 0:
-                info['branch'] = result.stdout.strip()
-            
-            # Get remote URL
-            result = subprocess.run(
-                ['git', 'config', '--get', 'remote.origin.url'],
-                cwd=str(directory),
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.returncode == 0:
-                info['remote'] = result.stdout.strip()
-            
-            # Get last commit info
-            result = subprocess.run(
-                ['git', 'log', '-1', '--pretty=format:%H|%an|%ae|%ad|%s'],
-                cwd=str(directory),
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.returncode == 0:
-                parts = result.stdout.strip().split('|')
-                if len(parts) >= 5:
-                    info['last_commit_hash'] = parts[0]
-                    info['last_commit_author'] = parts[1]
-                    info['last_commit_email'] = parts[2]
-                    info['last_commit_date'] = parts[3]
-                    info['last_commit_message'] = parts[4]
-            
-        except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
-            print(f"Git info error: {e}")
-        
-        return info
+        return session.branch_info()
     
     def get_file_blame_info(self, directory: Path, filepath: str) -> Dict[str, any]:
         """Get blame info for a specific file"""
-        if not self.is_git_repository(directory):
-            return {}
-        
-        try:
-            result = subprocess.run(
-                ['git', 'log', '-1', '--pretty=format:%an|%ae|%ad|%s', '--', filepath],
-                cwd=str(directory),
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.returncode != 0:
-                return {}
-            
-            if not result.stdout.strip():
-                return {}
-            
-            parts = result.stdout.strip().split('|')
-            if len(parts) >= 4:
-                return {
-                    'last_author': parts[0],
-                    'last_author_email': parts[1],
-                    'last_modified': parts[2],
-                    'last_commit_message': parts[3]
-                }
-            
-        except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
-            print(f"Git blame error: {e}")
+        return self.get_last_commits(directory, [filepath]).get(filepath, {})
+    
+    def get_last_commits(self, directory: Path, filepaths: List[str]) -> Dict[str, Dict[str, str]]:
+        """Last commit info for each file (relative to directory) from one history walk.
         
-        return {}
+        Files that no commit touched are left out.
+        """
+        session = self.session(directory)
+        if session is None:
+            return {}
+        return session.last_commits(filepaths)
+    
+    def get_object_info(self, directory: Path, filepaths: List[str], revision: str = 'HEAD') -> Dict[str, Dict[str, any]]:
+        """Object id, type and size of each file in revision; files not in it are left out"""
+        session = self.session(directory)
+        if session is None:
+            return {}
+        return session.object_info(filepaths, revision)
     
     def get_commits_affecting_files(self, directory: Path, files: List[str], limit: int = 10) -> List[Dict[str, str]]:
         """Get recent commits that affected the given files"""
@@ -238,13 +162,15 @@ class GitIntegration:
         try:
             cmd = ['git', 'log', f'-{limit}', '--pretty=format:%H|%an|%ae|%ad|%s', '--'] + files
             
-            result = subprocess.run(
-                cmd,
-                cwd=str(directory),
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            instrumentation.count('subprocesses')
+            with instrumentation.span('git.log'):
+                result = subprocess.run(
+                    cmd,
+                    cwd=str(directory),
+                    capture_output=True,
+                    text=True,
+                    timeout=10
+                )
             
             if result.returncode != 0:
                 return []
@@ -273,14 +199,12 @@ class GitIntegration:
     def filter_files_by_git_status(self, files: List[Dict[str, any]], 
                                  directory: Path, filter_type: str) -> List[Dict[str, any]]:
         """Filter files based on git status"""
-        if not self.is_git_repository(directory):
+        if filter_type == 'all' or not self.is_git_repository(directory):
             return files
         
-        git_status = self.get_git_status(directory)
+        git_status = self.get_git_status(directory, self._worktree_stamp(files), files)
         
-        if filter_type == 'all':
-            return files
-        elif filter_type == 'modified':
+        if filter_type == 'modified':
             target_files = set(git_status.get('modified', []) + git_status.get('staged', []))
         elif filter_type == 'untracked':
             target_files = set(git_status.get('untracked', []))
@@ -298,7 +222,7 @@ class GitIntegration:
                 target_files = set(self.get_changed_files_by_time(directory, hours))
             else:
                 since = filter_type.replace('since_commit_', '')
-                target_files = set(self.get_changed_files_since(directory, since))
+                target_files = set(self.get_changed_files_since(directory, since, files))
         else:
             return files
         
@@ -310,6 +234,34 @@ class GitIntegration:
         
         return filtered_files
     
+    @staticmethod
+    def _worktree_stamp(files: List[Dict[str, any]]) -> Tuple[int, float]:
+        """Row count and newest mtime: changes when the scanned tree does"""
+        if isinstance(files, FileTable):
+            return len(files), max(files.mtimes, default=0.0)
+        
+        newest = 0.0
+        for file_info in files:
+            modified_time = file_info.get('modified_time', 0.0)
+            if isinstance(modified_time, datetime):
+                modified_time = modified_time.timestamp()
+            newest = max(newest, modified_time)
+        return len(files), newest
+    
+    @staticmethod
+    def _stat_rows(files: List[Dict[str, any]]):
+        """(relative path, size, mtime) of each scanned file"""
+        if isinstance(files, FileTable):
+            for index in range(len(files)):
+                yield files.relative_path(index), files.sizes[index], files.mtimes[index]
+            return
+        
+        for file_info in files:
+            modified_time = file_info.get('modified_time', 0.0)
+            if isinstance(modified_time, datetime):
+                modified_time = modified_time.timestamp()
+            yield file_info['relative_path'], file_info.get('size', -1), modified_time
+    
     def get_git_filters(self) -> List[Tuple[str, str]]:
         """Get available git-based filters"""
         return [
@@ -0,0 +1,242 @@
+"""
+Read-only access to a repository's object database.
+
+Enough of git's storage format to read commits and trees without running
+git: loose objects, pack files (through their v2 .idx) with offset and
+reference deltas, and alternate object directories. SHA-1 repositories only.
+"""
+
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+OID_SIZE = 20
+
+_PACK_TYPES = {1: 'commit', 2: 'tree', 3: 'blob', 4: 'tag'}
+_OFS_DELTA = 6
+_REF_DELTA = 7
+
+# Parsed non-blob objects kept per store before the cache starts over
+_CACHE_LIMIT = 8192
+
+
+class GitObjectError(Exception):
+    """An object is missing or stored in a way this reader does not handle"""
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    def varint(position):
+        value = shift = 0
+        while True:
+            byte = delta[position]
+            position += 1
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value, position
+
+    _, position = varint(0)
+    result_size, position = varint(position)
+    result = bytearray()
+
+    while position < len(delta):
+        opcode = delta[position]
+        position += 1
+        if opcode & 0x80:
+            # Copy from the base: offset and size bytes are present per flag bit
+            offset = size = 0
+            for bit in range(4):
+                if opcode & (1 << bit):
+                    offset |= delta[position] << (8 * bit)
+                    position += 1
+            for bit in range(3):
+                if opcode & (0x10 << bit):
+                    size |= delta[position] << (8 * bit)
+                    position += 1
+            result += base[offset:offset + (size or 0x10000)]
+        elif opcode:
+            result += delta[position:position + opcode]
+            position += opcode
+        else:
+            raise GitObjectError("Invalid delta opcode")
+
+    if len(result) != result_size:
+        raise GitObjectError("Delta result has the wrong size")
+    return bytes(result)
+
+
+class PackFile:
+    """One pack and its version 2 index"""
+
+    def __init__(self, index_path: str):
+        self.pack_path = index_path[:-4] + '.pack'
+        with open(index_path, 'rb') as f:
+            index = f.read()
+        if index[:4] != b'\xfftOc' or struct.unpack_from('>I', index, 4)[0] != 2:
+            raise GitObjectError(f"Unsupported pack index: {index_path}")
+
+        self._fanout = struct.unpack_from('>256I', index, 8)
+        self.count = self._fanout[255]
+        self._names_start = 8 + 256 * 4
+        self._offsets_start = self._names_start + self.count * (OID_SIZE + 4)
+        self._large_offsets_start = self._offsets_start + self.count * 4
+        self._index = index
+
+    def offset(self, oid: bytes) -> Optional[int]:
+        # The fanout table bounds the sorted names starting with oid's first byte
+        low = self._fanout[oid[0] - 1] if oid[0] else 0
+        high = self._fanout[oid[0]]
+        while low < high:
+            middle = (low + high) // 2
+            start = self._names_start + middle * OID_SIZE
+            name = self._index[start:start + OID_SIZE]
+            if name < oid:
+                low = middle + 1
+            elif name > oid:
+                high = middle
+            else:
+                break
+        else:
+            return None
+
+        offset = struct.unpack_from('>I', self._index, self._offsets_start + middle * 4)[0]
+        if offset & 0x80000000:
+            large = self._large_offsets_start + (offset & 0x7fffffff) * 8
+            offset = struct.unpack_from('>Q', self._index, large)[0]
+        return offset
+
+    def read_at(self, offset: int, store: 'ObjectStore') -> Tuple[str, bytes]:
+        with open(self.pack_path, 'rb') as f:
+            return self._read_at(f, offset, store)
+
+    def _read_at(self, f, offset: int, store: 'ObjectStore') -> Tuple[str, bytes]:
+        f.seek(offset)
+        byte = f.read(1)[0]
+        kind = (byte >> 4) & 7
+        while byte & 0x80:
+            byte = f.read(1)[0]
+
+        if kind == _OFS_DELTA:
+            byte = f.read(1)[0]
+            distance = byte & 0x7f
+            while byte & 0x80:
+                byte = f.read(1)[0]
+                distance = ((distance + 1) << 7) | (byte & 0x7f)
+            delta = self._inflate(f)
+            base_kind, base = self._read_at(f, offset - distance, store)
+            return base_kind, _apply_delta(base, delta)
+
+        if kind == _REF_DELTA:
+            base_oid = f.read(OID_SIZE)
+            delta = self._inflate(f)
+            base_kind, base = store.read(base_oid.hex())
+            return base_kind, _apply_delta(base, delta)
+
+        if kind not in _PACK_TYPES:
+            raise GitObjectError(f"Unknown pack object type {kind}")
+        return _PACK_TYPES[kind], self._inflate(f)
+
+    @staticmethod
+    def _inflate(f) -> bytes:
+        decompressor = zlib.decompressobj()
+        parts = []
+        while not decompressor.eof:
+            chunk = f.read(8192)
+            if not chunk:
+                raise GitObjectError("Truncated pack object")
+            parts.append(decompressor.decompress(chunk))
+        return b''.join(parts)
+
+
+class ObjectStore:
+    """Objects of one repository, by hex object id"""
+
+    def __init__(self, objects_dir: str):
+        self.directories = [objects_dir] + self._alternates(objects_dir)
+        self._packs: Optional[List[PackFile]] = None
+        self._cache: Dict[str, Tuple[str, bytes]] = {}
+
+    @staticmethod
+    def _alternates(objects_dir: str) -> List[str]:
+        try:
+            with open(os.path.join(objects_dir, 'info', 'alternates'), 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+        return [os.path.normpath(os.path.join(objects_dir, line.strip()))
+                for line in lines if line.strip() and not line.startswith('#')]
+
+    def _pack_files(self) -> List[PackFile]:
+        if self._packs is None:
+            self._packs = []
+            for directory in self.directories:
+                pack_dir = os.path.join(directory, 'pack')
+                try:
+                    names = sorted(os.listdir(pack_dir))
+                except OSError:
+                    continue
+                for name in names:
+                    if name.endswith('.idx') and os.path.exists(os.path.join(pack_dir, name[:-4] + '.pack')):
+                        self._packs.append(PackFile(os.path.join(pack_dir, name)))
+        return self._packs
+
+    def read(self, oid: str) -> Tuple[str, bytes]:
+        """(type, content) of an object"""
+        cached = self._cache.get(oid)
+        if cached is not None:
+            return cached
+
+        result = self._read_loose(oid)
+        if result is None:
+            binary_oid = bytes.fromhex(oid)
+            for pack in self._pack_files():
+                offset = pack.offset(binary_oid)
+                if offset is not None:
+                    result = pack.read_at(offset, self)
+                    break
+        if result is None:
+            raise GitObjectError(f"Object {oid} not found")
+
+        # Trees are what get read repeatedly; blobs can be big
+        if result[0] != 'blob':
+            if len(self._cache) >= _CACHE_LIMIT:
+                self._cache.clear()
+            self._cache[oid] = result
+        return result
+
+    def _read_loose(self, oid: str) -> Optional[Tuple[str, bytes]]:
+        for directory in self.directories:
+            try:
+                with open(os.path.join(directory, oid[:2], oid[2:]), 'rb') as f:
+                    data = zlib.decompress(f.read())
+            except OSError:
+                continue
+            except zlib.error as e:
+                raise GitObjectError(f"Corrupt loose object {oid}: {e}")
+            header, _, content = data.partition(b'\0')
+            return header.split(b' ')[0].decode('ascii'), content
+        return None
+
+    def commit_tree(self, commit_oid: str) -> str:
+        """Tree id of a commit"""
+        kind, content = self.read(commit_oid)
+        if kind != 'commit' or not content.startswith(b'tree '):
+            raise GitObjectError(f"{commit_oid} is not a commit")
+        return content[5:5 + OID_SIZE * 2].decode('ascii')
+
+    def tree_entries(self, tree_oid: str) -> Iterator[Tuple[int, str, str]]:
+        """(mode, name, hex object id) of each entry of a tree"""
+        kind, content = self.read(tree_oid)
+        if kind != 'tree':
+            raise GitObjectError(f"{tree_oid} is not a tree")
+
+        position = 0
+        while position < len(content):
+            space = content.index(b' ', position)
+            end = content.index(b'\0', space)
+            mode = int(content[position:space], 8)
+            name = os.fsdecode(content[space + 1:end])
+            oid = content[end + 1:end + 1 + OID_SIZE].hex()
+            position = end + 1 + OID_SIZE
+            yield mode, name, oid
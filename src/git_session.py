@@ -0,0 +1,412 @@
+"""
+Cached git state for one scanned folder.
+
+A GitRepoSession resolves the repository once (one `git rev-parse`) and then
+answers status and branch questions from a single
+`git status --porcelain=v2 -z --branch` run. Results are reused until the
+index, HEAD or the checked-out branch ref changes on disk, or until the
+caller's view of the working tree (the scanned rows' mtimes) does. Status
+can also be computed without git from the index file and the scanned rows'
+stat data (see git_index). Per-file
+questions go to long-running git processes (see git_worker) owned by the
+session.
+"""
+
+import os
+import struct
+import subprocess
+import threading
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import instrumentation
+from git_index import (GitIndexError, check_supported, parse_config_list, read_index, resolve_head,
+                       staged_status, user_config_file, worktree_status)
+from git_objects import GitObjectError, ObjectStore
+from git_worker import CatFileBatch, LastCommitWalker, NameStatusStream
+from ignore_rules import IgnoreRules, load_ignore_file
+
+STATUS_CATEGORIES = ('modified', 'added', 'deleted', 'renamed', 'untracked', 'staged')
+
+
+def run_git(args: List[str], cwd: str, timeout: float = 10) -> Optional[bytes]:
+    """stdout of a git command, or None if it fails or git is missing"""
+    command = next((arg for arg in args if not arg.startswith('-')), 'git')
+    instrumentation.count('subprocesses')
+    try:
+        with instrumentation.span(f'git.{command}'):
+            result = subprocess.run(['git'] + args, cwd=cwd, capture_output=True, timeout=timeout)
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
+        print(f"Git {args[0]} error: {e}")
+        return None
+
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def parse_status_v2(output: bytes) -> Tuple[Dict[str, List[str]], Dict[str, str]]:
+    """Status lists (paths relative to the repository root) and '# branch.*' headers
+    from `git status --porcelain=v2 -z --branch` output"""
+    status = {category: [] for category in STATUS_CATEGORIES}
+    branch = {}
+
+    records = output.split(b'\0')
+    index = 0
+    while index < len(records):
+        record = os.fsdecode(records[index])
+        index += 1
+        if not record:
+            continue
+
+        kind = record[0]
+        if kind == '#':
+            key, _, value = record[2:].partition(' ')
+            branch[key] = value
+            continue
+        if kind == '?':
+            status['untracked'].append(record[2:])
+            continue
+        if kind not in '12':
+            # 'u' (unmerged) and '!' (ignored) entries fall in no category
+            continue
+
+        # Ordinary entries have 8 fields before the path, renames and copies 9
+        fields = record.split(' ', 9 if kind == '2' else 8)
+        path = fields[-1]
+        code = fields[1].replace('.', ' ')
+
+        if kind == '2':
+            # The original path follows as its own record
+            index += 1
+            status['renamed'].append(path)
+
+        if code[0] in 'AMDRC':
+            status['staged'].append(path)
+
+        if code[1] == 'M':
+            status['modified'].append(path)
+        elif code[1] == 'D':
+            status['deleted'].append(path)
+        elif code[0] == 'A':
+            status['added'].append(path)
+        elif code[0] == 'R':
+            status['renamed'].append(path)
+
+    return status, branch
+
+
+class GitRepoSession:
+    def __init__(self, directory: str, toplevel: str, git_dir: str, common_dir: str, prefix: str):
+        self.directory = directory
+        self.toplevel = toplevel
+        self.git_dir = git_dir
+        self.common_dir = common_dir
+        # The scanned folder relative to the repository root, '/'-terminated or ''
+        self.prefix = prefix
+        self._cache: Dict[str, Tuple[Hashable, Any]] = {}
+        self._lock = threading.Lock()
+        self._objects: Optional[ObjectStore] = None
+        self._cat_file: Optional[CatFileBatch] = None
+        # (head_key(), walker) for the commit the walk started from
+        self._walker: Optional[Tuple[Hashable, LastCommitWalker]] = None
+        # Why the last index_status() fell back to git, if it did
+        self._index_error: Optional[str] = None
+
+    @classmethod
+    def open(cls, directory) -> Optional['GitRepoSession']:
+        """Session for the repository containing directory, or None outside one"""
+        directory = os.path.abspath(os.fspath(directory))
+        output = run_git(['rev-parse', '--show-toplevel', '--absolute-git-dir',
+                          '--git-common-dir', '--show-prefix'], directory, timeout=5)
+        if output is None:
+            return None
+
+        lines = os.fsdecode(output).split('\n')
+        if len(lines) < 4:
+            return None
+        toplevel, git_dir, common_dir, prefix = lines[:4]
+        common_dir = os.path.normpath(os.path.join(directory, common_dir))
+        return cls(directory, toplevel, git_dir, common_dir, prefix)
+
+    def is_valid(self) -> bool:
+        return os.path.isdir(self.git_dir)
+
+    def state_key(self) -> Tuple:
+        """Stat data of the files any status or branch change rewrites"""
+        return (self._stamp(os.path.join(self.git_dir, 'index')),) + self.head_key()
+
+    def head_key(self) -> Tuple:
+        """Stat data of HEAD and the refs it may point to: changes with every commit or checkout"""
+        head_path = os.path.join(self.git_dir, 'HEAD')
+        paths = [head_path, os.path.join(self.common_dir, 'packed-refs')]
+        try:
+            with open(head_path, 'r', encoding='utf-8') as f:
+                head = f.read().strip()
+            if head.startswith('ref: '):
+                paths.append(os.path.join(self.common_dir, head[5:]))
+        except OSError:
+            pass
+        return tuple(self._stamp(path) for path in paths)
+
+    @staticmethod
+    def _stamp(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return None
+        return file_stat.st_mtime_ns, file_stat.st_size
+
+    def _cached(self, name: str, key: Hashable, compute):
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+        value = compute()
+        if value is not None:
+            with self._lock:
+                self._cache[name] = (key, value)
+        return value
+
+    def _porcelain(self, worktree_stamp: Hashable = None):
+        def compute():
+            # No optional locks: status must not refresh the index it is keyed on
+            output = run_git(['--no-optional-locks', 'status', '--porcelain=v2', '-z', '--branch',
+                              '--untracked-files=all'], self.toplevel, timeout=10)
+            return None if output is None else parse_status_v2(output)
+
+        return self._cached('status', (self.state_key(), worktree_stamp), compute)
+
+    def status(self, worktree_stamp: Hashable = None) -> Dict[str, List[str]]:
+        """Status lists with paths relative to the scanned folder, using os.sep.
+
+        worktree_stamp stands for the state of the working tree (edits do not
+        touch the index); results are recomputed when it changes.
+        """
+        porcelain = self._porcelain(worktree_stamp)
+        if porcelain is None:
+            return {}
+
+        status = {}
+        for category, paths in porcelain[0].items():
+            status[category] = [self.relative_path(path) for path in paths
+                                if path.startswith(self.prefix)]
+        return status
+
+    def index_status(self, rows: Iterable[Tuple[str, int, float]],
+                     worktree_stamp: Hashable = None) -> Optional[Dict[str, List[str]]]:
+        """Status lists like status(), computed in-process; None if git is needed.
+
+        rows are (path relative to the scanned folder, size, mtime) of the
+        scanned files, and only those files can show as modified or untracked.
+        """
+        def compute():
+            try:
+                config = self.git_config()
+                if config is None:
+                    raise GitIndexError("git config could not be read")
+                check_supported(self.toplevel, self.common_dir, config)
+                index_key = self._stamp(os.path.join(self.git_dir, 'index'))
+                index = self._cached('index', index_key, lambda: read_index(self.git_dir))
+                staged = self._cached('staged', (index_key, self.head_key()), lambda: self._staged(index))
+                status = dict(staged)
+                repository_rows = rows
+                if self.prefix or os.sep != '/':
+                    repository_rows = ((self.repository_path(path), size, mtime)
+                                       for path, size, mtime in rows)
+                status.update(worktree_status(index, self.toplevel, self.prefix, repository_rows))
+            except (GitIndexError, GitObjectError, OSError, ValueError, struct.error) as e:
+                # Repositories that always need git (autocrlf on Windows) report it once
+                if str(e) != self._index_error:
+                    self._index_error = str(e)
+                    print(f"Git index status unavailable, using git status: {e}")
+                return None
+
+            status = {category: [self.relative_path(path) for path in status.get(category, [])]
+                      for category in STATUS_CATEGORIES}
+            status['untracked'] = self._drop_ignored(status['untracked'], config)
+            return status
+
+        with instrumentation.span('git.index_status'):
+            return self._cached('index_status', (self.state_key(), worktree_stamp), compute)
+
+    def _staged(self, index) -> Dict[str, List[str]]:
+        if self._objects is None:
+            self._objects = ObjectStore(os.path.join(self.common_dir, 'objects'))
+        return staged_status(index, self._objects, resolve_head(self.git_dir, self.common_dir), self.prefix)
+
+    def git_config(self) -> Optional[Dict[str, str]]:
+        """Effective configuration (system, global and repository files), or None if
+        git fails. Read once per session; only changes to the repository's own
+        config file are picked up."""
+        def compute():
+            output = run_git(['config', '--list', '-z'], self.toplevel, timeout=5)
+            return None if output is None else parse_config_list(output)
+
+        return self._cached('config', self._stamp(os.path.join(self.common_dir, 'config')), compute)
+
+    def _drop_ignored(self, relative_paths: List[str], config: Dict[str, str]) -> List[str]:
+        """Untracked paths git would list: not ignored and not inside another repository"""
+        rules = IgnoreRules.for_root(self.directory, ['.gitignore'])
+        global_excludes = load_ignore_file(user_config_file(config, 'core.excludesfile', 'ignore'))
+        if global_excludes and global_excludes.pattern_count:
+            # Lowest precedence, matched like .git/info/exclude
+            scope = IgnoreRules._ancestor_prefix(self.directory, self.toplevel)
+            rules = IgnoreRules(rules.file_names, rules.layers + (('', scope, global_excludes),))
+
+        # Relative directory -> its rules, or None when it is ignored or a nested repository
+        directories = {'': rules.for_directory(self.directory, '')}
+
+        def rules_for(relative_dir: str) -> Optional[IgnoreRules]:
+            if relative_dir not in directories:
+                parent = rules_for(os.path.dirname(relative_dir))
+                absolute_dir = os.path.join(self.directory, relative_dir)
+                if (parent is None or parent.is_ignored(relative_dir, True)
+                        or os.path.exists(os.path.join(absolute_dir, '.git'))):
+                    directories[relative_dir] = None
+                else:
+                    directories[relative_dir] = parent.for_directory(absolute_dir, relative_dir)
+            return directories[relative_dir]
+
+        kept = []
+        for path in relative_paths:
+            directory_rules = rules_for(os.path.dirname(path))
+            if directory_rules is not None and not directory_rules.is_ignored(path):
+                kept.append(path)
+        return kept
+
+    def relative_path(self, repository_path: str) -> str:
+        """A '/'-separated repository path made relative to the scanned folder"""
+        path = repository_path[len(self.prefix):]
+        return path.replace('/', os.sep) if os.sep != '/' else path
+
+    def branch_info(self) -> Dict[str, str]:
+        """Current branch, origin URL and last commit, as GitIntegration.get_branch_info"""
+        def compute():
+            info = {}
+
+            # Branch headers only depend on HEAD and refs, so any status run
+            # for the current state will do
+            with self._lock:
+                cached = self._cache.get('status')
+            if cached is not None and cached[0][0] == state_key:
+                porcelain = cached[1]
+            else:
+                porcelain = self._porcelain()
+            if porcelain is not None:
+                head = porcelain[1].get('branch.head')
+                if head:
+                    info['branch'] = 'HEAD' if head == '(detached)' else head
+
+            remote = run_git(['config', '--get', 'remote.origin.url'], self.toplevel, timeout=5)
+            if remote is not None:
+                info['remote'] = os.fsdecode(remote).strip()
+
+            log = run_git(['log', '-1', '--pretty=format:%H|%an|%ae|%ad|%s'], self.toplevel, timeout=5)
+            if log is not None:
+                parts = log.decode('utf-8', 'replace').strip().split('|')
+                if len(parts) >= 5:
+                    info['last_commit_hash'] = parts[0]
+                    info['last_commit_author'] = parts[1]
+                    info['last_commit_email'] = parts[2]
+                    info['last_commit_date'] = parts[3]
+                    info['last_commit_message'] = parts[4]
+            return info
+
+        state_key = self.state_key()
+        return self._cached('branch', state_key, compute)
+
+    def _revision_key(self, revision: str) -> Optional[Hashable]:
+        """What a revision's meaning depends on: HEAD's refs for HEAD-relative
+        revisions, the commit it names otherwise; None if it does not resolve"""
+        if revision == 'HEAD' or revision.startswith(('HEAD~', 'HEAD^')):
+            return self.head_key()
+        output = run_git(['rev-parse', '--verify', '--quiet', f'{revision}^{{commit}}'], self.toplevel, timeout=5)
+        return None if output is None else output.strip()
+
+    def _name_status(self, args: List[str]) -> Optional[List[Tuple[str, str, Optional[str]]]]:
+        """Records of a name-status diff or log limited to the scanned folder,
+        with paths relative to it; None if git fails"""
+        # Literal pathspecs: the folder name may contain glob characters
+        command = ['--literal-pathspecs'] + args + ['-z', '--name-status', '-M']
+        if self.prefix:
+            command += ['--', self.prefix]
+
+        stream = NameStatusStream(command, self.toplevel)
+        records = []
+        with instrumentation.span(f'git.{args[0]}'):
+            for status, path, original in stream:
+                if not path.startswith(self.prefix):
+                    continue
+                if original is not None:
+                    original = self.relative_path(original) if original.startswith(self.prefix) else None
+                records.append((status, self.relative_path(path), original))
+        return records if stream.returncode == 0 else None
+
+    def changes_between(self, since: str) -> Optional[List[Tuple[str, str, Optional[str]]]]:
+        """(status, path, original path) of the files that differ between since and HEAD.
+
+        Memoized per (HEAD, since); renames are reported under their new path.
+        """
+        key = self._revision_key(since)
+        if key is None:
+            return None
+        return self._cached(f'diff:{since}', key,
+                            lambda: self._name_status(['diff', since, 'HEAD']))
+
+    def changes_logged(self, since_time: str) -> Optional[List[Tuple[str, str, Optional[str]]]]:
+        """(status, path, original path) for every change in the commits since
+        a date, newest first; memoized per (HEAD, since_time)"""
+        return self._cached(f'log:{since_time}', self.head_key(),
+                            lambda: self._name_status(['log', '--format=', f'--since={since_time}']))
+
+    def repository_path(self, relative_path: str) -> str:
+        """A path relative to the scanned folder made '/'-separated and relative to the root"""
+        if os.sep != '/':
+            relative_path = relative_path.replace(os.sep, '/')
+        return self.prefix + relative_path
+
+    def last_commits(self, relative_paths: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """Newest commit touching each path (relative to the scanned folder).
+
+        All paths are answered from one history walk, which is kept and
+        resumed for later calls until HEAD moves.
+        """
+        head_key = self.head_key()
+        with self._lock:
+            if self._walker is None or self._walker[0] != head_key:
+                if self._walker is not None:
+                    self._walker[1].close()
+                # Only history below the scanned folder is walked
+                walker = LastCommitWalker(self.toplevel, self.prefix or None)
+                self._walker = (head_key, walker)
+            walker = self._walker[1]
+
+        paths = {self.repository_path(path): path for path in relative_paths}
+        found = walker.find(paths)
+        return {paths[path]: dict(info) for path, info in found.items()}
+
+    def object_info(self, relative_paths: Iterable[str], revision: str = 'HEAD') -> Dict[str, Dict[str, Any]]:
+        """Object id, type and size of each path in revision, over one cat-file pipe"""
+        with self._lock:
+            if self._cat_file is None:
+                self._cat_file = CatFileBatch(self.toplevel)
+            cat_file = self._cat_file
+
+        relative_paths = list(relative_paths)
+        specs = [f"{revision}:{self.repository_path(path)}" for path in relative_paths]
+        info = {}
+        for path, answer in zip(relative_paths, cat_file.query(specs)):
+            if answer is not None:
+                info[path] = {'object': answer[0], 'type': answer[1], 'size': answer[2]}
+        return info
+
+    def close(self) -> None:
+        """Stop the session's git processes"""
+        with self._lock:
+            if self._cat_file is not None:
+                self._cat_file.close()
+                self._cat_file = None
+            if self._walker is not None:
+                self._walker[1].close()
+                self._walker = None
@@ -0,0 +1,246 @@
+"""
+Long-running git processes for per-file queries.
+
+Spawning git once per file is what makes per-file helpers slow on big
+selections. CatFileBatch keeps one `git cat-file --batch-check` process and
+answers object lookups over its pipes; LastCommitWalker streams a single
+`git log --name-only` history walk and records the newest commit for every
+path it passes, reading only as far back as the queried paths require.
+NameStatusStream parses `--name-status -z` output of diff and log as git
+writes it.
+"""
+
+import os
+import subprocess
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import instrumentation
+
+# Requests written before reading their answers; keeps both pipes well below
+# their buffer size so neither side blocks
+_BATCH_SIZE = 256
+
+_COMMIT_START = b'\x1e'
+_LOG_FORMAT = '--format=%x1e%H%x1f%an%x1f%ae%x1f%ad%x1f%s'
+
+
+class CatFileBatch:
+    """One `git cat-file --batch-check` process, restarted if it exits"""
+
+    def __init__(self, cwd: str):
+        self.cwd = cwd
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        if self._process is None or self._process.poll() is not None:
+            instrumentation.count('subprocesses')
+            self._process = subprocess.Popen(
+                ['git', 'cat-file', '--batch-check'],
+                cwd=self.cwd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        return self._process
+
+    def query(self, specs: List[str]) -> List[Optional[Tuple[str, str, int]]]:
+        """(object id, type, size) for each object spec such as 'HEAD:path', None if missing"""
+        results: List[Optional[Tuple[str, str, int]]] = []
+
+        with self._lock, instrumentation.span('git.cat-file'):
+            try:
+                process = self._start()
+                for start in range(0, len(specs), _BATCH_SIZE):
+                    batch = specs[start:start + _BATCH_SIZE]
+                    # The protocol is line based, so a newline can't be asked about
+                    asked = [spec for spec in batch if '\n' not in spec]
+                    process.stdin.write(b''.join(os.fsencode(spec) + b'\n' for spec in asked))
+                    process.stdin.flush()
+
+                    answers = {}
+                    for spec in asked:
+                        answers[spec] = self._parse(process.stdout.readline())
+                    results.extend(answers.get(spec) for spec in batch)
+            except (OSError, ValueError) as e:
+                print(f"Git cat-file error: {e}")
+                self._close()
+                results.extend([None] * (len(specs) - len(results)))
+
+        return results
+
+    @staticmethod
+    def _parse(line: bytes) -> Optional[Tuple[str, str, int]]:
+        parts = line.decode('ascii', 'replace').split()
+        # '<oid> <type> <size>', or '<spec> missing' / '<spec> ambiguous'
+        if len(parts) != 3 or not parts[2].isdigit():
+            return None
+        return parts[0], parts[1], int(parts[2])
+
+    def _close(self) -> None:
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=2)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                self._process.kill()
+            self._process = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+
+class LastCommitWalker:
+    """Newest commit touching each path, from one streamed history walk.
+
+    Paths are '/'-separated and relative to the repository root. The walk is
+    resumed, not restarted, when a later query asks about paths further back
+    in history.
+    """
+
+    def __init__(self, cwd: str, pathspec: Optional[str] = None):
+        self.cwd = cwd
+        self.pathspec = pathspec
+        self.found: Dict[str, Dict[str, str]] = {}
+        self._process: Optional[subprocess.Popen] = None
+        self._finished = False
+        self._pending = b''
+        self._commit: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+
+    def find(self, paths: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """Last commit info for each of paths that history has touched"""
+        paths = list(paths)
+
+        with self._lock:
+            wanted = {path for path in paths if path not in self.found}
+            if wanted and not self._finished:
+                with instrumentation.span('git.log'):
+                    self._walk(wanted)
+            return {path: self.found[path] for path in paths if path in self.found}
+
+    def _walk(self, wanted: set) -> None:
+        if self._process is None:
+            # --cc lists the files a merge changed relative to all its parents,
+            # which is when `git log -- path` shows the merge itself
+            command = ['git', 'log', '-z', '--name-only', '--cc', _LOG_FORMAT]
+            if self.pathspec:
+                command += ['--', self.pathspec]
+            instrumentation.count('subprocesses')
+            try:
+                self._process = subprocess.Popen(command, cwd=self.cwd, stdout=subprocess.PIPE,
+                                                 stderr=subprocess.DEVNULL)
+            except OSError as e:
+                print(f"Git log error: {e}")
+                self._finished = True
+                return
+
+        while wanted:
+            chunk = self._process.stdout.read1(65536)
+            if not chunk:
+                self._finish()
+                return
+
+            tokens = (self._pending + chunk).split(b'\0')
+            self._pending = tokens.pop()
+            for token in tokens:
+                self._take(token, wanted)
+
+    def _take(self, token: bytes, wanted: set) -> None:
+        if token.startswith(_COMMIT_START):
+            fields = token[1:].decode('utf-8', 'replace').split('\x1f')
+            if len(fields) >= 5:
+                self._commit = {
+                    'last_commit_hash': fields[0],
+                    'last_author': fields[1],
+                    'last_author_email': fields[2],
+                    'last_modified': fields[3],
+                    'last_commit_message': fields[4],
+                }
+            return
+
+        # The first name after a commit header starts with a newline
+        path = os.fsdecode(token.lstrip(b'\n'))
+        if path and self._commit is not None and path not in self.found:
+            self.found[path] = self._commit
+            wanted.discard(path)
+
+    def _finish(self) -> None:
+        if self._pending:
+            self._take(self._pending, set())
+            self._pending = b''
+        self._finished = True
+        self._close_process()
+
+    def _close_process(self) -> None:
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.stdout.close()
+            self._process.wait()
+            self._process = None
+        self._pending = b''
+        self._commit = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_process()
+
+
+class NameStatusStream:
+    """(status, path, original path) records of a `git ... -z --name-status` command.
+
+    Status is the change letter (A, M, D, R, C, T, ...); the original path
+    is set for renames and copies. Records are yielded while git is still
+    writing. After iteration, returncode is git's exit status, or None if
+    git could not be started.
+    """
+
+    def __init__(self, args: List[str], cwd: str):
+        self.args = args
+        self.cwd = cwd
+        self.returncode: Optional[int] = None
+
+    def __iter__(self) -> Iterator[Tuple[str, str, Optional[str]]]:
+        instrumentation.count('subprocesses')
+        try:
+            process = subprocess.Popen(['git'] + self.args, cwd=self.cwd, stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL)
+        except OSError as e:
+            print(f"Git {self.args[0]} error: {e}")
+            return
+
+        try:
+            pending = b''
+            # Fields of the record being read: status, then one or two paths
+            record: List[bytes] = []
+            while True:
+                chunk = process.stdout.read1(65536)
+                if not chunk:
+                    break
+                tokens = (pending + chunk).split(b'\0')
+                pending = tokens.pop()
+                for token in tokens:
+                    if not record:
+                        # Log output separates commits with an empty token or a newline
+                        token = token.lstrip(b'\n')
+                        if token:
+                            record.append(token)
+                        continue
+
+                    record.append(token)
+                    if len(record) == (3 if record[0][:1] in (b'R', b'C') else 2):
+                        status = record[0][:1].decode('ascii', 'replace')
+                        paths = [os.fsdecode(path) for path in record[1:]]
+                        record = []
+                        if len(paths) == 2:
+                            yield status, paths[1], paths[0]
+                        else:
+                            yield status, paths[0], None
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            self.returncode = process.wait()
@@ -0,0 +1,287 @@
+"""
+Hierarchical ignore rules for the file scanner.
+
+Reads .gitignore-style files (.gitignore, .ignore, .codefuserignore by default)
+from the scanned tree and answers "is this path ignored?" with gitignore
+semantics: deeper files override shallower ones, the last matching pattern in
+a file wins, and a '!' pattern re-includes a path. Each ignore file is
+compiled once into two regexes (one for files, one for directories) so a
+lookup costs one regex match per ignore file in scope, and ignored
+directories are pruned by the scanner instead of being walked.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_IGNORE_FILE_NAMES = ['.gitignore', '.ignore', '.codefuserignore']
+
+# Paths are matched case-insensitively where the file system usually is
+_REGEX_FLAGS = re.IGNORECASE if os.name == 'nt' else 0
+
+
+def _translate_glob(pattern: str) -> str:
+    """Regex for one gitignore glob, matched against a '/'-separated relative path"""
+    parts = []
+    index = 0
+    length = len(pattern)
+
+    while index < length:
+        char = pattern[index]
+
+        if char == '*':
+            if pattern.startswith('**', index):
+                at_start = index == 0 or pattern[index - 1] == '/'
+                at_end = index + 2 == length
+                if at_start and at_end:
+                    parts.append('.*')
+                    index += 2
+                    continue
+                if at_start and pattern.startswith('/', index + 2):
+                    # '**/' matches zero or more leading directories
+                    parts.append('(?:.*/)?')
+                    index += 3
+                    continue
+            # Any other run of stars stays within one path component
+            while index < length and pattern[index] == '*':
+                index += 1
+            parts.append('[^/]*')
+            continue
+
+        if char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            end = index + 1
+            if end < length and pattern[end] in '!^':
+                end += 1
+            if end < length and pattern[end] == ']':
+                end += 1
+            end = pattern.find(']', end)
+            if end < 0:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[index + 1:end].replace('\\', '\\\\')
+                if body[:1] in ('!', '^'):
+                    body = '^' + body[1:]
+                parts.append(f'[{body}]')
+                index = end
+        elif char == '\\' and index + 1 < length:
+            index += 1
+            parts.append(re.escape(pattern[index]))
+        else:
+            parts.append(re.escape(char))
+
+        index += 1
+
+    return ''.join(parts)
+
+
+def _parse_line(line: str) -> Optional[Tuple[str, bool, bool]]:
+    """Return (regex, negated, directory_only) for one ignore file line, or None"""
+    line = line.rstrip('\r\n')
+
+    # Trailing spaces are ignored unless escaped
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+
+    if not line or line.startswith('#'):
+        return None
+
+    negated = line.startswith('!')
+    if negated:
+        line = line[1:]
+    elif line.startswith('\\#') or line.startswith('\\!'):
+        line = line[1:]
+
+    directory_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    # A pattern with a slash anywhere but the end is relative to the ignore file;
+    # without one it matches a name at any depth
+    anchored = '/' in line
+    line = line.lstrip('/')
+    regex = _translate_glob(line)
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+
+    return regex, negated, directory_only
+
+
+class IgnoreFile:
+    """The compiled patterns of one ignore file"""
+
+    def __init__(self, lines: Iterable[str]):
+        rules = [rule for rule in (_parse_line(line) for line in lines) if rule]
+
+        # Alternatives are tried in order, so the last pattern in the file goes
+        # first; m.lastindex then tells which pattern won
+        self._file_match, self._file_negated = self._compile(
+            [rule for rule in reversed(rules) if not rule[2]])
+        self._dir_match, self._dir_negated = self._compile(list(reversed(rules)))
+        self.pattern_count = len(rules)
+
+    @staticmethod
+    def _compile(rules: List[Tuple[str, bool, bool]]):
+        if not rules:
+            return None, []
+        combined = '|'.join(f'({regex})' for regex, _, _ in rules)
+        return re.compile(combined, _REGEX_FLAGS).fullmatch, [negated for _, negated, _ in rules]
+
+    def match(self, relative_path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included by a '!' pattern, None if no pattern matches"""
+        if is_dir:
+            fullmatch, negated = self._dir_match, self._dir_negated
+        else:
+            fullmatch, negated = self._file_match, self._file_negated
+
+        if fullmatch is None:
+            return None
+
+        found = fullmatch(relative_path)
+        if found is None:
+            return None
+        return not negated[found.lastindex - 1]
+
+
+# Compiled ignore files keyed by path, reused while (mtime, size) is unchanged
+_compiled_files: Dict[str, Tuple[int, int, IgnoreFile]] = {}
+_compiled_lock = threading.Lock()
+
+
+def load_ignore_file(path: str) -> Optional[IgnoreFile]:
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+
+    with _compiled_lock:
+        cached = _compiled_files.get(path)
+    if cached and cached[0] == file_stat.st_mtime_ns and cached[1] == file_stat.st_size:
+        return cached[2]
+
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            ignore_file = IgnoreFile(f.read().splitlines())
+    except OSError:
+        return None
+
+    with _compiled_lock:
+        _compiled_files[path] = (file_stat.st_mtime_ns, file_stat.st_size, ignore_file)
+    return ignore_file
+
+
+def _find_repository_root(directory: str) -> Optional[str]:
+    current = os.path.abspath(directory)
+    while True:
+        if os.path.exists(os.path.join(current, '.git')):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+class IgnoreRules:
+    """The ignore files in scope for one directory of a scan.
+
+    Instances are immutable; for_directory() returns a new instance when a
+    subdirectory brings its own ignore files and the same one otherwise, so
+    sibling directories without ignore files share their parent's rules.
+    Paths are relative to the scan root and use os.sep.
+    """
+
+    def __init__(self, file_names: Iterable[str],
+                 layers: Tuple[Tuple[str, str, IgnoreFile], ...] = ()):
+        self.file_names = tuple(file_names)
+        # (prefix to strip, prefix to add, compiled file), deepest first
+        self.layers = layers
+
+    @classmethod
+    def for_root(cls, root: str, file_names: Iterable[str] = None) -> 'IgnoreRules':
+        """Rules in effect above a scan root: .git/info/exclude and the ignore files
+        between the enclosing repository's root and the scan root's parent.
+
+        The scan root's own ignore files are added by for_directory(root, ''),
+        like those of every other scanned directory.
+        """
+        file_names = tuple(file_names if file_names is not None else DEFAULT_IGNORE_FILE_NAMES)
+        root = os.path.abspath(root)
+
+        repository_root = _find_repository_root(root)
+        if repository_root is None:
+            return cls(file_names)
+
+        layers = []
+        exclude_file = load_ignore_file(os.path.join(repository_root, '.git', 'info', 'exclude'))
+        if exclude_file and exclude_file.pattern_count:
+            layers.append(('', cls._ancestor_prefix(root, repository_root), exclude_file))
+
+        # Ignore files above the scan root see the root's path relative to them
+        ancestors = []
+        current = root
+        while current != repository_root:
+            current = os.path.dirname(current)
+            ancestors.append(current)
+
+        for ancestor in reversed(ancestors):
+            prefix = cls._ancestor_prefix(root, ancestor)
+            for name in file_names:
+                ignore_file = load_ignore_file(os.path.join(ancestor, name))
+                if ignore_file and ignore_file.pattern_count:
+                    layers.append(('', prefix, ignore_file))
+
+        return cls(file_names, tuple(reversed(layers)))
+
+    @staticmethod
+    def _ancestor_prefix(root: str, ancestor: str) -> str:
+        if root == ancestor:
+            return ''
+        return os.path.relpath(root, ancestor).replace(os.sep, '/') + '/'
+
+    def for_directory(self, directory: str, relative_dir: str,
+                      entry_names: Optional[Iterable[str]] = None) -> 'IgnoreRules':
+        """Rules for a subdirectory; pass its listing as entry_names to skip stat calls"""
+        if entry_names is not None:
+            entry_names = set(entry_names)
+            present = [name for name in self.file_names if name in entry_names]
+        else:
+            present = self.file_names
+
+        new_layers = []
+        strip = os.path.join(relative_dir, '') if relative_dir else ''
+        # Within one directory, later ignore file names take precedence
+        for name in present:
+            ignore_file = load_ignore_file(os.path.join(directory, name))
+            if ignore_file and ignore_file.pattern_count:
+                new_layers.append((strip, '', ignore_file))
+
+        if not new_layers:
+            return self
+        return IgnoreRules(self.file_names, tuple(reversed(new_layers)) + self.layers)
+
+    def for_path(self, root: str, relative_dir: str) -> 'IgnoreRules':
+        """Rules for any directory of the scan, starting from the for_root() rules"""
+        rules = self.for_directory(root, '')
+        current_rel = ''
+        for part in relative_dir.split(os.sep) if relative_dir else []:
+            current_rel = os.path.join(current_rel, part) if current_rel else part
+            rules = rules.for_directory(os.path.join(root, current_rel), current_rel)
+        return rules
+
+    def is_ignored(self, relative_path: str, is_dir: bool = False) -> bool:
+        if not self.layers:
+            return False
+
+        if os.sep != '/':
+            relative_path = relative_path.replace(os.sep, '/')
+
+        for strip, prefix, ignore_file in self.layers:
+            result = ignore_file.match(prefix + relative_path[len(strip):], is_dir)
+            if result is not None:
+                return result
+        return False
@@ -0,0 +1,147 @@
+"""
+Timing and I/O figures for the scan -> filter -> export pipeline.
+
+Hot paths wrap their work in span('scan') blocks and bump counters with
+count('bytes_read', n). Both are cheap enough to stay on all the time: a
+span costs two perf_counter() calls and a short lock. start_run() clears
+the figures at the start of a run, and report() summarizes them with the
+derived rates (files/s, bytes read, subprocesses started) for the GUI or
+a JSON file.
+
+Span names are dotted ('filter.has_todos', 'git.status', 'format.html');
+counters used by the pipeline:
+
+    files_scanned   rows produced by a scan
+    files_read      file contents read from disk (cache misses, streams)
+    bytes_read      size of those reads
+    cache_hits      reads answered by the shared content cache
+    subprocesses    processes started (git)
+    files_exported  files written to an output document
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator
+
+
+class Instrumentation:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start_run()
+
+    def start_run(self, label: str = '') -> None:
+        """Forget all figures and start timing a new run"""
+        with self._lock:
+            self.label = label
+            self.started_at = datetime.now()
+            self._started = time.perf_counter()
+            # name -> [calls, total seconds, longest call]
+            self._spans: Dict[str, list] = {}
+            self._counters: Dict[str, int] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the enclosed block under name; nested spans are timed separately"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                self._spans[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def count_read(self, size: int, files: int = 1) -> None:
+        """files contents totalling size bytes read from disk"""
+        with self._lock:
+            self._counters['files_read'] = self._counters.get('files_read', 0) + files
+            self._counters['bytes_read'] = self._counters.get('bytes_read', 0) + size
+
+    def report(self) -> Dict[str, Any]:
+        """Figures of the current run with rates derived from them"""
+        with self._lock:
+            wall_time = time.perf_counter() - self._started
+            spans = {name: {'calls': calls, 'total': total, 'max': longest, 'mean': total / calls}
+                     for name, (calls, total, longest) in sorted(self._spans.items())}
+            counters = dict(sorted(self._counters.items()))
+
+        def rate(amount, span_name):
+            seconds = spans.get(span_name, {}).get('total', 0.0)
+            return amount / seconds if seconds else None
+
+        files_scanned = counters.get('files_scanned', 0)
+        bytes_read = counters.get('bytes_read', 0)
+        summary = {
+            'files_scanned': files_scanned,
+            'scan_files_per_second': rate(files_scanned, 'scan'),
+            'files_read': counters.get('files_read', 0),
+            'bytes_read': bytes_read,
+            'read_bytes_per_second': rate(bytes_read, 'read'),
+            'cache_hits': counters.get('cache_hits', 0),
+            'subprocesses': counters.get('subprocesses', 0),
+            'files_exported': counters.get('files_exported', 0),
+        }
+
+        return {
+            'label': self.label,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_time': wall_time,
+            'summary': summary,
+            'spans': spans,
+            'counters': counters,
+        }
+
+    def save_report(self, path) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def format_report(self) -> str:
+        """The report as plain text, slowest spans first"""
+        report = self.report()
+        summary = report['summary']
+        lines = [f"Run: {report['label'] or '-'} ({report['started_at']}, {report['wall_time']:.2f} s)", '']
+
+        for key, value in summary.items():
+            if value is None:
+                value = '-'
+            elif isinstance(value, float):
+                value = f'{value:,.1f}'
+            else:
+                value = f'{value:,}'
+            lines.append(f"{key.replace('_', ' ').capitalize():<24}{value:>16}")
+
+        lines += ['', f"{'Span':<32}{'Calls':>8}{'Total ms':>12}{'Max ms':>10}"]
+        for name, stats in sorted(report['spans'].items(), key=lambda item: -item[1]['total']):
+            lines.append(f"{name:<32}{stats['calls']:>8}{stats['total'] * 1000:>12.1f}{stats['max'] * 1000:>10.1f}")
+        return '\n'.join(lines)
+
+
+# The process-wide recorder the pipeline modules report to
+recorder = Instrumentation()
+
+
+def span(name: str):
+    return recorder.span(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    recorder.count(name, amount)
+
+
+def count_read(size: int, files: int = 1) -> None:
+    recorder.count_read(size, files)
@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, scrolledtext
 from pathlib import Path
 import threading
 from typing import List, Optional, Dict, Any
@@ -18,6 +18,13 @@ from config_manager import ConfigManager
 from localization_manager import LocalizationManager
 from file_scanner import FileScanner, FileScannerProgress
 from output_manager import OutputManager
+from content_cache import ContentCache
+import instrumentation
+from file_table import apply_file_changes
+from file_watcher import (
+    FileWatcher, FileChange,
+    CHANGE_ADDED, CHANGE_MODIFIED, CHANGE_REMOVED, CHANGE_RESCAN
+)
 
 
 class MainWindow:
@@ -26,14 +33,18 @@ class MainWindow:
         self.config_manager = ConfigManager()
         self.localization = LocalizationManager(self.config_manager)
         self.file_scanner = FileScanner(self.config_manager)
-        self.output_manager = OutputManager(self.config_manager)
-        self.template_engine = TemplateEngine(self.config_manager)
+        # One read cache for filters, templates and output, so each file is read once
+        self.content_cache = ContentCache.from_config(self.config_manager)
+        self.output_manager = OutputManager(self.config_manager, self.content_cache)
+        self.template_engine = TemplateEngine(self.config_manager, self.content_cache)
         self.git_integration = GitIntegration(self.config_manager)
-        self.smart_filters = SmartFilters(self.config_manager)
+        self.smart_filters = SmartFilters(self.config_manager, self.content_cache)
         
         self.selected_folder = None
         self.scanned_files = []
         self.is_processing = False
+        self.file_watcher: Optional[FileWatcher] = None
+        self._last_scan_args = None
         
         # Filter tracking
         self.active_filters = {
@@ -136,6 +147,8 @@ class MainWindow:
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label=self.localization.get('menu.help'), menu=help_menu)
+        help_menu.add_command(label=self.localization.get('menu.performance_report'),
+                            command=self._show_performance_report)
         help_menu.add_command(label=self.localization.get('menu.about'), 
                             command=self._show_about)
     
@@ -271,6 +284,17 @@ class MainWindow:
         )
         self.include_ignored_check.pack(side=tk.LEFT, padx=(0, 20))
         
+        # Live watch mode checkbox
+        self.watch_var = tk.BooleanVar(value=self.config_manager.get('watch_settings.enabled', False))
+        self.watch_check = ModernCheckbox(
+            options_frame,
+            text=self.localization.get('settings.watch_mode'),
+            variable=self.watch_var,
+            bg='white'
+        )
+        self.watch_check.pack(side=tk.LEFT, padx=(0, 20))
+        self.watch_var.trace('w', self._on_watch_toggled)
+        
         # Output format selection
         tk.Label(
             options_frame,
@@ -468,8 +492,11 @@ class MainWindow:
             self.selected_folder = Path(folder)
             self.folder_path_var.set(str(self.selected_folder))
             # Clear file tree when new folder is selected
+            self._stop_watcher()
             self.file_tree.populate_tree([])
             self.scanned_files = []
+            if self.content_cache:
+                self.content_cache.clear()
     
     def _scan_files(self):
         if not self.selected_folder:
@@ -497,6 +524,9 @@ class MainWindow:
         self.scan_button.config(state=tk.DISABLED)
         self.start_button.config(state=tk.DISABLED)
         
+        # Each scan starts a new run in the performance report
+        instrumentation.recorder.start_run(str(self.selected_folder))
+        
         # Start scanning in background thread
         thread = threading.Thread(
             target=self._scan_files_thread,
@@ -506,34 +536,30 @@ class MainWindow:
         thread.start()
     
     def _scan_files_thread(self, extensions: List[str], include_ignored: bool):
+        self._stop_watcher()
+        
         try:
             # Update progress
             self.root.after(0, lambda: self.progress_label.start_animation(self.localization.get('progress.scanning')))
             self.root.after(0, lambda: self.progress_bar.set_indeterminate(True))
             
-            # Scan files
-            files = self.file_scanner.scan_directory(
+            # Scan files; the table's rows are shared by the filters, the tree and the output
+            files = self.file_scanner.scan_directory_table(
                 self.selected_folder,
                 extensions,
                 include_ignored,
                 self._update_progress
             )
             
-            # Convert FileInfo objects to dicts for file tree
-            file_dicts = [
-                {
-                    'path': f.path,
-                    'relative_path': f.relative_path,
-                    'size': f.size
-                }
-                for f in files
-            ]
-            
-            self.scanned_files = file_dicts
+            self.scanned_files = files
+            self._last_scan_args = (self.selected_folder, extensions, include_ignored)
             
             # Apply active filters
             self.root.after(0, lambda: self._apply_filters_to_files())
             
+            if self.watch_var.get():
+                self.root.after(0, self._start_watcher)
+            
             # Stop progress
             self.root.after(0, lambda: self.progress_bar.set_indeterminate(False))
             self.root.after(0, lambda: self.progress_bar.set_progress(100))
@@ -552,6 +578,72 @@ class MainWindow:
             self.root.after(0, lambda: self.progress_label.config(text=""))
     
     
+    def _on_watch_toggled(self, *args):
+        if self.watch_var.get():
+            self._start_watcher()
+        else:
+            self._stop_watcher()
+    
+    def _start_watcher(self):
+        """Watch the last scanned folder and patch the file list as it changes"""
+        self._stop_watcher()
+        
+        if not self._last_scan_args or self._last_scan_args[0] != self.selected_folder:
+            return
+        
+        folder, extensions, include_ignored = self._last_scan_args
+        self.file_watcher = FileWatcher(
+            self.config_manager,
+            folder,
+            extensions,
+            include_ignored,
+            lambda changes: self.root.after(0, lambda: self._apply_watch_changes(changes))
+        )
+        self.file_watcher.start()
+    
+    def _stop_watcher(self):
+        if self.file_watcher:
+            self.file_watcher.stop()
+            self.file_watcher = None
+    
+    def _apply_watch_changes(self, changes: List[FileChange]):
+        """Patch scanned_files and the file tree with single-entry changes from the watcher"""
+        if not self.file_watcher:
+            return
+        
+        if any(change.kind == CHANGE_RESCAN for change in changes):
+            if self.selected_folder and not self.selected_folder.is_dir():
+                # The watched folder was deleted; nothing is left to list
+                self._stop_watcher()
+                self.file_tree.populate_tree([])
+                self.scanned_files = []
+                messagebox.showwarning(
+                    self.localization.get('app_title'),
+                    self.localization.get('messages.watched_folder_removed', folder=str(self.selected_folder))
+                )
+                return
+            self._scan_files()
+            return
+        
+        upserted = [
+            {'path': change.path, 'relative_path': change.relative_path,
+             'size': change.size, 'modified_time': change.modified_time}
+            for change in changes if change.kind in (CHANGE_ADDED, CHANGE_MODIFIED)
+        ]
+        removed = [change.relative_path for change in changes
+                   if change.kind == CHANGE_REMOVED and not change.is_dir]
+        removed_dirs = [change.relative_path for change in changes
+                        if change.kind == CHANGE_REMOVED and change.is_dir]
+        
+        self.scanned_files = apply_file_changes(self.scanned_files, upserted, removed, removed_dirs)
+        
+        # Changed files still have to pass the active filters to be shown
+        visible = self._filter_file_list(upserted) if upserted else []
+        visible_paths = {f['relative_path'] for f in visible}
+        hidden = [f['relative_path'] for f in upserted if f['relative_path'] not in visible_paths]
+        
+        self.file_tree.apply_changes(visible, removed + hidden, removed_dirs)
+    
     def _on_file_selection_change(self, selected_count: int):
         # Update UI based on selection
         if selected_count > 0:
@@ -960,15 +1052,22 @@ class MainWindow:
         if not self.scanned_files:
             return
         
-        filtered_files = self.scanned_files.copy()
+        # Update file tree
+        self.file_tree.populate_tree(self._filter_file_list(self.scanned_files))
+    
+    def _filter_file_list(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run the active git and smart filters over a list of files"""
+        # Filters return new lists, so the scanned table itself is never copied
+        filtered_files = files
         
         # Apply Git filter
         if self.selected_folder and self.active_filters['git_filter'] != 'all':
-            filtered_files = self.git_integration.filter_files_by_git_status(
-                filtered_files, 
-                self.selected_folder, 
-                self.active_filters['git_filter']
-            )
+            with instrumentation.span(f"filter.git.{self.active_filters['git_filter']}"):
+                filtered_files = self.git_integration.filter_files_by_git_status(
+                    filtered_files, 
+                    self.selected_folder, 
+                    self.active_filters['git_filter']
+                )
         
         # Apply Smart filters
         if self.active_filters['smart_filters']:
@@ -978,8 +1077,7 @@ class MainWindow:
                 operation='AND'  # Use AND operation for multiple smart filters
             )
         
-        # Update file tree
-        self.file_tree.populate_tree(filtered_files)
+        return filtered_files
     
     def _update_filter_status(self):
         """Update the filter status label"""
@@ -1041,7 +1139,7 @@ class MainWindow:
         try:
             # Update progress
             self.progress_label.start_animation(self.localization.get('progress.generating'))
-            self.progress_bar.set_progress(50)
+            self.progress_bar.set_progress(0)
             
             if not files:
                 self.root.after(0, lambda: messagebox.showinfo(
@@ -1053,7 +1151,7 @@ class MainWindow:
             # Generate output
             self.progress_label.config(text=self.localization.get('progress.generating'))
             self.progress_bar.set_indeterminate(False)
-            self.progress_bar.set_progress(90)
+            self.progress_bar.set_progress(0)
             
             # Create output file
             output_format = self.output_format_var.get()
@@ -1068,7 +1166,8 @@ class MainWindow:
                 output_path,
                 output_format,
                 prompt,
-                file_prompts
+                file_prompts,
+                self._update_output_progress
             )
             
             # Complete
@@ -1090,14 +1189,23 @@ class MainWindow:
             self.is_processing = False
     
     def _update_progress(self, progress: FileScannerProgress):
-        percentage = progress.get_progress_percentage()
-        self.root.after(0, lambda: self.progress_bar.set_progress(percentage))
+        # Single-pass scans without an estimate have no total; keep the bar indeterminate
+        if progress.total_files:
+            percentage = progress.get_progress_percentage()
+            self.root.after(0, lambda: self.progress_bar.set_progress(percentage))
         
         if progress.current_file:
             self.root.after(0, lambda: self.progress_label.config(
                 text=self.localization.get('progress.processing', filename=progress.current_file)
             ))
     
+    def _update_output_progress(self, done: int, total: int, file_path: str):
+        percentage = done / total * 100 if total else 100
+        self.root.after(0, lambda: self.progress_bar.set_progress(percentage))
+        self.root.after(0, lambda: self.progress_label.config(
+            text=self.localization.get('progress.processing', filename=file_path)
+        ))
+    
     def _cancel_process(self):
         if self.is_processing:
             self.file_scanner.stop_scanning()
@@ -1130,6 +1238,60 @@ class MainWindow:
             "Please restart the application for language changes to take effect."
         )
     
+    def _show_performance_report(self):
+        report_window = tk.Toplevel(self.root)
+        report_window.title(self.localization.get('menu.performance_report'))
+        report_window.geometry("640x480")
+        report_window.transient(self.root)
+        
+        main_frame = tk.Frame(report_window, bg='white', padx=20, pady=20)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        report_text = scrolledtext.ScrolledText(main_frame, font=('Consolas', 10), wrap=tk.NONE)
+        report_text.pack(fill=tk.BOTH, expand=True)
+        
+        def refresh():
+            report_text.config(state=tk.NORMAL)
+            report_text.delete('1.0', tk.END)
+            report_text.insert('1.0', instrumentation.recorder.format_report())
+            report_text.config(state=tk.DISABLED)
+        
+        def export():
+            path = filedialog.asksaveasfilename(
+                parent=report_window,
+                defaultextension='.json',
+                filetypes=[('JSON', '*.json')],
+                initialfile='codefuser_report.json'
+            )
+            if path:
+                try:
+                    instrumentation.recorder.save_report(path)
+                except OSError as e:
+                    messagebox.showerror(
+                        self.localization.get('app_title'),
+                        self.localization.get('performance_report.save_failed', error=str(e)),
+                        parent=report_window
+                    )
+        
+        refresh()
+        
+        button_frame = tk.Frame(main_frame, bg='white')
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        for key, command, color in (('close', report_window.destroy, '#757575'),
+                                    ('export_json', export, '#4CAF50'),
+                                    ('refresh', refresh, '#2196F3')):
+            tk.Button(
+                button_frame,
+                text=self.localization.get(f'performance_report.{key}'),
+                command=command,
+                bg=color,
+                fg='white',
+                relief=tk.FLAT,
+                font=('Segoe UI', 10),
+                padx=20
+            ).pack(side=tk.RIGHT, padx=(10, 0))
+    
     def _show_about(self):
         # Create custom about dialog with logo
         about_window = tk.Toplevel(self.root)
@@ -1232,6 +1394,10 @@ Built with Python & Tkinter
     
     def run(self):
         self.root.mainloop()
+        self._stop_watcher()
+        if self.smart_filters.filter_executor:
+            self.smart_filters.filter_executor.shutdown()
+        self.git_integration.close()
 
 
 if __name__ == "__main__":
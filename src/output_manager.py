@@ -1,38 +1,131 @@
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Callable, Union, TextIO
 from abc import ABC, abstractmethod
+from collections import deque
+import codecs
+import errno
+import mmap
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 import datetime
 from dataclasses import dataclass
-from docx import Document
-from docx.shared import Pt, RGBColor
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Preformatted, PageBreak
-from reportlab.lib.enums import TA_LEFT
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 import textwrap
 import html
 import re
 
+from content_cache import ContentCache
+import instrumentation
+
 
 @dataclass
 class OutputFile:
     file_path: str
-    content: str
+    content: Optional[str] = None  # None: read lazily from source_path
     custom_prompt: str = ""  # Dosya için özel prompt
+    source_path: Optional[str] = None
+    encoding: str = 'utf-8'
+    size: int = 0
+    content_cache: Optional[ContentCache] = None
+    
+    def read(self) -> str:
+        """Return the file's content, reading it from disk if it was not given up front"""
+        if self.content is not None:
+            return self.content
+        
+        if self.content_cache:
+            return self.content_cache.read_text(self.source_path, self.encoding)
+        
+        with instrumentation.span('read'):
+            with open(self.source_path, 'r', encoding=self.encoding) as f:
+                text = f.read()
+        instrumentation.count_read(len(text))
+        return text
 
 
 class OutputFormatter(ABC):
+    # True for text formats that also have write_stream(files, output, prompt),
+    # which writes to any open text stream
+    streamable = False
+    
     def __init__(self, config_manager):
         self.config_manager = config_manager
+        # Called as (files_done, total_files, file_path) while contents are written
+        self.progress_callback: Optional[Callable[[int, int, str], None]] = None
+        # Files the last iter_contents run read successfully, i.e. actually written
+        self.files_written = 0
     
     @abstractmethod
     def format_output(self, files: List[OutputFile], output_path: Path, prompt: str = "") -> None:
         pass
     
+    def readable_files(self, files: List[OutputFile]) -> List[OutputFile]:
+        """The files that exist and may be opened, checked with one access() call each
+        so that a header or table of contents can be written before any file is read"""
+        readable = []
+        for file_data in files:
+            if file_data.content is None and not os.access(file_data.source_path, os.R_OK):
+                print(f"Error reading file {file_data.source_path}: file is missing or not readable")
+                continue
+            readable.append(file_data)
+        return readable
+    
+    def iter_contents(self, files: List[OutputFile],
+                      reader: Callable[[OutputFile], Any] = None,
+                      errors: bool = False) -> Iterator[Tuple[OutputFile, Any]]:
+        """Yield (file, content) in the original order, skipping files that cannot be read.
+        
+        Files are read ahead by a small thread pool (output_settings.read_workers),
+        but never more than two per worker, so memory stays bounded by a few
+        files no matter how large the selection is. reader defaults to
+        OutputFile.read. With errors=True a file that fails to read is yielded
+        with the exception as its content instead of being skipped.
+        """
+        reader = reader or OutputFile.read
+        total = len(files)
+        self.files_written = 0
+        
+        for idx, (file_data, future) in enumerate(self._read_ahead(files, reader)):
+            try:
+                content = future.result() if future else reader(file_data)
+            except Exception as e:
+                # Log error but continue with other files
+                print(f"Error reading file {file_data.source_path or file_data.file_path}: {e}")
+                content = e if errors else None
+            
+            if content is not None:
+                if not isinstance(content, Exception):
+                    self.files_written += 1
+                yield file_data, content
+            
+            if self.progress_callback:
+                self.progress_callback(idx + 1, total, file_data.file_path)
+    
+    def _read_ahead(self, files: List[OutputFile], reader: Callable[[OutputFile], Any]):
+        """Yield (file, future) pairs in order; future is None when reading serially"""
+        workers = self.config_manager.get('output_settings.read_workers', 4)
+        
+        if workers <= 1 or len(files) <= 1:
+            for file_data in files:
+                yield file_data, None
+            return
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            remaining = iter(files)
+            
+            for file_data in remaining:
+                pending.append((file_data, executor.submit(reader, file_data)))
+                if len(pending) >= workers * 2:
+                    break
+            
+            while pending:
+                yield pending.popleft()
+                
+                file_data = next(remaining, None)
+                if file_data is not None:
+                    pending.append((file_data, executor.submit(reader, file_data)))
+    
     def get_separator(self) -> str:
         return self.config_manager.get('output_settings.file_separator', '=== FILE: {filepath} ===')
     
@@ -43,45 +136,191 @@ class OutputFormatter(ABC):
         return self.config_manager.get('output_settings.content_placeholder', '[CONTENT]')
 
 
+@dataclass
+class _RawBody:
+    """A file whose bytes can be copied into the output unchanged"""
+    path: str
+    size: int
+
+
+# Encodings whose bytes are left unchanged by a decode/encode round trip of valid text
+_BYTE_COPY_ENCODINGS = ('utf-8', 'ascii')
+_SCAN_CHUNK_SIZE = 1024 * 1024
+
+
+def _is_copyable(data, encoding: str) -> bool:
+    """True if data has no carriage returns and decodes cleanly, checked chunk by chunk
+    without keeping the decoded text"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    
+    try:
+        for offset in range(0, len(data), _SCAN_CHUNK_SIZE):
+            chunk = data[offset:offset + _SCAN_CHUNK_SIZE]
+            # Reading in text mode would translate '\r' and '\r\n'
+            if b'\r' in chunk:
+                return False
+            # Pure ASCII is valid in every supported encoding; only a chunk that is
+            # not, or that continues a multi-byte sequence, has to be decoded
+            if not chunk.isascii() or decoder.getstate()[0]:
+                decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _copy_file_range(source_fd: int, target_fd: int, size: int) -> int:
+    """Copy up to size bytes inside the kernel; returns how many bytes were copied"""
+    copied = 0
+    for copy in (
+        lambda count: os.copy_file_range(source_fd, target_fd, count, copied),
+        lambda count: os.sendfile(target_fd, source_fd, copied, count),
+    ):
+        try:
+            while copied < size:
+                count = copy(size - copied)
+                if count == 0:
+                    return copied
+                copied += count
+            return copied
+        except (AttributeError, OSError) as e:
+            # Not available here, or not for this pair of files; try the next method
+            if isinstance(e, OSError) and e.errno not in (
+                    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF):
+                raise
+    return copied
+
+
 class TextOutputFormatter(OutputFormatter):
+    """Writes files between plain-text separators.
+    
+    When the output would contain a file's bytes unchanged (same ASCII-compatible
+    encoding on both sides, no carriage returns to translate, '\n' line endings),
+    the body is copied with copy_file_range/sendfile instead of being decoded
+    and re-encoded, so only the separators are produced in Python.
+    """
+    
+    streamable = True
+    
     def format_output(self, files: List[OutputFile], output_path: Path, prompt: str = "") -> None:
         encoding = self.config_manager.get('encoding', 'utf-8')
-        
         with open(output_path, 'w', encoding=encoding) as f:
-            # Write header
-            f.write(f"# CodeFuser Output\n")
-            f.write(f"# Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"# Total Files: {len(files)}\n")
-            f.write("\n" + "="*80 + "\n\n")
+            self.write_stream(files, f, prompt)
+    
+    def write_stream(self, files: List[OutputFile], output: TextIO, prompt: str = "") -> None:
+        """Write the output to an open text stream, e.g. sys.stdout.
+        
+        The header is flushed before the first file is read, so a reader at the
+        other end of a pipe sees output right away. Files that cannot be
+        accessed are left out of the count up front; one that still fails to
+        read keeps its separator with a note in place of the content.
+        """
+        files = self.readable_files(files)
+        encoding = getattr(output, 'encoding', None) or self.config_manager.get('encoding', 'utf-8')
+        
+        reader = None
+        if self._can_copy_bytes(encoding) and self._has_file_descriptor(output):
+            reader = lambda file_data: self._read_body(file_data, encoding)
+        
+        # Write header
+        output.write(f"# CodeFuser Output\n")
+        output.write(f"# Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        output.write(f"# Total Files: {len(files)}\n")
+        output.write("\n" + "="*80 + "\n\n")
+        
+        # Write prompt if provided (once at the beginning)
+        if prompt:
+            output.write(f"{self.get_prompt_placeholder()}\n")
+            output.write(f"{prompt}\n")
+            output.write("\n" + "-"*80 + "\n\n")
+        output.flush()
+        
+        for idx, (file_data, content) in enumerate(self.iter_contents(files, reader, errors=True)):
+            # Add spacing between files
+            if idx > 0:
+                output.write("\n\n")
+        
+            # Write file separator
+            separator = self.get_separator().format(filepath=file_data.file_path)
+            output.write(f"\n{separator}\n")
+        
+            # Write custom prompt if available
+            if file_data.custom_prompt:
+                output.write(f"\n[CUSTOM PROMPT FOR THIS FILE]\n")
+                output.write(f"{file_data.custom_prompt}\n")
+                output.write("\n" + "-"*40 + "\n")
+        
+            # Write content
+            output.write(f"\n{self.get_content_placeholder()}\n")
+            if isinstance(content, _RawBody):
+                self._copy_body(content, output)
+            elif isinstance(content, Exception):
+                output.write(f"[Could not read this file: {content}]\n")
+            else:
+                output.write(content)
+    
+    @staticmethod
+    def _has_file_descriptor(output: TextIO) -> bool:
+        """Bodies are copied below the text layer, which needs a real file"""
+        try:
+            output.fileno()
+        except (AttributeError, OSError, ValueError):
+            return False
+        return hasattr(output, 'buffer')
+    
+    def _can_copy_bytes(self, encoding: str) -> bool:
+        if not self.config_manager.get('output_settings.zero_copy', True):
+            return False
+        # Text mode would turn '\n' into os.linesep on the way out
+        if os.linesep != '\n':
+            return False
+        try:
+            return codecs.lookup(encoding).name in _BYTE_COPY_ENCODINGS
+        except LookupError:
+            return False
+    
+    def _read_body(self, file_data: OutputFile, encoding: str) -> Union[str, _RawBody]:
+        """A _RawBody if the file's bytes can go to the output as they are, else its text"""
+        if file_data.content is not None or file_data.encoding != encoding:
+            return file_data.read()
+        
+        # For small files the extra flush and syscalls cost more than decoding
+        min_size = self.config_manager.get('output_settings.zero_copy_min_size', 64 * 1024)
+        if file_data.size < min_size:
+            return file_data.read()
+        
+        with open(file_data.source_path, 'rb') as source:
+            size = os.fstat(source.fileno()).st_size
+            if size == 0:
+                return ''
             
-            # Write prompt if provided (once at the beginning)
-            if prompt:
-                f.write(f"{self.get_prompt_placeholder()}\n")
-                f.write(f"{prompt}\n")
-                f.write("\n" + "-"*80 + "\n\n")
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if _is_copyable(data, codecs.lookup(encoding).name):
+                    instrumentation.count_read(size)
+                    return _RawBody(file_data.source_path, size)
+        
+        return file_data.read()
+    
+    def _copy_body(self, body: _RawBody, output) -> None:
+        output.flush()
+        
+        with open(body.path, 'rb') as source:
+            copied = _copy_file_range(source.fileno(), output.fileno(), body.size)
             
-            for idx, file_data in enumerate(files):
-                # Write file separator
-                separator = self.get_separator().format(filepath=file_data.file_path)
-                f.write(f"\n{separator}\n")
-                
-                # Write custom prompt if available
-                if file_data.custom_prompt:
-                    f.write(f"\n[CUSTOM PROMPT FOR THIS FILE]\n")
-                    f.write(f"{file_data.custom_prompt}\n")
-                    f.write("\n" + "-"*40 + "\n")
-                
-                # Write content
-                f.write(f"\n{self.get_content_placeholder()}\n")
-                f.write(file_data.content)
-                
-                # Add spacing between files
-                if idx < len(files) - 1:
-                    f.write("\n\n")
+            if copied < body.size:
+                # No kernel copy available; copy the rest through a buffer
+                source.seek(copied)
+                shutil.copyfileobj(source, output.buffer)
+                output.buffer.flush()
 
 
 class DocxOutputFormatter(OutputFormatter):
     def format_output(self, files: List[OutputFile], output_path: Path, prompt: str = "") -> None:
+        # Imported here so text and HTML output work without python-docx
+        from docx import Document
+        from docx.shared import Pt, RGBColor
+        from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+        
         doc = Document()
         
         # Add title
@@ -90,7 +329,8 @@ class DocxOutputFormatter(OutputFormatter):
         
         # Add metadata
         doc.add_paragraph(f"Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        doc.add_paragraph(f"Total Files: {len(files)}")
+        # Filled in once the files that could be read are known
+        file_count = doc.add_paragraph()
         doc.add_paragraph("")
         
         # Add prompt if provided (once at the beginning)
@@ -102,7 +342,11 @@ class DocxOutputFormatter(OutputFormatter):
             doc.add_paragraph("-" * 80)
             doc.add_paragraph("")
         
-        for idx, file_data in enumerate(files):
+        for idx, (file_data, content) in enumerate(self.iter_contents(files)):
+            # Add page break between files
+            if idx > 0:
+                doc.add_page_break()
+            
             # Add file header
             file_header = doc.add_heading(file_data.file_path, level=2)
             
@@ -118,7 +362,7 @@ class DocxOutputFormatter(OutputFormatter):
             content_heading = doc.add_heading(self.get_content_placeholder(), level=3)
             
             # Split content into smaller chunks for better handling
-            content_lines = file_data.content.split('\n')
+            content_lines = content.split('\n')
             for line in content_lines:
                 if line.strip():
                     para = doc.add_paragraph(line)
@@ -126,10 +370,8 @@ class DocxOutputFormatter(OutputFormatter):
                     para.style.font.size = Pt(9)
                 else:
                     doc.add_paragraph("")
-            
-            # Add page break between files (except for the last one)
-            if idx < len(files) - 1:
-                doc.add_page_break()
+        
+        file_count.text = f"Total Files: {self.files_written}"
         
         # Save document
         doc.save(str(output_path))
@@ -149,6 +391,13 @@ class PdfOutputFormatter(OutputFormatter):
             pass
     
     def format_output(self, files: List[OutputFile], output_path: Path, prompt: str = "") -> None:
+        # Imported here so text and HTML output work without reportlab
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Preformatted, PageBreak
+        from reportlab.lib.enums import TA_LEFT
+        
         # Create PDF document
         doc = SimpleDocTemplate(
             str(output_path),
@@ -196,9 +445,9 @@ class PdfOutputFormatter(OutputFormatter):
         elements.append(Paragraph("CodeFuser Output", title_style))
         elements.append(Spacer(1, 0.2*inch))
         
-        # Add metadata
-        metadata = f"Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>Total Files: {len(files)}"
-        elements.append(Paragraph(metadata, styles['Normal']))
+        # Add metadata; inserted once the files that could be read are known
+        generated = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        metadata_index = len(elements)
         elements.append(Spacer(1, 0.3*inch))
         
         # Add prompt if provided (once at the beginning)
@@ -210,7 +459,11 @@ class PdfOutputFormatter(OutputFormatter):
             elements.append(Spacer(1, 0.3*inch))
         
         # Process files
-        for idx, file_data in enumerate(files):
+        for idx, (file_data, content) in enumerate(self.iter_contents(files)):
+            # Add page break between files
+            if idx > 0:
+                elements.append(PageBreak())
+            
             # Add file header
             elements.append(Paragraph(file_data.file_path, file_header_style))
             
@@ -219,13 +472,12 @@ class PdfOutputFormatter(OutputFormatter):
             elements.append(Spacer(1, 0.05*inch))
             
             # Add content - wrap long lines
-            wrapped_content = self._wrap_content(file_data.content, 100)
+            wrapped_content = self._wrap_content(content, 100)
             content_pre = Preformatted(wrapped_content, code_style)
             elements.append(content_pre)
-            
-            # Add page break between files (except for the last one)
-            if idx < len(files) - 1:
-                elements.append(PageBreak())
+        
+        metadata = f"Generated: {generated}<br/>Total Files: {self.files_written}"
+        elements.insert(metadata_index, Paragraph(metadata, styles['Normal']))
         
         # Build PDF
         doc.build(elements)
@@ -245,13 +497,27 @@ class PdfOutputFormatter(OutputFormatter):
 
 
 class HtmlOutputFormatter(OutputFormatter):
+    streamable = True
+    
     def format_output(self, files: List[OutputFile], output_path: Path, prompt: str = "") -> None:
-        html_content = self._generate_html(files, prompt)
-        
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            self.write_stream(files, f, prompt)
+    
+    def write_stream(self, files: List[OutputFile], output: TextIO, prompt: str = "") -> None:
+        for part in self._generate_html(files, prompt):
+            if part is None:
+                # Header and table of contents are complete; send them before reading files
+                output.flush()
+            else:
+                output.write(part)
     
-    def _generate_html(self, files: List[OutputFile], prompt: str = "") -> str:
+    def _generate_html(self, files: List[OutputFile], prompt: str = "") -> Iterator[Optional[str]]:
+        """Yield the page piece by piece; file contents are read one file at a time.
+        
+        None is yielded once the header and table of contents are complete. Only
+        files that pass readable_files are listed; one that still fails to read
+        gets a short section saying so, so every TOC link has a target.
+        """
         html_template = """<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -561,11 +827,14 @@ class HtmlOutputFormatter(OutputFormatter):
 </body>
 </html>"""
         
+        files = self.readable_files(files)
+        
         # Generate content parts
         timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        # Statistics
-        total_size = sum(len(f.content.encode('utf-8')) for f in files)
+        # Statistics; sizes come from the scan so no file has to be read up front
+        total_size = sum(f.size if f.content is None else len(f.content.encode('utf-8'))
+                         for f in files)
         languages = set()
         for f in files:
             ext = Path(f.file_path).suffix.lower()
@@ -584,20 +853,46 @@ class HtmlOutputFormatter(OutputFormatter):
             <div class="prompt-content">{html.escape(prompt)}</div>
         </div>"""
         
+        # The template is written in three parts around the TOC and the file sections
+        head, rest = html_template.split('{toc_items}')
+        middle, tail = rest.split('{file_contents}')
+        
+        yield head.format(
+            timestamp=timestamp,
+            file_count=len(files),
+            total_size=size_str,
+            language_count=len(languages),
+            prompt_section=prompt_section
+        )
+        
         # Table of contents
-        toc_items = []
-        for f in files:
+        for idx, f in enumerate(files):
             file_id = self._sanitize_id(f.file_path)
-            toc_items.append(f'<li><a href="#{file_id}">{html.escape(f.file_path)}</a></li>')
+            separator = '\n                ' if idx else ''
+            yield f'{separator}<li><a href="#{file_id}">{html.escape(f.file_path)}</a></li>'
+        
+        yield middle.format()
+        yield None
         
         # File contents
-        file_contents_html = []
-        for f in files:
+        for idx, (f, content) in enumerate(self.iter_contents(files, errors=True)):
             file_id = self._sanitize_id(f.file_path)
             language = self._get_language_from_extension(Path(f.file_path).suffix.lower())
             
-            file_size = len(f.content.encode('utf-8'))
-            line_count = len(f.content.split('\n'))
+            if isinstance(content, Exception):
+                yield ('\n        ' if idx else '') + f"""
+        <div class="file-section" id="{file_id}">
+            <div class="file-header">
+                <div class="file-path">📄 {html.escape(f.file_path)}</div>
+            </div>
+            <div class="file-content">
+                <pre><code class="language-text">⚠️ Could not read this file: {html.escape(str(content))}</code></pre>
+            </div>
+        </div>"""
+                continue
+            
+            file_size = len(content.encode('utf-8'))
+            line_count = content.count('\n') + 1
             
             # Custom prompt section for this file
             custom_prompt_html = ""
@@ -620,21 +915,12 @@ class HtmlOutputFormatter(OutputFormatter):
             </div>
             {custom_prompt_html}
             <div class="file-content">
-                <pre><code class="language-{language or 'text'}">{html.escape(f.content)}</code></pre>
+                <pre><code class="language-{language or 'text'}">{html.escape(content)}</code></pre>
             </div>
         </div>"""
-            file_contents_html.append(file_html)
+            yield ('\n        ' if idx else '') + file_html
         
-        # Fill template
-        return html_template.format(
-            timestamp=timestamp,
-            file_count=len(files),
-            total_size=size_str,
-            language_count=len(languages),
-            prompt_section=prompt_section,
-            toc_items='\n                '.join(toc_items),
-            file_contents='\n        '.join(file_contents_html)
-        )
+        yield tail.format()
     
     def _get_language_from_extension(self, ext: str) -> str:
         """Map file extension to Prism.js language identifier"""
@@ -689,8 +975,9 @@ class HtmlOutputFormatter(OutputFormatter):
 
 
 class OutputManager:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, content_cache: Optional[ContentCache] = None):
         self.config_manager = config_manager
+        self.content_cache = content_cache
         self.formatters = {
             'txt': TextOutputFormatter(config_manager),
             'docx': DocxOutputFormatter(config_manager),
@@ -704,46 +991,80 @@ class OutputManager:
         output_path: Path,
         format: str,
         prompt: str = "",
-        file_prompts: Dict[str, str] = None
+        file_prompts: Dict[str, str] = None,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
     ) -> Path:
         
         if format not in self.formatters:
             raise ValueError(f"Unsupported output format: {format}")
         
-        # Convert file data to OutputFile objects
-        output_files = []
-        encoding = self.config_manager.get('encoding', 'utf-8')
-        file_prompts = file_prompts or {}
-        
-        for file_info in files:
-            try:
-                with open(file_info['path'], 'r', encoding=encoding) as f:
-                    content = f.read()
-                
-                # Get custom prompt for this file
-                file_path = file_info['relative_path']
-                custom_prompt = file_prompts.get(file_path, "")
-                
-                output_file = OutputFile(
-                    file_path=file_path,
-                    content=content,
-                    custom_prompt=custom_prompt
-                )
-                output_files.append(output_file)
-            except Exception as e:
-                # Log error but continue with other files
-                print(f"Error reading file {file_info['path']}: {e}")
-                continue
+        output_files = self._output_files(files, file_prompts)
         
         # Ensure output path has correct extension
         output_path = output_path.with_suffix(f'.{format}')
         
         # Format and save output
         formatter = self.formatters[format]
-        formatter.format_output(output_files, output_path, prompt)
+        formatter.progress_callback = progress_callback
+        try:
+            with instrumentation.span(f'format.{format}'):
+                formatter.format_output(output_files, output_path, prompt)
+        finally:
+            formatter.progress_callback = None
+        instrumentation.count('files_exported', formatter.files_written)
         
         return output_path
     
+    def stream_output(
+        self,
+        files: List[Dict[str, Any]],
+        output: TextIO,
+        format: str,
+        prompt: str = "",
+        file_prompts: Dict[str, str] = None,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
+    ) -> None:
+        """Write the output to an open text stream (e.g. sys.stdout); text formats only"""
+        formatter = self.formatters.get(format)
+        if formatter is None:
+            raise ValueError(f"Unsupported output format: {format}")
+        if not formatter.streamable:
+            raise ValueError(f"Output format {format} can only be written to a file")
+        
+        output_files = self._output_files(files, file_prompts)
+        formatter.progress_callback = progress_callback
+        try:
+            with instrumentation.span(f'format.{format}'):
+                formatter.write_stream(output_files, output, prompt)
+                output.flush()
+        finally:
+            formatter.progress_callback = None
+        instrumentation.count('files_exported', formatter.files_written)
+    
+    def _output_files(self, files: List[Dict[str, Any]],
+                      file_prompts: Optional[Dict[str, str]]) -> List[OutputFile]:
+        """OutputFile objects for the rows; contents are read by the formatter
+        one file at a time, so the selection is never held in memory"""
+        output_files = []
+        encoding = self.config_manager.get('encoding', 'utf-8')
+        file_prompts = file_prompts or {}
+        
+        for file_info in files:
+            # Get custom prompt for this file
+            file_path = file_info['relative_path']
+            custom_prompt = file_prompts.get(file_path, "")
+            
+            output_file = OutputFile(
+                file_path=file_path,
+                custom_prompt=custom_prompt,
+                source_path=str(file_info['path']),
+                encoding=encoding,
+                size=file_info.get('size', 0),
+                content_cache=self.content_cache
+            )
+            output_files.append(output_file)
+        return output_files
+    
     def get_available_formats(self) -> List[str]:
         return list(self.formatters.keys())
     
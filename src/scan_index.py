@@ -0,0 +1,116 @@
+"""
+Persistent scan index for incremental rescans.
+
+For every directory under a scanned folder the index stores the directory's
+mtime, its subdirectories and its file names (with size/mtime once a file has
+been stat'ed). A directory whose mtime has not changed does not need to be
+listed again on the next scan. Only the most recently saved indexes are
+kept, so folders scanned once long ago do not pile up.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+
+from utils import ensure_dir
+
+# Directories modified this close to the time the index is written may change
+# again within the same mtime tick, so they are always re-listed next time
+_RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+
+class ScanIndex:
+    VERSION = 1
+
+    def __init__(self, index_dir: Optional[Path] = None, max_indexes: int = 32):
+        self.index_dir = index_dir or Path.home() / '.codefuser' / 'scan_index'
+        self.max_indexes = max_indexes
+
+    def _index_path(self, root: str, ignored_folders: Iterable[str]) -> Path:
+        # Pruned folders change the shape of the tree, so they are part of the key
+        key = json.dumps([root, sorted(ignored_folders)], ensure_ascii=False)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return self.index_dir / f"{digest}.json"
+
+    def load(self, root: str, ignored_folders: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return {relative_dir: {'mtime': ns, 'dirs': [...], 'files': {name: [size, mtime] or None}}}"""
+        index_path = self._index_path(root, ignored_folders)
+        if not index_path.exists():
+            return {}
+
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+
+        if data.get('version') != self.VERSION or data.get('root') != root:
+            return {}
+
+        return data.get('directories', {})
+
+    def save(self, root: str, ignored_folders: Iterable[str],
+             directories: Dict[str, Dict[str, Any]]) -> None:
+        racy_after = time.time_ns() - _RACY_WINDOW_NS
+        for record in directories.values():
+            if record['mtime'] >= racy_after:
+                record['mtime'] = -1
+
+        index_path = self._index_path(root, ignored_folders)
+        data = {
+            'version': self.VERSION,
+            'root': root,
+            'directories': directories
+        }
+
+        try:
+            ensure_dir(self.index_dir)
+            # Unique temp file: a watcher's polling scanner may save concurrently
+            fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=str(self.index_dir))
+        except OSError as e:
+            print(f"Could not save scan index: {e}")
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            print(f"Could not save scan index: {e}")
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return
+
+        self._prune()
+
+    def _prune(self) -> None:
+        """Delete all but the max_indexes most recently saved indexes"""
+        indexes = []
+        for index_file in self.index_dir.glob("*.json"):
+            try:
+                indexes.append((index_file.stat().st_mtime_ns, index_file))
+            except OSError:
+                pass
+
+        indexes.sort(reverse=True)
+        for _, index_file in indexes[self.max_indexes:]:
+            try:
+                index_file.unlink()
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        """Delete all stored indexes"""
+        if not self.index_dir.exists():
+            return
+
+        for index_file in self.index_dir.glob("*.json"):
+            try:
+                index_file.unlink()
+            except OSError:
+                pass
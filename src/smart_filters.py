@@ -1,15 +1,45 @@
-import re
 from pathlib import Path
-from typing import List, Dict, Any, Callable, Tuple
+from typing import List, Dict, Any, Callable, Iterable, Tuple, Optional
 from datetime import datetime, timedelta
 import os
-import fnmatch
+
+from file_matcher import GlobMatcher
+from content_cache import ContentCache
+from content_matcher import matcher_for, text_matches
+from content_stream import Piece, StreamSettings, file_pieces, text_pieces
+from filter_executor import FilterExecutor
+import instrumentation
+from file_metrics import (CONTENT_PATTERN_GROUPS, MetricsIndex, count_lines,
+                          has_documentation, looks_complex)
+
+# Cost tiers for ordering filter chains: row metadata only, file name only,
+# file contents
+TIER_METADATA = 0
+TIER_NAME = 1
+TIER_CONTENT = 2
+
+_CATEGORY_TIERS = {
+    'Size': TIER_METADATA,
+    'Time': TIER_METADATA,
+    'Type': TIER_NAME,
+    'Language': TIER_NAME,
+    'Lines': TIER_CONTENT,
+    'Content': TIER_CONTENT,
+    'Quality': TIER_CONTENT,
+}
 
 
 class SmartFilters:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, content_cache: Optional[ContentCache] = None):
         self.config_manager = config_manager
+        self.content_cache = content_cache
+        self.stream_settings = StreamSettings.from_config(config_manager)
+        self.filter_executor = FilterExecutor.from_config(config_manager)
+        self.metrics_index = MetricsIndex.from_config(config_manager, self._map_contents)
+        self._glob_matchers: Dict[Tuple[str, ...], GlobMatcher] = {}
         self.filters = self._initialize_filters()
+        self.filter_tiers = {filter_id: _CATEGORY_TIERS[category]
+                             for filter_id, _, category in self.get_available_filters()}
     
     def _initialize_filters(self) -> Dict[str, Callable]:
         """Initialize all available smart filters"""
@@ -33,19 +63,14 @@ class SmartFilters:
             'modified_old': lambda files: self._filter_by_modification_time(files, hours=720, older=True),
             
             # Content-based filters
-            'has_todos': lambda files: self._filter_by_content_pattern(files, [r'TODO', r'FIXME', r'HACK', r'XXX']),
-            'has_comments': lambda files: self._filter_by_content_pattern(files, [r'#.*', r'//.*', r'/\*.*\*/', r'<!--.*-->']),
-            'has_imports': lambda files: self._filter_by_content_pattern(files, [r'import\s+', r'from\s+.*import', r'#include', r'require\(']),
-            'has_functions': lambda files: self._filter_by_content_pattern(files, [r'def\s+\w+', r'function\s+\w+', r'func\s+\w+', r'public\s+\w+\s+\w+']),
-            'has_classes': lambda files: self._filter_by_content_pattern(files, [r'class\s+\w+', r'interface\s+\w+', r'struct\s+\w+']),
-            'has_urls': lambda files: self._filter_by_content_pattern(files, [r'https?://\S+', r'www\.\S+\.\w+']),
-            'has_emails': lambda files: self._filter_by_content_pattern(files, [r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b']),
-            'has_secrets': lambda files: self._filter_by_content_pattern(files, [
-                r'password\s*[=:]\s*["\'][^"\']+["\']',
-                r'api[_-]?key\s*[=:]\s*["\'][^"\']+["\']',
-                r'secret\s*[=:]\s*["\'][^"\']+["\']',
-                r'token\s*[=:]\s*["\'][^"\']+["\']'
-            ]),
+            'has_todos': lambda files: self._filter_by_pattern_group(files, 'has_todos'),
+            'has_comments': lambda files: self._filter_by_pattern_group(files, 'has_comments'),
+            'has_imports': lambda files: self._filter_by_pattern_group(files, 'has_imports'),
+            'has_functions': lambda files: self._filter_by_pattern_group(files, 'has_functions'),
+            'has_classes': lambda files: self._filter_by_pattern_group(files, 'has_classes'),
+            'has_urls': lambda files: self._filter_by_pattern_group(files, 'has_urls'),
+            'has_emails': lambda files: self._filter_by_pattern_group(files, 'has_emails'),
+            'has_secrets': lambda files: self._filter_by_pattern_group(files, 'has_secrets'),
             
             # Name pattern filters
             'test_files': lambda files: self._filter_by_name_pattern(files, ['*test*', '*spec*', 'test_*', '*_test.*']),
@@ -117,11 +142,19 @@ class SmartFilters:
         if filter_id not in self.filters:
             return files
         
+        return self._run_filter(filter_id, self.filters[filter_id], files)
+    
+    def _run_filter(self, name: str, filter_func: Callable,
+                    files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         try:
-            return self.filters[filter_id](files)
+            with instrumentation.span(f'filter.{name}'):
+                return filter_func(files)
         except Exception as e:
-            print(f"Error applying filter {filter_id}: {e}")
+            print(f"Error applying filter {name}: {e}")
             return files
+        finally:
+            if self.metrics_index:
+                self.metrics_index.save()
     
     def apply_multiple_filters(self, files: List[Dict[str, Any]], 
                              filter_ids: List[str], 
@@ -130,22 +163,60 @@ class SmartFilters:
         if not filter_ids:
             return files
         
+        steps = self._plan_filters(filter_ids, operation)
+        
         if operation == 'AND':
             result = files
-            for filter_id in filter_ids:
-                result = self.apply_filter(result, filter_id)
+            for name, filter_func in steps:
+                if not result:
+                    break
+                result = self._run_filter(name, filter_func, result)
             return result
         
         elif operation == 'OR':
+            # Files matched by a cheaper filter are not handed to the later ones
             all_results = set()
-            for filter_id in filter_ids:
-                filtered = self.apply_filter(files, filter_id)
+            remaining = files
+            for name, filter_func in steps:
+                if not remaining:
+                    break
+                filtered = self._run_filter(name, filter_func, remaining)
                 all_results.update(f['relative_path'] for f in filtered)
+                remaining = [f for f in remaining if f['relative_path'] not in all_results]
             
             return [f for f in files if f['relative_path'] in all_results]
         
         return files
     
+    def _plan_filters(self, filter_ids: List[str], operation: str) -> List[Tuple[str, Callable]]:
+        """(name, filter function) steps for a filter chain, cheapest tier first.
+        
+        AND and OR give the same result in any order, so metadata filters run
+        before name filters and both before anything that reads files.
+        """
+        # Pattern category filters are evaluated together, one read per file
+        groups = [fid for fid in filter_ids if fid in CONTENT_PATTERN_GROUPS]
+        
+        def grouped_filter(group_files):
+            return self._filter_by_pattern_groups(group_files, groups, operation)
+        
+        steps = []
+        for filter_id in filter_ids:
+            if filter_id in CONTENT_PATTERN_GROUPS:
+                continue
+            if filter_id in self.filters:
+                tier = self.filter_tiers.get(filter_id, TIER_CONTENT)
+                steps.append((tier, filter_id, self.filters[filter_id]))
+            else:
+                # Unknown filters pass every file, as apply_filter does
+                steps.append((TIER_METADATA, filter_id, lambda files: files))
+        
+        if groups:
+            steps.append((TIER_CONTENT, ', '.join(groups), grouped_filter))
+        
+        steps.sort(key=lambda step: step[0])
+        return [(name, filter_func) for _, name, filter_func in steps]
+    
     def create_custom_filter(self, name: str, 
                            size_range: Tuple[int, int] = None,
                            line_range: Tuple[int, int] = None,
@@ -157,29 +228,73 @@ class SmartFilters:
         def custom_filter(files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             result = files
             
+            # Cheap checks first, so fewer files are read for the content checks
             if size_range:
                 result = self._filter_by_size(result, size_range[0], size_range[1])
             
-            if line_range:
-                result = self._filter_by_lines(result, line_range[0], line_range[1])
-            
             if extensions:
                 result = self._filter_by_extension(result, extensions)
             
-            if content_patterns:
-                result = self._filter_by_content_pattern(result, content_patterns)
-            
             if name_patterns:
                 result = self._filter_by_name_pattern(result, name_patterns)
             
+            if line_range:
+                result = self._filter_by_lines(result, line_range[0], line_range[1])
+            
+            if content_patterns:
+                result = self._filter_by_content_pattern(result, content_patterns)
+            
             return result
         
         filter_id = f"custom_{name.lower().replace(' ', '_')}"
         self.filters[filter_id] = custom_filter
+        if line_range or content_patterns:
+            self.filter_tiers[filter_id] = TIER_CONTENT
+        elif extensions or name_patterns:
+            self.filter_tiers[filter_id] = TIER_NAME
+        else:
+            self.filter_tiers[filter_id] = TIER_METADATA
         return filter_id
     
     # Filter implementation methods
     
+    def _read_content(self, file_info: Dict[str, Any]) -> str:
+        """File text for content filters, through the shared cache when there is one"""
+        if self.content_cache:
+            return self.content_cache.read_text(file_info['path'], 'utf-8', errors='ignore')
+        
+        with instrumentation.span('read'):
+            with open(file_info['path'], 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+        instrumentation.count_read(len(text))
+        return text
+    
+    def _content_pieces(self, file_info: Dict[str, Any]) -> Iterable[Piece]:
+        """A file's text as content_stream pieces: big files are streamed from
+        disk, smaller ones read whole through the cache"""
+        if self.stream_settings.streams(file_info.get('size')):
+            return file_pieces(os.fspath(file_info['path']), self.stream_settings.chunk_size,
+                               self.stream_settings.overlap)
+        return text_pieces(self._read_content(file_info))
+    
+    def _map_contents(self, func: Callable, files: List[Dict[str, Any]], *args) -> List[Any]:
+        """func(pieces, *args) for every file in order, None where the file can't be read.
+
+        Large lists go to the process pool when one is configured; func must
+        then be a module-level function.
+        """
+        if self.filter_executor and self.filter_executor.accepts(len(files)):
+            paths = [(os.fspath(file_info['path']), file_info.get('size')) for file_info in files]
+            return self.filter_executor.map_files(func, paths, self.stream_settings, *args)
+        
+        results = []
+        for file_info in files:
+            try:
+                results.append(func(self._content_pieces(file_info), *args))
+            except Exception:
+                results.append(None)
+        return results
+    
     def _filter_by_size(self, files: List[Dict[str, Any]], 
                        min_size: int = 0, max_size: int = float('inf')) -> List[Dict[str, Any]]:
         """Filter files by size in bytes"""
@@ -193,17 +308,13 @@ class SmartFilters:
     def _filter_by_lines(self, files: List[Dict[str, Any]], 
                         min_lines: int = 0, max_lines: int = float('inf')) -> List[Dict[str, Any]]:
         """Filter files by line count"""
-        result = []
-        for file_info in files:
-            try:
-                with open(file_info['path'], 'r', encoding='utf-8', errors='ignore') as f:
-                    line_count = sum(1 for _ in f)
-                
-                if min_lines <= line_count <= max_lines:
-                    result.append(file_info)
-            except Exception:
-                continue
-        return result
+        if self.metrics_index:
+            return self._filter_by_metrics(
+                files, lambda metrics: min_lines <= metrics.line_count <= max_lines)
+        
+        line_counts = self._map_contents(count_lines, files)
+        return [file_info for file_info, line_count in zip(files, line_counts)
+                if line_count is not None and min_lines <= line_count <= max_lines]
     
     def _filter_by_modification_time(self, files: List[Dict[str, Any]], 
                                    hours: int, older: bool = False) -> List[Dict[str, Any]]:
@@ -213,8 +324,11 @@ class SmartFilters:
         
         for file_info in files:
             try:
-                file_path = Path(file_info['path'])
-                mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
+                # File table rows carry the mtime from the scan; plain dicts need a stat
+                timestamp = file_info.get('modified_time')
+                if timestamp is None:
+                    timestamp = Path(file_info['path']).stat().st_mtime
+                mod_time = datetime.fromtimestamp(timestamp)
                 
                 if older:
                     if mod_time < threshold:
@@ -230,38 +344,49 @@ class SmartFilters:
     def _filter_by_content_pattern(self, files: List[Dict[str, Any]], 
                                  patterns: List[str]) -> List[Dict[str, Any]]:
         """Filter files by content patterns (regex)"""
-        compiled_patterns = [re.compile(pattern, re.IGNORECASE | re.MULTILINE) 
-                           for pattern in patterns]
-        result = []
-        
-        for file_info in files:
-            try:
-                with open(file_info['path'], 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                for pattern in compiled_patterns:
-                    if pattern.search(content):
-                        result.append(file_info)
-                        break
-            except Exception:
-                continue
+        return self._filter_by_matcher(files, {'patterns': patterns}, 'OR')
+    
+    def _filter_by_matcher(self, files: List[Dict[str, Any]],
+                           groups: Dict[str, List[str]], operation: str) -> List[Dict[str, Any]]:
+        """Filter files on all ('AND') or any ('OR') of several pattern groups, one read per file"""
+        key = tuple((name, tuple(patterns)) for name, patterns in groups.items())
+        # Compiled here first, so a bad pattern fails the filter instead of every file
+        matcher_for(key)
         
-        return result
+        matched = self._map_contents(text_matches, files, key, operation)
+        return [file_info for file_info, hit in zip(files, matched) if hit]
+    
+    def _filter_by_pattern_group(self, files: List[Dict[str, Any]], group: str) -> List[Dict[str, Any]]:
+        """Filter files by one of the built-in pattern categories"""
+        return self._filter_by_pattern_groups(files, [group], 'AND')
+    
+    def _filter_by_pattern_groups(self, files: List[Dict[str, Any]], groups: List[str],
+                                  operation: str) -> List[Dict[str, Any]]:
+        """Filter files by all ('AND') or any ('OR') of the given pattern categories"""
+        if self.metrics_index:
+            test = all if operation == 'AND' else any
+            return self._filter_by_metrics(
+                files, lambda metrics: test(metrics.hits(group) for group in groups))
+        return self._filter_by_matcher(
+            files, {group: CONTENT_PATTERN_GROUPS[group] for group in groups}, operation)
+    
+    def _filter_by_metrics(self, files: List[Dict[str, Any]],
+                           predicate: Callable) -> List[Dict[str, Any]]:
+        """Filter files on their indexed metrics; unreadable files never match"""
+        all_metrics = self.metrics_index.get_many(files)
+        return [file_info for file_info, metrics in zip(files, all_metrics)
+                if metrics is not None and predicate(metrics)]
     
     def _filter_by_name_pattern(self, files: List[Dict[str, Any]], 
                               patterns: List[str]) -> List[Dict[str, Any]]:
         """Filter files by filename patterns (glob)"""
-        result = []
-        
-        for file_info in files:
-            filename = Path(file_info['relative_path']).name.lower()
-            
-            for pattern in patterns:
-                if fnmatch.fnmatch(filename, pattern.lower()):
-                    result.append(file_info)
-                    break
+        key = tuple(patterns)
+        matcher = self._glob_matchers.get(key)
+        if matcher is None:
+            matcher = self._glob_matchers[key] = GlobMatcher(patterns)
         
-        return result
+        return [file_info for file_info in files 
+                if matcher.matches(os.path.basename(file_info['relative_path']))]
     
     def _filter_by_extension(self, files: List[Dict[str, Any]], 
                            extensions: List[str]) -> List[Dict[str, Any]]:
@@ -278,79 +403,20 @@ class SmartFilters:
     
     def _filter_by_potential_issues(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter files that might contain code issues"""
-        issue_patterns = [
-            r'console\.log\(',  # Debug statements
-            r'print\s*\(',      # Debug prints
-            r'debugger;',       # Debugger statements
-            r'alert\s*\(',      # Alert statements
-            r'eval\s*\(',       # Eval usage
-            r'document\.write\(', # Dangerous DOM manipulation
-            r'innerHTML\s*=',   # Potential XSS
-            r'exec\s*\(',       # Exec usage
-            r'system\s*\(',     # System calls
-        ]
-        
-        return self._filter_by_content_pattern(files, issue_patterns)
+        return self._filter_by_pattern_group(files, 'potential_issues')
     
     def _filter_by_missing_documentation(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter files that appear to lack documentation"""
-        result = []
+        if self.metrics_index:
+            return self._filter_by_metrics(files, lambda metrics: not metrics.has_docs)
         
-        for file_info in files:
-            try:
-                with open(file_info['path'], 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                # Check for various documentation patterns
-                has_docs = False
-                
-                # Check for docstrings, comments, etc.
-                doc_patterns = [
-                    r'""".*?"""',       # Python docstrings
-                    r"'''.*?'''",       # Python docstrings
-                    r'/\*\*.*?\*/',     # JSDoc comments
-                    r'#.*',             # Hash comments
-                    r'//.*',            # Line comments
-                    r'<!--.*?-->',      # HTML comments
-                ]
-                
-                for pattern in doc_patterns:
-                    if re.search(pattern, content, re.DOTALL):
-                        has_docs = True
-                        break
-                
-                if not has_docs:
-                    result.append(file_info)
-                    
-            except Exception:
-                continue
-        
-        return result
+        documented = self._map_contents(has_documentation, files)
+        return [file_info for file_info, has_docs in zip(files, documented) if has_docs is False]
     
     def _filter_by_complexity(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter files that appear to be complex (heuristic-based)"""
-        result = []
-        
-        for file_info in files:
-            try:
-                with open(file_info['path'], 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                # Simple complexity metrics
-                line_count = len(content.split('\n'))
-                
-                # Count nesting levels (rough estimate)
-                nesting_patterns = [r'\{', r'\(', r'\[', r'if\s', r'for\s', r'while\s', r'def\s', r'class\s']
-                complexity_score = 0
-                
-                for pattern in nesting_patterns:
-                    complexity_score += len(re.findall(pattern, content, re.IGNORECASE))
-                
-                # Consider file complex if it has high line count or complexity score
-                if line_count > 200 or complexity_score > 50:
-                    result.append(file_info)
-                    
-            except Exception:
-                continue
+        if self.metrics_index:
+            return self._filter_by_metrics(files, lambda metrics: metrics.is_complex)
         
-        return result
\ No newline at end of file
+        complex_flags = self._map_contents(looks_complex, files)
+        return [file_info for file_info, is_complex in zip(files, complex_flags) if is_complex]
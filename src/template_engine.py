@@ -6,11 +6,14 @@ from datetime import datetime
 import os
 
 from utils import get_template_path, ensure_dir
+from content_cache import ContentCache
+import instrumentation
 
 
 class TemplateEngine:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, content_cache: Optional[ContentCache] = None):
         self.config_manager = config_manager
+        self.content_cache = content_cache
         # Create user templates directory
         self.custom_templates_dir = ensure_dir(Path.home() / '.codefuser' / 'templates')
         
@@ -214,11 +217,12 @@ Please follow the coding standards outlined in this documentation.""",
         template_data = templates[template_id]
         template_content = template_data['template']
         
-        # Generate variables
-        variables = self._generate_variables(files, custom_variables or {})
-        
-        # Replace variables in template
-        result = self._replace_variables(template_content, variables)
+        with instrumentation.span('template'):
+            # Generate variables
+            variables = self._generate_variables(files, custom_variables or {})
+            
+            # Replace variables in template
+            result = self._replace_variables(template_content, variables)
         
         return result
     
@@ -304,6 +308,16 @@ Please follow the coding standards outlined in this documentation.""",
         
         return "\n".join(structure)
     
+    def _read_content(self, file_info: Dict[str, Any]) -> str:
+        if self.content_cache:
+            return self.content_cache.read_text(file_info['path'], 'utf-8')
+        
+        with instrumentation.span('read'):
+            with open(file_info['path'], 'r', encoding='utf-8') as f:
+                text = f.read()
+        instrumentation.count_read(len(text))
+        return text
+    
     def _generate_file_contents(self, files: List[Dict[str, Any]]) -> str:
         """Generate formatted file contents"""
         contents = []
@@ -312,8 +326,7 @@ Please follow the coding standards outlined in this documentation.""",
             file_path = file_info['relative_path']
             
             try:
-                with open(file_info['path'], 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = self._read_content(file_info)
                 
                 contents.append(f"## 📄 {file_path}")
                 contents.append(f"```{self._get_language_for_syntax(file_path)}")
@@ -356,19 +369,18 @@ Please follow the coding standards outlined in this documentation.""",
             if filename in ['package.json', 'requirements.txt', 'composer.json', 
                           'pom.xml', 'cargo.toml', 'go.mod']:
                 try:
-                    with open(file_info['path'], 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        dependencies.add(f"📄 {filename}")
-                        
-                        # Extract some dependency info
-                        if filename == 'package.json':
-                            try:
-                                package_data = json.loads(content)
-                                if 'dependencies' in package_data:
-                                    for dep in list(package_data['dependencies'].keys())[:5]:
-                                        dependencies.add(f"  - {dep}")
-                            except:
-                                pass
+                    content = self._read_content(file_info)
+                    dependencies.add(f"📄 {filename}")
+                    
+                    # Extract some dependency info
+                    if filename == 'package.json':
+                        try:
+                            package_data = json.loads(content)
+                            if 'dependencies' in package_data:
+                                for dep in list(package_data['dependencies'].keys())[:5]:
+                                    dependencies.add(f"  - {dep}")
+                        except:
+                            pass
                         
                 except Exception:
                     continue
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / 'src'))
+sys.path.insert(0, str(REPO_ROOT / 'benchmarks'))
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """ConfigManager with default settings and a scratch ~/.codefuser"""
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path / 'home'))
+    from config_manager import ConfigManager
+    return ConfigManager()
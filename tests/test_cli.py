@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import cli
+
+
+@pytest.fixture
+def project(config, tmp_path):
+    root = tmp_path / 'project'
+    (root / 'pkg').mkdir(parents=True)
+    (root / 'main.py').write_text('print("main")\n', encoding='utf-8')
+    (root / 'pkg' / 'util.py').write_text('# TODO: tidy up\n', encoding='utf-8')
+    (root / 'README.md').write_text('# Readme\n', encoding='utf-8')
+    return root
+
+
+def test_text_to_stdout(project, capsys):
+    assert cli.main([str(project), '-e', '.py,.md', '--prompt', 'Review this']) == 0
+
+    captured = capsys.readouterr()
+    assert '# Total Files: 3\n' in captured.out
+    assert 'Review this' in captured.out
+    assert 'print("main")\n' in captured.out and '# TODO: tidy up\n' in captured.out
+    assert '3 files scanned' in captured.err
+    assert 'files scanned' not in captured.out
+
+
+def test_html_to_stdout(project, capsys):
+    assert cli.main([str(project), '-e', '.py', '--format', 'html', '-q']) == 0
+
+    captured = capsys.readouterr()
+    assert captured.out.lstrip().startswith('<!DOCTYPE html>')
+    assert captured.out.rstrip().endswith('</html>')
+    assert captured.out.count('<div class="file-section"') == 2
+    assert captured.err == ''
+
+
+def test_output_file_format_from_suffix(project, tmp_path, capsys):
+    output = tmp_path / 'out.html'
+    assert cli.main([str(project), '-e', '.py', '-o', str(output)]) == 0
+
+    captured = capsys.readouterr()
+    assert captured.out == ''
+    assert 'Output saved to' in captured.err
+    assert output.read_text(encoding='utf-8').rstrip().endswith('</html>')
+
+
+def test_list_files_after_filter(project, capsys):
+    assert cli.main([str(project), '-e', '.py,.md', '--list-files', '-q']) == 0
+    assert capsys.readouterr().out.splitlines() == ['README.md', 'main.py', os.path.join('pkg', 'util.py')]
+
+    assert cli.main([str(project), '-e', '.py', '-f', 'has_todos', '--list-files', '-q']) == 0
+    assert capsys.readouterr().out.splitlines() == [os.path.join('pkg', 'util.py')]
+
+
+@pytest.mark.parametrize('args, message', [
+    (['-f', 'no_such_filter'], 'Unknown filter: no_such_filter'),
+    (['--format', 'docx'], 'docx output needs a file'),
+    (['-p', 'No Such Type'], 'Unknown project type'),
+])
+def test_usage_errors_exit_with_2(project, capsys, args, message):
+    assert cli.main([str(project), '-e', '.py'] + args) == 2
+
+    captured = capsys.readouterr()
+    assert message in captured.err
+    assert captured.out == ''
+
+
+def test_pipeline_messages_go_to_stderr(project, capsys):
+    (project / 'pkg' / 'broken.py').write_bytes(b'\xff\xfe broken\n')
+
+    assert cli.main([str(project), '-e', '.py']) == 0
+
+    captured = capsys.readouterr()
+    # output_manager print()s the read error; it must not end up in the output
+    assert 'Error reading file' in captured.err
+    assert 'Error reading file' not in captured.out
+    assert captured.out.count('[Could not read this file: ') == 1
@@ -0,0 +1,50 @@
+import re
+
+import pytest
+
+from content_matcher import ContentMatcher, required_literal
+from content_stream import text_pieces
+
+
+@pytest.mark.parametrize('pattern, literal', [
+    (r'TODO\s+fix', 'TODO'),
+    (r'a\.b', 'a.b'),
+    (r'import\s+os', 'import'),
+    (r'foo|bar', ''),
+    (r'(a)\1xyz', ''),
+    (r'\x41BC', 'BC'),
+    (r'\u0041BC', 'BC'),
+    (r'\U00000041BC', 'BC'),
+    (r'\N{LATIN CAPITAL LETTER A}BC', 'BC'),
+    (r'\012abc', 'abc'),
+    (r'\101bc', 'bc'),
+    (r'\x41*hello', 'hello'),
+])
+def test_required_literal(pattern, literal):
+    assert required_literal(pattern) == literal
+
+
+@pytest.mark.parametrize('pattern', [
+    r'\x41BC', r'\u0041BC', r'\N{LATIN CAPITAL LETTER A}BC', r'\101BC', r'A\x42C', r'[\x41]BC',
+])
+def test_literal_is_contained_in_every_match(pattern):
+    text = 'xx ABC yy'
+    match = re.search(pattern, text)
+    assert match is not None
+    assert required_literal(pattern) in match.group(0)
+
+    matcher = ContentMatcher({'custom': [pattern]}, flags=0)
+    assert matcher.matches(text_pieces(text))
+    assert ContentMatcher({'custom': [pattern]}).matches(text_pieces(text.lower()))
+
+
+def test_custom_pattern_filter_keeps_escaped_matches(config, tmp_path):
+    from smart_filters import SmartFilters
+
+    (tmp_path / 'a.txt').write_text('ABC\n', encoding='utf-8')
+    (tmp_path / 'b.txt').write_text('nothing\n', encoding='utf-8')
+    files = [{'path': tmp_path / name, 'relative_path': name, 'size': 4} for name in ('a.txt', 'b.txt')]
+
+    smart_filters = SmartFilters(config)
+    filter_id = smart_filters.create_custom_filter('escaped', content_patterns=[r'\x41BC'])
+    assert [f['relative_path'] for f in smart_filters.apply_filter(files, filter_id)] == ['a.txt']
@@ -0,0 +1,146 @@
+import errno
+import os
+from pathlib import Path
+
+import pytest
+
+import file_metrics
+from content_stream import text_pieces
+from file_metrics import MetricsIndex
+from file_scanner import FileScanner
+from smart_filters import SmartFilters
+
+
+class Reader:
+    """map_contents for MetricsIndex that records which files it had to read"""
+
+    def __init__(self):
+        self.read = []
+
+    def __call__(self, func, files):
+        results = []
+        for file_info in files:
+            self.read.append(Path(file_info['path']).name)
+            try:
+                results.append(func(text_pieces(Path(file_info['path']).read_text(encoding='utf-8'))))
+            except (OSError, UnicodeDecodeError):
+                results.append(None)
+        return results
+
+
+def _row(path):
+    # Like a scanned row: size and mtime as they were at scan time
+    file_stat = path.stat()
+    return {'path': path, 'relative_path': path.name, 'size': file_stat.st_size,
+            'modified_time': file_stat.st_mtime}
+
+
+def _touch_later(path, text):
+    """Rewrite path with a newer mtime, even on file systems with coarse timestamps"""
+    before = path.stat().st_mtime_ns
+    path.write_text(text, encoding='utf-8')
+    os.utime(path, ns=(before + 10 ** 9, before + 10 ** 9))
+
+
+@pytest.fixture
+def sources(tmp_path):
+    root = tmp_path / 'src'
+    root.mkdir()
+    for name, text in [('a.py', 'import os\n'), ('b.py', '# TODO: fix\n'), ('c.py', 'x = 1\n')]:
+        (root / name).write_text(text, encoding='utf-8')
+    return root
+
+
+def test_hit_miss_and_persistence(tmp_path, sources):
+    reader = Reader()
+    index = MetricsIndex(reader, tmp_path / 'index.json')
+    rows = [_row(sources / 'a.py'), _row(sources / 'b.py')]
+
+    first = index.get_many(rows)
+    assert reader.read == ['a.py', 'b.py']
+    assert first[0].hits('has_imports') and not first[0].hits('has_todos')
+    assert first[1].hits('has_todos') and first[1].line_count == 1
+
+    assert index.get_many(rows) == first
+    assert reader.read == ['a.py', 'b.py']
+
+    index.save()
+    reloaded = Reader()
+    assert MetricsIndex(reloaded, tmp_path / 'index.json').get_many(rows) == first
+    assert reloaded.read == []
+
+
+def test_edited_file_is_a_miss_even_with_stale_row(tmp_path, sources):
+    reader = Reader()
+    index = MetricsIndex(reader, tmp_path / 'index.json')
+    row = _row(sources / 'c.py')
+    assert not index.get(row).hits('has_todos')
+
+    # Same size and the row still carries the scan-time values
+    _touch_later(sources / 'c.py', 'x = 2\n')
+    assert index.get(row) is not None
+    assert reader.read == ['c.py', 'c.py']
+
+    _touch_later(sources / 'c.py', 'x = 1  # TODO\n')
+    assert index.get(row).hits('has_todos')
+
+
+def test_signature_change_discards_stored_metrics(tmp_path, sources):
+    index = MetricsIndex(Reader(), tmp_path / 'index.json')
+    index.get(_row(sources / 'a.py'))
+    index.save()
+
+    reader = Reader()
+    changed = MetricsIndex(reader, tmp_path / 'index.json')
+    changed.signature = 'other patterns'
+    changed.get(_row(sources / 'a.py'))
+    assert reader.read == ['a.py']
+
+
+def test_unreadable_files(tmp_path, sources):
+    reader = Reader()
+    index = MetricsIndex(reader, tmp_path / 'index.json')
+    (sources / 'bad.py').write_bytes(b'\xff\xfe\n')
+    missing = {'path': sources / 'missing.py', 'relative_path': 'missing.py', 'size': 3}
+
+    assert index.get_many([missing, _row(sources / 'bad.py')]) == [None, None]
+    # Nothing was stored for the file that failed, so it is read again
+    index.get(_row(sources / 'bad.py'))
+    assert reader.read == ['bad.py', 'bad.py']
+
+
+def test_max_entries_keeps_most_recent(tmp_path, sources):
+    index = MetricsIndex(Reader(), tmp_path / 'index.json', max_entries=2)
+    for name in ['a.py', 'b.py', 'c.py']:
+        index.get(_row(sources / name))
+    index.save()
+
+    reader = Reader()
+    reloaded = MetricsIndex(reader, tmp_path / 'index.json', max_entries=2)
+    reloaded.get_many([_row(sources / name) for name in ['a.py', 'b.py', 'c.py']])
+    assert reader.read == ['a.py']
+
+
+def test_failed_save_leaves_no_temp_file(tmp_path, sources, monkeypatch, capsys):
+    index = MetricsIndex(Reader(), tmp_path / 'index' / 'metrics.json')
+    index.get(_row(sources / 'a.py'))
+
+    def disk_full(*args, **kwargs):
+        raise OSError(errno.ENOSPC, 'No space left on device')
+
+    monkeypatch.setattr(file_metrics.json, 'dump', disk_full)
+    index.save()
+
+    assert 'Could not save metrics index' in capsys.readouterr().out
+    assert list((tmp_path / 'index').iterdir()) == []
+
+
+def test_filter_sees_edits_between_runs(config, sources):
+    config.set('filter_settings.metrics_index', True)
+    files = FileScanner(config).scan_directory_table(sources, ['.py'], backend='walk')
+    filters = SmartFilters(config)
+
+    assert [f['relative_path'] for f in filters.apply_filter(files, 'has_todos')] == ['b.py']
+
+    _touch_later(sources / 'c.py', 'x = 1  # TODO: later\n')
+    assert [f['relative_path'] for f in filters.apply_filter(files, 'has_todos')] == ['b.py', 'c.py']
@@ -0,0 +1,64 @@
+import shutil
+import subprocess
+
+import pytest
+
+from file_scanner import FileScanner
+
+BACKENDS = ['walk', 'scandir', 'parallel', 'indexed', 'git']
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+
+def _write(root, relative_path, text='x = 1\n'):
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+
+
+@pytest.fixture
+def repository(tmp_path):
+    root = tmp_path / 'repo'
+    for relative_path in ['main.py', 'a/one.py', 'a/two.py', 'a/secret1.py', 'a/b/three.py',
+                          'a/b/secret2.py', 'a/b/local.py', 'a/build/out.py', 'a/node_modules/dep.py',
+                          'logs/debug.py', 'a/untracked.py', 'a/generated/gen.py']:
+        _write(root, relative_path)
+    _write(root, '.gitignore', 'logs/\ngenerated/\n')
+    _write(root, '.ignore', 'secret*.py\n')
+    _write(root, 'a/b/.codefuserignore', 'local.py\n')
+
+    git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', '-c', 'commit.gpgsign=false']
+    subprocess.run(git + ['init', '-q'], cwd=root, check=True)
+    subprocess.run(git + ['add', 'main.py', 'a/one.py', 'a/two.py', 'a/secret1.py', 'a/b', '.gitignore', '.ignore'],
+                   cwd=root, check=True)
+    subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=root, check=True)
+    return root
+
+
+def _scan(config, directory, backend):
+    scanner = FileScanner(config)
+    try:
+        return sorted(info.relative_path.replace('\\', '/')
+                      for info in scanner.scan_directory(directory, ['.py'], backend=backend))
+    finally:
+        scanner.git_integration.close()
+
+
+def test_backends_agree_on_repository_root(config, repository):
+    expected = ['a/b/three.py', 'a/one.py', 'a/two.py', 'a/untracked.py', 'main.py']
+    for backend in BACKENDS:
+        assert _scan(config, repository, backend) == expected, backend
+
+
+def test_backends_apply_ancestor_ignore_files_to_subfolder(config, repository):
+    expected = ['b/three.py', 'one.py', 'two.py', 'untracked.py']
+    for backend in BACKENDS:
+        assert _scan(config, repository / 'a', backend) == expected, backend
+
+
+def test_backends_agree_outside_git(config, tmp_path):
+    for relative_path in ['x.py', 'sub/y.py', 'sub/skip.py', 'dist/z.py']:
+        _write(tmp_path / 'plain', relative_path)
+    _write(tmp_path / 'plain', 'sub/.ignore', 'skip.py\n')
+    for backend in BACKENDS:
+        assert _scan(config, tmp_path / 'plain', backend) == ['sub/y.py', 'x.py'], backend
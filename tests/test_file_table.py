@@ -0,0 +1,80 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from file_table import FileRow, FileTable, find_row, prefix_range
+
+ROOT = os.path.join(os.sep, 'project')
+PATHS = ['README.md', os.path.join('pkg', 'a.py'), os.path.join('pkg', 'sub', 'b.py'),
+         os.path.join('pkg2', 'c.py'), 'pkg.py']
+
+
+@pytest.fixture
+def table():
+    return FileTable.from_entries(ROOT, [(path, index + 1, float(index)) for index, path in enumerate(sorted(PATHS))])
+
+
+def test_from_entries(table):
+    assert len(table) == 5
+    assert [row['relative_path'] for row in table] == sorted(PATHS)
+    assert [row['size'] for row in table] == [1, 2, 3, 4, 5]
+    # Directory strings are pooled; file names are split off
+    assert sorted(table.directories) == ['', 'pkg', os.path.join('pkg', 'sub'), 'pkg2']
+    assert table.names[find_row(table, os.path.join('pkg', 'sub', 'b.py'))] == 'b.py'
+
+    assert table[-1]['relative_path'] == sorted(PATHS)[-1]
+    assert [row['relative_path'] for row in table[1:3]] == sorted(PATHS)[1:3]
+    with pytest.raises(IndexError):
+        table[5]
+
+
+def test_row_behaves_like_a_dict(table):
+    row = table[find_row(table, os.path.join('pkg', 'a.py'))]
+
+    assert isinstance(row, FileRow)
+    assert row['path'] == os.path.join(ROOT, 'pkg', 'a.py')
+    assert isinstance(row['path'], str)
+    assert row.get('size') == row['size']
+    assert row.get('missing', 'default') == 'default'
+    assert 'relative_path' in row and 'missing' not in row
+    with pytest.raises(KeyError):
+        row['missing']
+
+    assert dict(row) == {'path': os.path.join(ROOT, 'pkg', 'a.py'),
+                         'relative_path': os.path.join('pkg', 'a.py'),
+                         'size': row['size'], 'modified_time': row['modified_time']}
+    assert {**row, 'prompt': 'x'}['prompt'] == 'x'
+
+
+def test_patched_upserts_and_removes(table):
+    rows = list(table)
+    upserted = [{'path': '', 'relative_path': 'pkg.py', 'size': 50, 'modified_time': 9.0},
+                {'path': '', 'relative_path': os.path.join('pkg', 'new.py'), 'size': 60, 'modified_time': 9.0},
+                {'path': '', 'relative_path': 'zzz.py', 'size': 70, 'modified_time': 9.0}]
+
+    patched = table.patched(upserted, ['README.md', 'not_there.py'], [])
+
+    expected = sorted(set(PATHS) - {'README.md'} | {os.path.join('pkg', 'new.py'), 'zzz.py'})
+    assert [row['relative_path'] for row in patched] == expected
+    assert patched[find_row(patched, 'pkg.py')]['size'] == 50
+    assert patched[find_row(patched, 'zzz.py')]['modified_time'] == 9.0
+
+    # The original table and its rows are left as they were
+    assert [row['relative_path'] for row in table] == sorted(PATHS)
+    assert [dict(row) for row in rows] == [dict(row) for row in table]
+
+
+def test_patched_removes_directories_by_prefix(table):
+    patched = table.patched([], [], ['pkg'])
+
+    # pkg.py and pkg2/ share the prefix 'pkg' but are not inside pkg/
+    assert [row['relative_path'] for row in patched] == ['README.md', 'pkg.py', os.path.join('pkg2', 'c.py')]
+    assert prefix_range(patched, os.path.join('pkg', '')) == (2, 2)
+
+
+def test_patched_accepts_datetime_modified_times(table):
+    when = datetime(2024, 1, 2, 3, 4, 5)
+    patched = table.patched([{'relative_path': 'new.py', 'size': 1, 'modified_time': when}], [], [])
+
+    assert patched[find_row(patched, 'new.py')]['modified_time'] == when.timestamp()
@@ -0,0 +1,120 @@
+import os
+import random
+
+import pytest
+
+from file_table import FileTable
+from file_tree_widget import FileTreeWidget
+
+
+class FakeListbox:
+    """Just enough of tk.Listbox to follow the rows the widget shows"""
+
+    def __init__(self):
+        self.rows = []
+        self.colors = []
+        self.inserted = 0
+
+    def _index(self, index):
+        return len(self.rows) if index == 'end' else index
+
+    def insert(self, index, text):
+        index = self._index(index)
+        self.inserted += 1
+        self.rows.insert(index, text)
+        self.colors.insert(index, None)
+
+    def delete(self, first, last=None):
+        first = self._index(first)
+        last = first if last is None else self._index(last) - 1
+        del self.rows[first:last + 1]
+        del self.colors[first:last + 1]
+
+    def itemconfig(self, index, options):
+        index = self._index(index)
+        self.colors[index if index < len(self.rows) else -1] = options['bg']
+
+    def pack(self, **kwargs):
+        pass
+
+    def pack_forget(self):
+        pass
+
+
+class FakeVar:
+    def __init__(self, value=''):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class FakeLabel(FakeListbox):
+    def config(self, **kwargs):
+        pass
+
+
+def _widget(search=''):
+    widget = FileTreeWidget.__new__(FileTreeWidget)
+    widget.selected_files = set()
+    widget.all_files = []
+    widget.filtered_files = []
+    widget.file_prompts = {}
+    widget.on_selection_change = None
+    widget.listbox = FakeListbox()
+    widget.empty_label = FakeLabel()
+    widget.counter_label = FakeLabel()
+    widget.search_var = FakeVar(search)
+    return widget
+
+
+def _rows(count, rng):
+    paths = set()
+    while len(paths) < count:
+        depth = rng.randint(0, 2)
+        parts = [rng.choice(['a', 'b', 'lib']) for _ in range(depth)] + [f'{rng.choice("xyz")}{rng.randint(0, 50)}.py']
+        paths.add(os.path.join(*parts))
+    return [{'path': os.path.join('/root', p), 'relative_path': p, 'size': 1, 'modified_time': 1.0}
+            for p in sorted(paths)]
+
+
+@pytest.mark.parametrize('as_table', [False, True])
+@pytest.mark.parametrize('search', ['', 'x'])
+@pytest.mark.parametrize('seed', range(5))
+def test_patched_rows_match_a_full_redraw(as_table, search, seed):
+    rng = random.Random(seed)
+    rows = _rows(60, rng)
+    files = FileTable.from_entries('/root', [(f['relative_path'], 1, 1.0) for f in rows]) if as_table else rows
+
+    widget = _widget(search)
+    widget.populate_tree(files)
+    widget._filter_files()
+    widget.selected_files = {f['relative_path'] for f in rows[::3]}
+    widget._update_display()
+
+    for _ in range(4):
+        current = [f['relative_path'] for f in widget.all_files]
+        removed = rng.sample(current, min(len(current), 3))
+        directories = {os.path.dirname(p) for p in current if os.path.dirname(p)}
+        removed_dirs = rng.sample(sorted(directories), 1) if directories and rng.random() < 0.5 else []
+        upserted = [{'path': '', 'relative_path': p, 'size': 2, 'modified_time': 2.0}
+                    for p in rng.sample(current, min(len(current), 2)) if p not in removed]
+        upserted += [f for f in _rows(4, rng) if f['relative_path'] not in current]
+        widget.selected_files.add(upserted[-1]['relative_path'])
+
+        widget.listbox.inserted = 0
+        widget.apply_changes(upserted, removed, removed_dirs)
+        # Only the changed rows are drawn again
+        assert widget.listbox.inserted <= len(upserted)
+
+        patched = (list(widget.listbox.rows), list(widget.listbox.colors))
+        widget._update_display()
+        assert patched == (widget.listbox.rows, widget.listbox.colors)
+
+        expected = sorted((set(current) - set(removed)
+                           - {p for p in current for d in removed_dirs if p.startswith(os.path.join(d, ''))})
+                          | {f['relative_path'] for f in upserted})
+        assert [f['relative_path'] for f in widget.all_files] == expected
+        assert widget.selected_files <= set(expected)
+        shown = [f['relative_path'] for f in widget.filtered_files]
+        assert shown == [p for p in expected if not search or search in os.path.basename(p)]
@@ -0,0 +1,186 @@
+import os
+import queue
+import shutil
+import sys
+import threading
+
+import pytest
+
+from file_scanner import FileScanner
+from file_table import FileTable, apply_file_changes
+from file_watcher import CHANGE_ADDED, CHANGE_MODIFIED, CHANGE_REMOVED, CHANGE_RESCAN, FileWatcher
+
+MODES = ['polling', pytest.param('inotify', marks=pytest.mark.skipif(
+    not sys.platform.startswith('linux'), reason='inotify is Linux only'))]
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('replace', [False, True])
+def test_lost_root_requests_rescan(config, tmp_path, mode, replace):
+    config.set('watch_settings.use_inotify', mode == 'inotify')
+    config.set('watch_settings.poll_interval_seconds', 0.05)
+    root = tmp_path / 'project'
+    (root / 'pkg').mkdir(parents=True)
+    (root / 'pkg' / 'main.py').write_text('x = 1\n', encoding='utf-8')
+
+    received = []
+    delivered = threading.Event()
+
+    def on_changes(changes):
+        received.extend(changes)
+        delivered.set()
+
+    watcher = FileWatcher(config, root, ['.py'], False, on_changes)
+    try:
+        assert watcher.start() == mode
+        if replace:
+            root.rename(tmp_path / 'old')
+            root.mkdir()
+        else:
+            shutil.rmtree(root)
+        assert delivered.wait(5)
+        assert [change.kind for change in received] == [CHANGE_RESCAN]
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify is Linux only')
+def test_busy_file_does_not_hold_back_changes(config, tmp_path):
+    config.set('watch_settings.debounce_ms', 200)
+    config.set('watch_settings.max_delay_ms', 500)
+    root = tmp_path / 'project'
+    root.mkdir()
+    busy = root / 'busy.py'
+    busy.write_text('0\n', encoding='utf-8')
+
+    delivered = threading.Event()
+    watcher = FileWatcher(config, root, ['.py'], False, lambda changes: delivered.set())
+    stop_writing = threading.Event()
+
+    def keep_writing():
+        count = 0
+        while not stop_writing.wait(0.05):
+            count += 1
+            busy.write_text(f'{count}\n', encoding='utf-8')
+
+    writer = threading.Thread(target=keep_writing)
+    try:
+        assert watcher.start() == 'inotify'
+        writer.start()
+        # Events never pause for a whole debounce period, yet a batch arrives
+        assert delivered.wait(3)
+        assert writer.is_alive()
+    finally:
+        stop_writing.set()
+        writer.join()
+        watcher.stop()
+
+
+def _collect(batches, paths, timeout=5):
+    """Latest change per path from the delivered batches, once every path was seen"""
+    latest = {}
+    while not paths <= latest.keys():
+        for change in batches.get(timeout=timeout):
+            latest[change.relative_path] = change
+    return latest
+
+
+def _apply(files, changes):
+    upserted = [{'path': change.path, 'relative_path': change.relative_path,
+                 'size': change.size, 'modified_time': change.modified_time}
+                for change in changes if change.kind in (CHANGE_ADDED, CHANGE_MODIFIED)]
+    removed = [change.relative_path for change in changes if change.kind == CHANGE_REMOVED]
+    return apply_file_changes(files, upserted, removed, [])
+
+
+def _polling_watcher(config, root, batches):
+    config.set('watch_settings.use_inotify', False)
+    config.set('watch_settings.poll_interval_seconds', 0.05)
+    watcher = FileWatcher(config, root, ['.py'], False, batches.put)
+    assert watcher.start() == 'polling'
+    return watcher
+
+
+@pytest.mark.parametrize('as_table', [False, True])
+def test_polling_changes_patch_the_scanned_files(config, tmp_path, as_table):
+    root = tmp_path / 'project'
+    (root / 'pkg').mkdir(parents=True)
+    for name in ['a.py', os.path.join('pkg', 'b.py'), os.path.join('pkg', 'c.py')]:
+        (root / name).write_text('x = 1\n', encoding='utf-8')
+    scanner = FileScanner(config)
+
+    def scan():
+        if as_table:
+            return scanner.scan_directory_table(root, ['.py'])
+        return [{'path': f.path, 'relative_path': f.relative_path, 'size': f.size,
+                 'modified_time': f.modified_time.timestamp()}
+                for f in scanner.scan_directory(root, ['.py'])]
+
+    files = scan()
+    batches = queue.Queue()
+    watcher = _polling_watcher(config, root, batches)
+    try:
+        (root / 'pkg' / 'new.py').write_text('y = 2\n', encoding='utf-8')
+        (root / 'a.py').write_text('x = 1000\n', encoding='utf-8')
+        (root / 'pkg' / 'b.py').unlink()
+        (root / 'notes.txt').write_text('not watched\n', encoding='utf-8')
+
+        b_path = os.path.join('pkg', 'b.py')
+        new_path = os.path.join('pkg', 'new.py')
+        latest = _collect(batches, {'a.py', b_path, new_path})
+    finally:
+        watcher.stop()
+
+    assert {path: change.kind for path, change in latest.items()} == {
+        'a.py': CHANGE_MODIFIED, b_path: CHANGE_REMOVED, new_path: CHANGE_ADDED}
+    assert latest['a.py'].size == len('x = 1000\n')
+
+    patched = _apply(files, latest.values())
+    assert isinstance(patched, FileTable) == as_table
+    assert [(f['relative_path'], f['size']) for f in patched] == \
+        [(f['relative_path'], f['size']) for f in scan()]
+    # The scanned files themselves were not modified
+    assert [f['relative_path'] for f in files] == ['a.py', b_path, os.path.join('pkg', 'c.py')]
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_edited_ignore_file_changes_the_watched_files(config, tmp_path, mode):
+    root = tmp_path / 'project'
+    root.mkdir()
+    (root / 'keep.py').write_text('x = 1\n', encoding='utf-8')
+    (root / 'generated.py').write_text('x = 2\n', encoding='utf-8')
+
+    batches = queue.Queue()
+    if mode == 'polling':
+        watcher = _polling_watcher(config, root, batches)
+    else:
+        watcher = FileWatcher(config, root, ['.py'], False, batches.put)
+        assert watcher.start() == 'inotify'
+    try:
+        (root / '.codefuserignore').write_text('generated.py\n', encoding='utf-8')
+        if mode == 'polling':
+            # The next poll scans with the new rules and drops the ignored file
+            latest = _collect(batches, {'generated.py'})
+            assert [(change.relative_path, change.kind) for change in latest.values()] == \
+                [('generated.py', CHANGE_REMOVED)]
+        else:
+            # inotify only reports the ignore file itself, so the caller rescans
+            assert {change.kind for change in batches.get(timeout=5)} == {CHANGE_RESCAN}
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.parametrize('as_table', [False, True])
+def test_removed_directory_keeps_siblings_sharing_its_prefix(as_table):
+    paths = ['pkg.py', os.path.join('pkg', 'a.py'), os.path.join('pkg', 'sub', 'b.py'),
+             os.path.join('pkg2', 'c.py')]
+    files = sorted(paths)
+    if as_table:
+        files = FileTable.from_entries('/root', [(p, 1, 1.0) for p in files])
+    else:
+        files = [{'path': '', 'relative_path': p, 'size': 1, 'modified_time': 1.0} for p in files]
+
+    patched = apply_file_changes(files, [], [], ['pkg'])
+
+    assert sorted(f['relative_path'] for f in patched) == sorted(['pkg.py', os.path.join('pkg2', 'c.py')])
+    assert len(files) == 4
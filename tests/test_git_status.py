@@ -0,0 +1,111 @@
+import shutil
+import subprocess
+
+import pytest
+
+from file_scanner import FileScanner
+from git_integration import GitIntegration
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+GIT = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', '-c', 'commit.gpgsign=false']
+
+
+def _git(root, *args):
+    subprocess.run(GIT + list(args), cwd=root, check=True, capture_output=True)
+
+
+def _write(root, relative_path, text='x = 1\n', newline=None):
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline=newline) as f:
+        f.write(text)
+
+
+@pytest.fixture
+def home(config, tmp_path, monkeypatch):
+    """The scratch HOME of config, which git reads its global settings from"""
+    monkeypatch.delenv('XDG_CONFIG_HOME', raising=False)
+    monkeypatch.delenv('GIT_CONFIG_GLOBAL', raising=False)
+    monkeypatch.setenv('GIT_CONFIG_NOSYSTEM', '1')
+    path = tmp_path / 'home'
+    path.mkdir(exist_ok=True)
+    return path
+
+
+@pytest.fixture
+def repository(home, tmp_path):
+    root = tmp_path / 'repo'
+    for relative_path in ['keep.py', 'edit.py', 'stage.py', 'remove.py', 'move.py', 'sub/inner.py', 'sub/edit.py']:
+        _write(root, relative_path, f'# {relative_path}\n')
+    _write(root, '.gitignore', '*.log\n')
+    _git(root, 'init', '-q')
+    _git(root, 'add', '-A')
+    _git(root, 'commit', '-q', '-m', 'init')
+
+    _write(root, 'edit.py', 'changed\n')
+    _write(root, 'sub/edit.py', 'changed\n')
+    _write(root, 'stage.py', 'staged\n')
+    _git(root, 'add', 'stage.py')
+    _write(root, 'new.py', 'added\n')
+    _git(root, 'add', 'new.py')
+    (root / 'remove.py').unlink()
+    _git(root, 'mv', 'move.py', 'moved.py')
+    _write(root, 'untracked.py')
+    _write(root, 'sub/untracked.py')
+    _write(root, 'debug.log')
+    return root
+
+
+def _status(config, directory, backend):
+    config.set('git_settings.status_backend', backend)
+    scanner = FileScanner(config)
+    files = scanner.scan_directory_table(directory, [], backend='walk')
+    scanner.git_integration.close()
+
+    integration = GitIntegration(config)
+    try:
+        status = integration.get_git_status(directory, None, files)
+    finally:
+        integration.close()
+    # The git backend lists renames twice, as the porcelain parser always has
+    return {category: sorted({p.replace('\\', '/') for p in paths}) for category, paths in status.items() if paths}
+
+
+def test_index_status_matches_git_status(config, repository):
+    expected = _status(config, repository, 'git')
+    assert expected['modified'] == ['edit.py', 'sub/edit.py']
+    assert _status(config, repository, 'index') == expected
+
+
+def test_index_status_matches_git_status_in_subfolder(config, repository):
+    assert _status(config, repository / 'sub', 'index') == _status(config, repository / 'sub', 'git')
+
+
+def test_global_autocrlf_is_honoured(config, home, tmp_path):
+    root = tmp_path / 'crlf'
+    _write(root, 'checkout.py', 'a = 1\nb = 2\n')
+    _write(root, 'edited.py', 'a = 1\n')
+    _git(root, 'init', '-q')
+    _git(root, 'add', '-A')
+    _git(root, 'commit', '-q', '-m', 'init')
+
+    # As on Windows: checkout writes CRLF for blobs stored with LF
+    _git(home, 'config', '--global', 'core.autocrlf', 'true')
+    (root / 'checkout.py').unlink()
+    _git(root, 'checkout', '--', 'checkout.py')
+    assert (root / 'checkout.py').read_bytes() == b'a = 1\r\nb = 2\r\n'
+    _write(root, 'edited.py', 'a = 2\r\n', newline='')
+
+    expected = _status(config, root, 'git')
+    assert expected == {'modified': ['edited.py']}
+    assert _status(config, root, 'index') == expected
+
+
+def test_global_excludes_file_is_honoured(config, home, repository):
+    (home / 'excludes').write_text('untracked.py\n', encoding='utf-8')
+    _git(home, 'config', '--global', 'core.excludesFile', str(home / 'excludes'))
+
+    expected = _status(config, repository, 'git')
+    assert 'untracked.py' not in expected.get('untracked', [])
+    assert _status(config, repository, 'index') == expected
@@ -0,0 +1,150 @@
+import shutil
+import subprocess
+
+import pytest
+
+import instrumentation
+from git_worker import CatFileBatch, LastCommitWalker, NameStatusStream
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+GIT = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', '-c', 'commit.gpgsign=false']
+
+ODD_NAMES = ['with space.py', 'new\nline.py']
+
+
+def _git(root, *args):
+    return subprocess.run(GIT + list(args), cwd=root, check=True, capture_output=True).stdout.decode()
+
+
+def _commit(root, files, message):
+    for relative_path, text in files.items():
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+    _git(root, 'add', '-A')
+    _git(root, 'commit', '-q', '-m', message)
+    return _git(root, 'rev-parse', 'HEAD').strip()
+
+
+@pytest.fixture
+def repository(config, tmp_path, monkeypatch):
+    monkeypatch.setenv('GIT_CONFIG_NOSYSTEM', '1')
+    root = tmp_path / 'repo'
+    root.mkdir()
+    _git(root, 'init', '-q', '-b', 'main')
+    return root
+
+
+def test_walker_finds_newest_commit_per_path(repository):
+    first = _commit(repository, {'a.py': '1\n', 'b.py': '1\n', 'sub/c.py': '1\n'}, 'first')
+    second = _commit(repository, {'a.py': '2\n'}, 'second')
+    third = _commit(repository, {'sub/c.py': '3\n', ODD_NAMES[0]: '3\n', ODD_NAMES[1]: '3\n'}, 'third')
+
+    walker = LastCommitWalker(str(repository))
+    try:
+        found = walker.find(['a.py', 'b.py', 'sub/c.py', 'untracked.py'] + ODD_NAMES)
+    finally:
+        walker.close()
+
+    assert {path: info['last_commit_hash'] for path, info in found.items()} == {
+        'a.py': second, 'b.py': first, 'sub/c.py': third, ODD_NAMES[0]: third, ODD_NAMES[1]: third}
+    assert found['a.py']['last_commit_message'] == 'second'
+    assert found['a.py']['last_author_email'] == 'test@example.com'
+
+
+def test_walker_resumes_for_older_paths(repository):
+    oldest = _commit(repository, {'old.py': '1\n'}, 'old')
+    # Subjects longer than a pipe buffer, so the walk cannot have read the
+    # old commit by the time it knows about the newest one
+    for index in range(3):
+        _commit(repository, {f'new{index}.py': '1\n'}, f'new {index} ' + 'x' * 100000)
+
+    instrumentation.recorder.start_run()
+    walker = LastCommitWalker(str(repository))
+    try:
+        assert list(walker.find(['new2.py'])) == ['new2.py']
+        assert 'old.py' not in walker.found
+
+        assert walker.find(['old.py'])['old.py']['last_commit_hash'] == oldest
+        # Answered from what the first walk recorded on its way
+        assert list(walker.find(['new1.py', 'new2.py'])) == ['new1.py', 'new2.py']
+    finally:
+        walker.close()
+    assert instrumentation.recorder.report()['summary']['subprocesses'] == 1
+
+
+def test_walker_reports_merges_that_changed_a_path(repository):
+    _commit(repository, {'both.py': 'base\n', 'theirs.py': 'base\n'}, 'base')
+    _git(repository, 'checkout', '-q', '-b', 'topic')
+    topic = _commit(repository, {'both.py': 'topic\n', 'theirs.py': 'topic\n'}, 'topic')
+    _git(repository, 'checkout', '-q', 'main')
+    _commit(repository, {'both.py': 'main\n'}, 'main')
+
+    subprocess.run(GIT + ['merge', '-q', 'topic'], cwd=repository, capture_output=True)
+    merge = _commit(repository, {'both.py': 'resolved\n'}, 'merge topic')
+
+    walker = LastCommitWalker(str(repository))
+    try:
+        found = walker.find(['both.py', 'theirs.py'])
+    finally:
+        walker.close()
+
+    # The resolved file differs from both parents; the other came over unchanged
+    assert found['both.py']['last_commit_hash'] == merge
+    assert found['theirs.py']['last_commit_hash'] == topic
+
+
+def test_walker_pathspec_limits_the_walk(repository):
+    inside = _commit(repository, {'sub/c.py': '1\n'}, 'inside')
+    _commit(repository, {'a.py': '1\n'}, 'outside')
+
+    walker = LastCommitWalker(str(repository), 'sub')
+    try:
+        found = walker.find(['sub/c.py', 'a.py'])
+    finally:
+        walker.close()
+    assert {path: info['last_commit_hash'] for path, info in found.items()} == {'sub/c.py': inside}
+
+
+def test_cat_file_batch(repository):
+    _commit(repository, {'a.py': 'x = 1\n', ODD_NAMES[0]: 'spaced\n', ODD_NAMES[1]: 'newline\n'}, 'first')
+
+    cat_file = CatFileBatch(str(repository))
+    try:
+        specs = ['HEAD:a.py', 'HEAD:missing.py', f'HEAD:{ODD_NAMES[1]}', f'HEAD:{ODD_NAMES[0]}', 'HEAD']
+        results = cat_file.query(specs)
+        # A missing object or a spec with a newline does not shift later answers
+        assert [result and result[1:] for result in results] == [
+            ('blob', 6), None, None, ('blob', 7), ('commit', results[4][2])]
+        assert results[0][0] == _git(repository, 'rev-parse', 'HEAD:a.py').strip()
+
+        # The same process answers later queries
+        process = cat_file._process
+        assert cat_file.query(['HEAD:a.py']) == results[:1]
+        assert cat_file._process is process
+    finally:
+        cat_file.close()
+
+
+def test_name_status_stream(repository):
+    base = _commit(repository, {'keep.py': 'k\n', 'gone.py': 'g\n', 'move.py': 'same text\n' * 20}, 'base')
+    (repository / 'gone.py').unlink()
+    (repository / 'move.py').rename(repository / 'moved.py')
+    _commit(repository, {'keep.py': 'changed\n', ODD_NAMES[0]: 's\n', ODD_NAMES[1]: 'n\n'}, 'change')
+
+    stream = NameStatusStream(['diff', '-z', '--name-status', '-M', base, 'HEAD'], str(repository))
+    assert sorted(stream) == sorted([
+        ('D', 'gone.py', None), ('M', 'keep.py', None), ('R', 'moved.py', 'move.py'),
+        ('A', ODD_NAMES[0], None), ('A', ODD_NAMES[1], None)])
+    assert stream.returncode == 0
+
+    # Log output: records of several commits, newest first
+    stream = NameStatusStream(['log', '-z', '--name-status', '-M', '--format='], str(repository))
+    records = list(stream)
+    assert records[-3:] == [('A', 'gone.py', None), ('A', 'keep.py', None), ('A', 'move.py', None)]
+    assert len(records) == 8
+
+    stream = NameStatusStream(['diff', '-z', '--name-status', 'no-such-revision', 'HEAD'], str(repository))
+    assert list(stream) == []
+    assert stream.returncode != 0
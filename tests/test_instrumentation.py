@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from instrumentation import Instrumentation
+
+
+def test_report_derives_rates_from_spans():
+    recorder = Instrumentation()
+    recorder.count('files_scanned', 300)
+    recorder.add_time('scan', 1.0)
+    recorder.add_time('scan', 0.5)
+    recorder.count_read(4000, files=2)
+    recorder.count_read(1000)
+    recorder.add_time('read', 0.25)
+
+    report = recorder.report()
+    summary = report['summary']
+    assert summary['files_scanned'] == 300
+    assert summary['scan_files_per_second'] == pytest.approx(200.0)
+    assert summary['files_read'] == 3
+    assert summary['bytes_read'] == 5000
+    assert summary['read_bytes_per_second'] == pytest.approx(20000.0)
+    assert report['spans']['scan'] == {'calls': 2, 'total': 1.5, 'max': 1.0, 'mean': 0.75}
+
+
+def test_rates_are_none_without_their_span():
+    recorder = Instrumentation()
+    recorder.count('files_scanned', 10)
+    recorder.count_read(100)
+
+    summary = recorder.report()['summary']
+    assert summary['scan_files_per_second'] is None
+    assert summary['read_bytes_per_second'] is None
+    assert summary['cache_hits'] == 0 and summary['subprocesses'] == 0
+
+    # A span that took no measurable time gives no rate either
+    recorder.add_time('scan', 0.0)
+    assert recorder.report()['summary']['scan_files_per_second'] is None
+    lines = recorder.format_report().splitlines()
+    assert next(line for line in lines if line.startswith('Scan files per second')).endswith(' -')
+
+
+def test_start_run_resets_figures(tmp_path):
+    recorder = Instrumentation()
+    with recorder.span('scan'):
+        recorder.count('files_scanned', 5)
+    recorder.count('subprocesses')
+
+    recorder.start_run('/project')
+
+    report = recorder.report()
+    assert report['label'] == '/project'
+    assert report['spans'] == {} and report['counters'] == {}
+    assert report['summary']['files_scanned'] == 0
+
+    recorder.count('files_exported', 2)
+    recorder.save_report(tmp_path / 'report.json')
+    saved = json.loads((tmp_path / 'report.json').read_text(encoding='utf-8'))
+    assert saved['summary']['files_exported'] == 2
+    assert saved['label'] == '/project'
@@ -0,0 +1,93 @@
+import io
+import re
+from pathlib import Path
+
+import pytest
+
+import instrumentation
+from output_manager import OutputManager
+
+
+@pytest.fixture
+def files(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'pkg').mkdir(parents=True)
+    (root / 'main.py').write_text('print("main")\n', encoding='utf-8')
+    (root / 'pkg' / 'util.js').write_text('export const x = 1;\n' * 5000, encoding='utf-8')
+    # Can be opened but is not valid UTF-8, so it only fails once it is read
+    (root / 'pkg' / 'broken.py').write_bytes(b'\xff\xfe broken\n')
+    (root / 'README.md').write_text('# Readme\r\n', encoding='utf-8')
+
+    paths = [root / 'main.py', root / 'pkg' / 'broken.py', root / 'pkg' / 'gone.py',
+             root / 'pkg' / 'util.js', root / 'README.md']
+    # gone.py was scanned but deleted before the export
+    return [{'path': path, 'relative_path': path.relative_to(root).as_posix(),
+             'size': path.stat().st_size if path.exists() else 10}
+            for path in paths]
+
+
+class RecordingCache:
+    """Stands in for ContentCache and records what the output held at each read"""
+
+    def __init__(self):
+        self.output_path = None
+        self.output_at_read = []
+
+    def read_text(self, path, encoding='utf-8'):
+        self.output_at_read.append(self.output_path.read_text(encoding='utf-8'))
+        return Path(path).read_text(encoding=encoding)
+
+
+@pytest.mark.parametrize('streamed', [False, True])
+def test_html_toc_matches_written_sections(config, tmp_path, files, streamed):
+    manager = OutputManager(config)
+    instrumentation.recorder.start_run()
+    if streamed:
+        output = io.StringIO()
+        manager.stream_output(files, output, 'html', 'Review this')
+        page = output.getvalue()
+    else:
+        page = manager.create_output(files, tmp_path / 'out', 'html', 'Review this').read_text(encoding='utf-8')
+
+    links = re.findall(r'<li><a href="#([^"]+)">', page)
+    sections = re.findall(r'<div class="file-section" id="([^"]+)">', page)
+    assert links == sections
+    assert len(sections) == 4
+    assert 'gone.py' not in page
+    assert page.count('Could not read this file') == 1
+    assert re.search(r'<div class="stat-value">4</div>\s*<div class="stat-label">Total Files</div>', page)
+    assert page.rstrip().endswith('</html>')
+    assert instrumentation.recorder.report()['summary']['files_exported'] == 3
+
+
+@pytest.mark.parametrize('zero_copy', [False, True])
+def test_text_counts_readable_files(config, tmp_path, files, zero_copy):
+    config.set('output_settings.zero_copy', zero_copy)
+    config.set('output_settings.zero_copy_min_size', 0)
+    manager = OutputManager(config)
+    instrumentation.recorder.start_run()
+
+    text = manager.create_output(files, tmp_path / 'out', 'txt').read_text(encoding='utf-8')
+
+    assert '# Total Files: 4\n' in text
+    assert 'gone.py' not in text
+    separator = manager.formatters['txt'].get_separator().format(filepath='README.md')
+    assert text.count(separator.split('README.md')[0]) == 4
+    assert text.count('[Could not read this file: ') == 1
+    assert text.endswith('# Readme\n')
+    assert 'export const x = 1;\n' * 5000 in text
+    assert instrumentation.recorder.report()['summary']['files_exported'] == 3
+
+
+@pytest.mark.parametrize('format, header', [('txt', '# Total Files: 4'), ('html', '</ul>')])
+def test_header_is_flushed_before_files_are_read(config, tmp_path, files, format, header):
+    config.set('output_settings.zero_copy', False)
+    cache = RecordingCache()
+    cache.output_path = tmp_path / f'out.{format}'
+    manager = OutputManager(config, cache)
+
+    manager.create_output(files, cache.output_path, format)
+
+    # Every file but the deleted one went through the cache
+    assert len(cache.output_at_read) == 4
+    assert all(header in output for output in cache.output_at_read)
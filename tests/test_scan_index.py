@@ -0,0 +1,49 @@
+import errno
+import os
+
+import scan_index
+from scan_index import ScanIndex
+
+
+def _directories():
+    return {'': {'mtime': 1, 'dirs': ['pkg'], 'files': {'a.py': [3, 1]}},
+            'pkg': {'mtime': 1, 'dirs': [], 'files': {'b.py': None}}}
+
+
+def test_save_and_load(tmp_path):
+    index = ScanIndex(tmp_path / 'index')
+    index.save('/project', ['node_modules'], _directories())
+
+    assert index.load('/project', ['node_modules']) == _directories()
+    # A different set of pruned folders is a different index
+    assert index.load('/project', []) == {}
+    assert index.load('/other', ['node_modules']) == {}
+
+
+def test_failed_save_leaves_no_temp_file(tmp_path, monkeypatch, capsys):
+    index = ScanIndex(tmp_path / 'index')
+
+    def disk_full(*args, **kwargs):
+        raise OSError(errno.ENOSPC, 'No space left on device')
+
+    monkeypatch.setattr(scan_index.json, 'dump', disk_full)
+    index.save('/project', [], _directories())
+
+    assert 'Could not save scan index' in capsys.readouterr().out
+    assert list((tmp_path / 'index').iterdir()) == []
+
+
+def test_only_recent_indexes_are_kept(tmp_path):
+    index = ScanIndex(tmp_path / 'index', max_indexes=2)
+    for number, root in enumerate(['/one', '/two', '/three']):
+        index.save(root, [], _directories())
+        # Coarse file system timestamps must not make the saves look simultaneous
+        path = index._index_path(root, [])
+        os.utime(path, ns=(number * 10 ** 9, number * 10 ** 9))
+
+    index.save('/one', [], _directories())
+
+    assert len(list((tmp_path / 'index').glob('*.json'))) == 2
+    assert index.load('/two', []) == {}
+    assert index.load('/three', []) == _directories()
+    assert index.load('/one', []) == _directories()
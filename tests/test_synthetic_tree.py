@@ -0,0 +1,50 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from file_scanner import FileScanner
+from synthetic_tree import IGNORED_FOLDERS, TreeSpec, generate_tree
+
+
+def _contents(root):
+    return {path.relative_to(root).as_posix(): path.read_bytes()
+            for path in sorted(root.rglob('*')) if path.is_file() and '.git' not in path.parts}
+
+
+def test_same_spec_gives_same_tree(tmp_path):
+    spec = TreeSpec(files=60, depth=2, fan_out=3, commits=0, lines=20, seed=7)
+    first = generate_tree(tmp_path / 'first', spec)
+    second = generate_tree(tmp_path / 'second', spec)
+
+    assert first == second
+    assert len(first) == 60
+    assert _contents(tmp_path / 'first') == _contents(tmp_path / 'second')
+
+    other = generate_tree(tmp_path / 'other', TreeSpec(files=60, depth=2, fan_out=3, commits=0, lines=20, seed=8))
+    assert other != first
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+def test_scan_skips_ignored_folders(config, tmp_path):
+    root = tmp_path / 'tree'
+    spec = TreeSpec(files=120, depth=2, fan_out=3, commits=3, lines=20, ignored_ratio=0.3)
+    written = generate_tree(root, spec)
+
+    expected = sorted(path for path in written
+                      if not set(path.split('/')) & set(IGNORED_FOLDERS))
+    assert len(expected) < len(written)
+
+    extensions = list(spec.extensions)
+    for backend in ('walk', 'git'):
+        scanned = FileScanner(config).scan_directory(root, extensions, backend=backend)
+        # The generator also adds untracked_*.py files next to the tree
+        paths = [Path(f.relative_path).as_posix() for f in scanned
+                 if not f.relative_path.startswith('untracked_')]
+        assert paths == expected, backend
+
+    log = subprocess.run(['git', 'log', '--oneline'], cwd=root, capture_output=True, text=True, check=True)
+    assert len(log.stdout.splitlines()) == 3
+    status = subprocess.run(['git', 'status', '--porcelain'], cwd=root, capture_output=True, text=True, check=True)
+    assert {line[:2] for line in status.stdout.splitlines()} >= {' M', 'M ', '??'}